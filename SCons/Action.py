@@ -100,7 +100,6 @@ way for wrapping up the functions.
 
 """
 
-import inspect
 import os
 import pickle
 import re
@@ -109,6 +108,7 @@ import sys
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from subprocess import DEVNULL
+from types import BuiltinFunctionType, MethodType
 from typing import Union
 
 import SCons.Debug
@@ -327,6 +327,22 @@ def _function_contents(func) -> bytearray:
     return retval
 
 
+def _class_tree(cls):
+    """Return ``inspect.getclasstree([cls])``.
+
+    Signature contents are made for the constants in the code of every
+    function action, so this saves importing :mod:`inspect`, which is
+    slow, in every run.
+    """
+    if not cls.__bases__:
+        return [(cls, cls.__bases__)]
+    tree = []
+    for base in sorted(cls.__bases__, key=lambda c: (c.__module__, c.__name__)):
+        tree.append((base, base.__bases__))
+        tree.append([(cls, cls.__bases__)])
+    return tree
+
+
 def _object_instance_content(obj):
     """
     Returns consistant content for a action class or an instance thereof
@@ -348,15 +364,15 @@ def _object_instance_content(obj):
     inst_class = obj.__class__
     inst_class_name = bytearray(obj.__class__.__name__,'utf-8')
     inst_class_module = bytearray(obj.__class__.__module__,'utf-8')
-    inst_class_hierarchy = bytearray(repr(inspect.getclasstree([obj.__class__,])),'utf-8')
+    inst_class_hierarchy = bytearray(repr(_class_tree(obj.__class__)),'utf-8')
     # print("ICH:%s : %s"%(inst_class_hierarchy, repr(obj)))
 
-    properties = [(p, getattr(obj, p, "None")) for p in dir(obj) if not (p[:2] == '__' or inspect.ismethod(getattr(obj, p)) or inspect.isbuiltin(getattr(obj,p))) ]
+    properties = [(p, getattr(obj, p, "None")) for p in dir(obj) if not (p[:2] == '__' or isinstance(getattr(obj, p), (MethodType, BuiltinFunctionType))) ]
     properties.sort()
     properties_str = ','.join(["%s=%s"%(p[0],p[1]) for p in properties])
     properties_bytes = bytearray(properties_str,'utf-8')
 
-    methods = [p for p in dir(obj) if inspect.ismethod(getattr(obj, p))]
+    methods = [p for p in dir(obj) if isinstance(getattr(obj, p), MethodType)]
     methods.sort()
 
     method_contents = []
@@ -806,9 +822,17 @@ def _resolve_shell_env(env, target, source):
     created execution environment, passing each the returned execution
     environment from the previous call.
 
+    If the build shares a GNU make jobserver, ``MAKEFLAGS`` is set so
+    that a ``make`` run by the action takes part in it.
+
     .. versionadded:: 4.4
     """
     ENV = get_default_ENV(env)
+    # pylint: disable=import-outside-toplevel
+    from SCons.Taskmaster.Job import jobserver
+    if jobserver is not None:
+        ENV = ENV.copy()
+        ENV['MAKEFLAGS'] = jobserver.makeflags(ENV.get('MAKEFLAGS'))
     shell_gen = env.get('SHELL_ENV_GENERATORS')
     if shell_gen:
         try:
@@ -880,7 +904,7 @@ def _subproc(scons_env, cmd, error: str='ignore', **kw):
     finally:
         # clean up open file handles stored in parent's kw
         for k, v in kw.items():
-            if inspect.ismethod(getattr(v, 'close', None)):
+            if isinstance(getattr(v, 'close', None), MethodType):
                 v.close()
 
     return pobj
@@ -999,6 +1023,24 @@ class CommandAction(_ActionAction):
             source = executor.get_all_sources()
         cmd_list, ignore, silent = self.process(target, list(map(rfile, source)), env, executor)
 
+        remote = env.get('REMOTE_EXECUTOR')
+        if remote is not None:
+            # pylint: disable=import-outside-toplevel
+            from SCons.Taskmaster.Remote import execute as remote_execute
+            cmd_lines = [escape_list(cmd_line, escape)
+                         for cmd_line in filter(len, cmd_list)]
+            result = remote_execute(
+                remote, shell, cmd_lines, ENV, target, source, ignore)
+            if result is not None:
+                status, cmd_line = result
+                if status:
+                    msg = "Error %s" % status
+                    return SCons.Errors.BuildError(errstr=msg,
+                                                   status=status,
+                                                   action=self,
+                                                   command=cmd_line)
+                return 0
+
         # Use len() to filter out any "command" that's zero-length.
         for cmd_line in filter(len, cmd_list):
             # Escape the command line for the interpreter we are using.
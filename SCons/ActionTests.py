@@ -2290,6 +2290,22 @@ class ObjectContentsTestCase(unittest.TestCase):
 
         self.assertEqual(c, expected[sys.version_info[:2]])
 
+    def test_class_tree(self) -> None:
+        """Test that Action._class_tree matches inspect.getclasstree"""
+        import collections
+        import inspect
+
+        class Mixin:
+            pass
+
+        class Both(collections.UserDict, Mixin):
+            pass
+
+        for cls in (object, int, str, type(None), TestClass,
+                    collections.OrderedDict, SCons.Environment.Base, Both):
+            self.assertEqual(repr(SCons.Action._class_tree(cls)),
+                             repr(inspect.getclasstree([cls])))
+
     def test_code_contents(self) -> None:
         """Test that Action._code_contents works"""
 
@@ -25,14 +25,14 @@
 """
 
 import atexit
-import json
 import os
 import stat
 import sys
-import uuid
+import threading
 
 import SCons.Action
 import SCons.Errors
+import SCons.Util
 import SCons.Warnings
 import SCons
 
@@ -41,7 +41,7 @@ cache_debug = False
 cache_force = False
 cache_show = False
 cache_readonly = False
-cache_tmp_uuid = uuid.uuid4().hex
+cache_tmp_uuid = os.urandom(16).hex()
 
 def CacheRetrieveFunc(target, source, env) -> int:
     t = target[0]
@@ -176,6 +176,8 @@ class CacheDir:
             msg = "Failed to create cache directory " + path
             raise SCons.Errors.SConsEnvironmentError(msg)
 
+        import json
+
         try:
             with open(config_file, 'x') as config:
                 self.config['prefix_len'] = 2
@@ -309,6 +311,17 @@ class CacheDir:
 
         return False
 
+    def prefetch(self, node) -> None:
+        """Get ready to retrieve *node*, which is about to be built.
+
+        Called for each target which may be retrieved from the cache,
+        before the task which builds it is executed.  A cache which is
+        slow to query can start fetching the node here, so it is ready
+        by the time :meth:`retrieve` asks for it.  Files in a local
+        cache directory are fast enough to get, so this does nothing.
+        """
+        pass
+
     def push(self, node):
         if self.is_readonly() or not self.is_enabled():
             return
@@ -318,6 +331,218 @@ class CacheDir:
         if cache_force:
             return self.push(node)
 
+
+def is_remote(path) -> bool:
+    """Return whether a CacheDir *path* names a remote cache."""
+    return SCons.Util.is_String(path) and path.startswith(('http://', 'https://'))
+
+
+class HTTPCacheDir(CacheDir):
+    """A derived-file cache kept on an HTTP server.
+
+    Entries are fetched with ``GET`` and stored with ``PUT`` requests for
+    ``<url>/<prefix>/<signature>``, the layout a cache directory has on
+    disk, so any server that stores and returns files (a WebDAV share,
+    say) can hold the cache.  The server answers ``404`` for an entry it
+    does not have.  The mode of a stored file is passed in an optional
+    ``X-SCons-Mode`` header.
+
+    A local cache directory, :attr:`l1_dir`, sits in front of the
+    server, and is used through the usual CacheDir machinery: an entry
+    is downloaded there before it is retrieved, and uploaded from there
+    in the background after it is pushed.  Downloads start when a target
+    is prepared for building (see :meth:`prefetch`), as its task is
+    handed to a job, so the targets of the tasks being executed in
+    parallel are fetched concurrently; targets which are not yet ready
+    to build are not fetched ahead of time.  Up to
+    :attr:`workers` requests are made at once, over connections which
+    are kept open between requests.
+    """
+
+    # The local cache directory, relative to the top-level directory.
+    l1_dir = '.scons_cache'
+    # The maximum number of requests made at once.
+    workers = 8
+    # Seconds to wait for the server before giving up on a request.
+    timeout = 30
+
+    def __init__(self, path) -> None:
+        self.url = path
+        self.lock = threading.Lock()
+        self.connections = []
+        self.fetches = {}
+        self.remote = set()
+        self.executor = None
+        if path is None:
+            super().__init__(None)
+            return
+
+        import urllib.parse
+
+        parts = urllib.parse.urlsplit(path)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            msg = "Invalid HTTP cache URL " + path
+            raise SCons.Errors.UserError(msg)
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.base = parts.path.rstrip('/')
+        super().__init__(self.l1_dir)
+
+        # pylint: disable=import-outside-toplevel
+        import concurrent.futures
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            self.workers, thread_name_prefix='scons-cache')
+        atexit.register(self.close)
+
+    def _get_connection(self):
+        """Return an idle connection to the server, or a new one."""
+        with self.lock:
+            if self.connections:
+                return self.connections.pop()
+        # pylint: disable=import-outside-toplevel
+        import http.client
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _request(self, method, cachefile, upload=None, download=None):
+        """Make a request for the entry stored in *cachefile*.
+
+        The body of the request is read from the file *upload*, and the
+        body of a successful response is written to the file *download*.
+        Returns the response.  A request on a connection that the server
+        closed while it was idle is tried again on a new connection.
+        """
+        # pylint: disable=import-outside-toplevel
+        import http.client
+        cachedir, sig = os.path.split(cachefile)
+        url = '/'.join([self.base, os.path.basename(cachedir), sig])
+        for retry in (False, True):
+            conn = self._get_connection()
+            try:
+                if upload is None:
+                    conn.request(method, url)
+                else:
+                    with open(upload, 'rb') as f:
+                        st = os.fstat(f.fileno())
+                        headers = {
+                            'Content-Length': str(st.st_size),
+                            'X-SCons-Mode': '%o' % stat.S_IMODE(st.st_mode),
+                        }
+                        conn.request(method, url, body=f, headers=headers)
+                response = conn.getresponse()
+                if download is not None and response.status == 200:
+                    with open(download, 'wb') as f:
+                        while True:
+                            chunk = response.read(65536)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                else:
+                    response.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if retry:
+                    raise
+                continue
+            if response.will_close:
+                conn.close()
+            else:
+                with self.lock:
+                    self.connections.append(conn)
+            return response
+
+    def _fetch(self, cachedir, cachefile) -> bool:
+        """Download an entry into the local cache directory.
+
+        Returns whether the entry is there.
+        """
+        if os.path.exists(cachefile):
+            return True
+        tempfile = "%s.tmp%s" % (cachefile, cache_tmp_uuid)
+        try:
+            os.makedirs(cachedir, exist_ok=True)
+            response = self._request('GET', cachefile, download=tempfile)
+            if response.status != 200:
+                return False
+            mode = response.getheader('X-SCons-Mode')
+            if mode:
+                os.chmod(tempfile, int(mode, 8) | stat.S_IWRITE)
+            os.replace(tempfile, cachefile)
+        except Exception:
+            self.CacheDebug('CacheRetrieve(%s):  fetching %s failed\n',
+                            self.url, cachefile)
+            return False
+        finally:
+            try:
+                os.unlink(tempfile)
+            except OSError:
+                pass
+        with self.lock:
+            self.remote.add(cachefile)
+        return True
+
+    def _store(self, cachefile) -> None:
+        """Upload an entry from the local cache directory."""
+        errfmt = "Unable to copy %s to cache. Cache file is %s"
+        try:
+            response = self._request('PUT', cachefile, upload=cachefile)
+        except Exception:
+            response = None
+        if response is None or not 200 <= response.status < 300:
+            msg = errfmt % (self.url, cachefile)
+            self.CacheDebug(errfmt + '\n', self.url, cachefile)
+            SCons.Warnings.warn(SCons.Warnings.CacheWriteErrorWarning, msg)
+
+    def prefetch(self, node) -> None:
+        """Start downloading *node* from the server in the background."""
+        if not self.is_enabled():
+            return
+        cachedir, cachefile = self.cachepath(node)
+        if os.path.exists(cachefile):
+            return
+        with self.lock:
+            if cachefile not in self.fetches:
+                self.fetches[cachefile] = self.executor.submit(
+                    self._fetch, cachedir, cachefile)
+
+    def retrieve(self, node) -> bool:
+        if not self.is_enabled():
+            return False
+        cachedir, cachefile = self.cachepath(node)
+        with self.lock:
+            fetch = self.fetches.pop(cachefile, None)
+        if fetch is None:
+            self._fetch(cachedir, cachefile)
+        else:
+            fetch.result()
+        return super().retrieve(node)
+
+    def push(self, node):
+        if self.is_readonly() or not self.is_enabled():
+            return
+        result = super().push(node)
+        cachedir, cachefile = self.cachepath(node)
+        # Entries fetched from the server, or already being uploaded,
+        # need not be uploaded again.
+        with self.lock:
+            if cachefile in self.remote:
+                return result
+            self.remote.add(cachefile)
+        if os.path.isfile(cachefile) and not os.path.islink(cachefile):
+            self.executor.submit(self._store, cachefile)
+        return result
+
+    def close(self) -> None:
+        """Wait for the uploads to finish, and close the connections."""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        with self.lock:
+            connections, self.connections = self.connections, []
+        for conn in connections:
+            conn.close()
+
 # Local Variables:
 # tab-width:4
 # indent-tabs-mode:nil
@@ -21,9 +21,11 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import http.server
 import os.path
 import shutil
 import sys
+import threading
 import unittest
 import tempfile
 import stat
@@ -31,6 +33,7 @@ import stat
 from TestCmd import TestCmd
 
 import SCons.CacheDir
+import SCons.Errors
 
 built_it = None
 
@@ -360,6 +363,160 @@ class FileTestCase(BaseTestCase):
         finally:
             SCons.CacheDir.CacheRetrieveSilent = save_CacheRetrieveSilent
 
+class CacheHandler(http.server.BaseHTTPRequestHandler):
+    """A stand-in remote cache, storing entries in server.store."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def handle(self) -> None:
+        self.server.connections += 1
+        super().handle()
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        self.server.requests.append(('GET', self.path))
+        try:
+            data, mode = self.server.store[self.path]
+        except KeyError:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        if mode:
+            self.send_header('X-SCons-Mode', mode)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_PUT(self) -> None:
+        self.server.requests.append(('PUT', self.path))
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.store[self.path] = (data, self.headers.get('X-SCons-Mode'))
+        self.send_response(201)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+class HTTPCacheDirTestCase(unittest.TestCase):
+    """
+    Test the HTTPCacheDir class against a stand-in server.
+    """
+    def setUp(self) -> None:
+        import SCons.Node.FS
+
+        SCons.CacheDir.cache_show = False
+        self.test = TestCmd(workdir='')
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CacheHandler)
+        self.server.store = {}
+        self.server.requests = []
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = 'http://127.0.0.1:%d/cache' % self.server.server_address[1]
+
+        class L1CacheDir(SCons.CacheDir.HTTPCacheDir):
+            l1_dir = self.test.workpath('l1')
+        self.CacheDir = L1CacheDir
+        self.fs = SCons.Node.FS.FS(self.test.workpath(''))
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def File(self, name, bsig, cachedir):
+        node = self.fs.File(name)
+        node.builder_set(Builder(Environment(cachedir), Action()))
+        node.cachesig = bsig
+        return node
+
+    def test_url(self) -> None:
+        """Test selecting and checking remote cache URLs"""
+        assert SCons.CacheDir.is_remote(self.url)
+        assert SCons.CacheDir.is_remote('https://example.com/cache')
+        assert not SCons.CacheDir.is_remote('cache')
+        assert not SCons.CacheDir.is_remote(None)
+        self.assertRaises(SCons.Errors.UserError,
+                          SCons.CacheDir.HTTPCacheDir, 'http://')
+        cd = SCons.CacheDir.HTTPCacheDir(None)
+        assert not cd.is_enabled()
+
+    def test_prefetch(self) -> None:
+        """Test fetching entries ahead of retrieve()"""
+        for n in range(20):
+            self.server.store['/cache/AB/ab%02d' % n] = (b'ab%02d\n' % n, '755')
+        cd = self.CacheDir(self.url)
+        nodes = [self.File('f%d' % n, 'ab%02d' % n, cd) for n in range(21)]
+        for node in nodes:
+            node.prefetch_from_cache()
+
+        save_CacheRetrieve = SCons.CacheDir.CacheRetrieve
+        retrieved = []
+        def retrieve(target, source, env, execute: int=1) -> int:
+            cachedir, cachefile = cd.cachepath(target)
+            retrieved.append(os.path.exists(cachefile))
+            return 0 if retrieved[-1] else 1
+        SCons.CacheDir.CacheRetrieve = retrieve
+        try:
+            results = [node.retrieve_from_cache() for node in nodes]
+        finally:
+            SCons.CacheDir.CacheRetrieve = save_CacheRetrieve
+            cd.close()
+
+        assert results == [True] * 20 + [False], results
+        cachedir, cachefile = cd.cachepath(nodes[3])
+        assert cachefile == os.path.join(self.test.workpath('l1'), 'AB', 'ab03'), cachefile
+        with open(cachefile, 'rb') as f:
+            assert f.read() == b'ab03\n'
+        assert stat.S_IMODE(os.stat(cachefile).st_mode) == 0o755, \
+            oct(os.stat(cachefile).st_mode)
+        assert len(self.server.requests) == 21, self.server.requests
+        assert self.server.connections <= cd.workers, self.server.connections
+
+    def test_push(self) -> None:
+        """Test storing entries on the server"""
+        cd = self.CacheDir(self.url)
+        node = self.File('f1', 'cd0001', cd)
+
+        save_CachePush = SCons.CacheDir.CachePush
+        def push(target, source, env) -> int:
+            cachedir, cachefile = cd.cachepath(target)
+            os.makedirs(cachedir, exist_ok=True)
+            with open(cachefile, 'wb') as f:
+                f.write(b'f1\n')
+            return 0
+        SCons.CacheDir.CachePush = push
+        try:
+            assert not node.retrieve_from_cache()
+            cd.push(node)
+            cd.push(node)
+        finally:
+            SCons.CacheDir.CachePush = save_CachePush
+            cd.close()
+
+        assert self.server.requests == [('GET', '/cache/CD/cd0001'),
+                                        ('PUT', '/cache/CD/cd0001')], \
+            self.server.requests
+        data, mode = self.server.store['/cache/CD/cd0001']
+        assert data == b'f1\n', data
+
+    def test_unreachable(self) -> None:
+        """Test that an unreachable server is a cache miss"""
+        import socket
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            url = 'http://127.0.0.1:%d/cache' % sock.getsockname()[1]
+        cd = self.CacheDir(url)
+        node = self.File('f1', 'ef0001', cd)
+        try:
+            node.prefetch_from_cache()
+            assert not node.retrieve_from_cache()
+        finally:
+            cd.close()
+
+
 if __name__ == "__main__":
     unittest.main()
 # Local Variables:
@@ -35,7 +35,8 @@ import os
 import sys
 import re
 import shlex
-from collections import UserDict, deque
+from collections import UserDict, UserList, deque
+from typing import Union
 
 import SCons.Action
 import SCons.Builder
@@ -52,12 +53,12 @@ import SCons.Platform
 import SCons.SConf
 import SCons.SConsign
 import SCons.Subst
+import SCons.Taskmaster.Job
 import SCons.Tool
 import SCons.Warnings
 from SCons.Util import (
     AppendPath,
     CLVar,
-    LogicalLines,
     MethodWrapper,
     PrependPath,
     Split,
@@ -69,6 +70,7 @@ from SCons.Util import (
     is_Sequence,
     is_String,
     is_Tuple,
+    parse_depfile,
     semi_deepcopy,
     semi_deepcopy_dict,
     to_String_for_subst,
@@ -510,6 +512,39 @@ class BuilderDict(UserDict):
 
 _is_valid_var = re.compile(r'[_a-zA-Z]\w*$')
 
+# The expansions substitution recognizes: $$, $( and $), $NAME
+# (maybe with .attributes) and ${anything}.
+_dollar_exps = re.compile(r'\$[\$\(\)]|\$[_a-zA-Z][\.\w]*|\${[^}]*}')
+
+# Names an expansion may refer to.
+_expansion_names = re.compile(r'[_a-zA-Z]\w*')
+
+def _subst_memo_state(value):
+    """Return what an in-place change to *value* would alter.
+
+    Used to check that a construction variable still has the value a
+    memoized substitution was computed from: strings are compared by
+    value, lists and dicts by their (shallow) contents, and anything
+    else is only the same if it is the same object (``None``).
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple, deque, UserList)):
+        return tuple(value)
+    if is_Dict(value):
+        return tuple(value.items())
+    return None
+
+def _subst_memo_strings(value):
+    """Return the strings in *value* which may themselves be expanded."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, (list, tuple, deque, UserList)):
+        return [v for v in flatten(value) if isinstance(v, str)]
+    if is_Dict(value):
+        return [v for v in value.values() if isinstance(v, str)]
+    return []
+
 def is_valid_construction_var(varstr):
     """Return if the specified string is a legitimate construction
     variable.
@@ -552,9 +587,13 @@ class SubstitutionEnvironment:
         self.ans = SCons.Node.Alias.default_ans
         self.lookup_list = SCons.Node.arg2nodes_lookups
         self._dict = kw.copy()
+        self._cow_shared = set()
+        self._cow_escaped = set()
+        self._cow_exposed = False
+        self._generation = 0
         self._init_special()
         self.added_methods = []
-        #self._memo = {}
+        self._memo = {}
 
     def _init_special(self) -> None:
         """Initial the dispatch tables for special handling of
@@ -574,10 +613,60 @@ class SubstitutionEnvironment:
         # methods that need to check.
         self._special_set_keys = list(self._special_set.keys())
 
+    def _cow_unshare(self, *keys) -> None:
+        """Give this environment its own copies of shared values.
+
+        After a :meth:`~Base.Clone`, the original and the clone refer to
+        the same value objects for the variables recorded in
+        ``self._cow_shared``.  Such a value is copied (with the same
+        :func:`~SCons.Util.semi_deepcopy` semantics ``Clone`` always
+        used) before this environment hands it out or changes it in
+        place.  With no *keys*, every shared value is copied.
+        """
+        shared = self._cow_shared
+        if not shared:
+            return
+        if not keys:
+            keys = list(shared)
+        for key in keys:
+            if key in shared:
+                shared.discard(key)
+                try:
+                    self._dict[key] = semi_deepcopy(self._dict[key])
+                except KeyError:
+                    pass
+
+    def _cow_escape(self, *keys) -> None:
+        """Note that values may now be referenced from outside.
+
+        A value handed out (or passed in) may be changed in place at any
+        time through that reference, so :meth:`~Base.Clone` has to copy
+        it right away instead of sharing it.  With no *keys*, the
+        variable dict itself has been handed out, and every value,
+        present or future, has to be treated that way.
+        """
+        self._cow_unshare(*keys)
+        if keys:
+            self._cow_escaped.update(keys)
+        else:
+            self._cow_exposed = True
+
+    def _changed(self) -> None:
+        """Note that construction variables have (or may have) changed.
+
+        Bumps the generation counter, which is part of the key of the
+        memoized target-independent substitutions, and drops those.
+        """
+        self._generation += 1
+        self._memo.pop('_subst_no_target', None)
+
     def __eq__(self, other):
         return self._dict == other._dict
 
     def __delitem__(self, key) -> None:
+        self._changed()
+        self._cow_shared.discard(key)
+        self._cow_escaped.discard(key)
         special = self._special_del.get(key)
         if special:
             special(self, key)
@@ -585,7 +674,12 @@ class SubstitutionEnvironment:
             del self._dict[key]
 
     def __getitem__(self, key):
-        return self._dict[key]
+        if key in self._cow_shared:
+            self._cow_unshare(key)
+        value = self._dict[key]
+        if not isinstance(value, str):
+            self._cow_escaped.add(key)
+        return value
 
     def __setitem__(self, key, value):
         # This is heavily used.  This implementation is the best we have
@@ -599,6 +693,7 @@ class SubstitutionEnvironment:
         # So right now it seems like a good trade-off, but feel free to
         # revisit this with bench/env.__setitem__.py as needed (and
         # as newer versions of Python come out).
+        self._changed()
         if key in self._special_set_keys:
             self._special_set[key](self, key, value)
         else:
@@ -609,10 +704,19 @@ class SubstitutionEnvironment:
             if key not in self._dict and not _is_valid_var.match(key):
                 raise UserError("Illegal construction variable `%s'" % key)
             self._dict[key] = value
+        # The caller may still hold a reference to a mutable value
+        self._cow_shared.discard(key)
+        if not isinstance(value, str):
+            self._cow_escaped.add(key)
 
     def get(self, key, default=None):
         """Emulates the get() method of dictionaries."""
-        return self._dict.get(key, default)
+        if key in self._cow_shared:
+            self._cow_unshare(key)
+        value = self._dict.get(key, default)
+        if not isinstance(value, str):
+            self._cow_escaped.add(key)
+        return value
 
     def __contains__(self, key) -> bool:
         return key in self._dict
@@ -623,14 +727,18 @@ class SubstitutionEnvironment:
 
     def values(self):
         """Emulates the values() method of dictionaries."""
+        self._cow_escape()
         return self._dict.values()
 
     def items(self):
         """Emulates the items() method of dictionaries."""
+        self._cow_escape()
         return self._dict.items()
 
     def setdefault(self, key, default=None):
         """Emulates the setdefault() method of dictionaries."""
+        self._cow_escape(key)
+        self._changed()
         return self._dict.setdefault(key, default)
 
     def arg2nodes(self, args, node_factory=_null, lookup_list=_null, **kw):
@@ -691,14 +799,118 @@ class SubstitutionEnvironment:
         or alphanumeric characters.  The construction variable names
         may be surrounded by curly braces to separate the name from
         trailing characters.
+
+        Substitutions that do not involve a target, source or executor
+        depend only on the construction variables, so their results are
+        memoized until the variables next change.
         """
         gvars = self.gvars()
         lvars = self.lvars()
+        if (
+            not lvars
+            and target is None
+            and source is None
+            and executor is None
+            and conv is None
+            and not overrides
+            and isinstance(string, str)
+        ):
+            if '$' not in string:
+                return string
+            return self._subst_no_target(string, raw)
         lvars['__env__'] = self
         if executor:
             lvars.update(executor.get_lvars())
         return SCons.Subst.scons_subst(string, self, raw, target, source, gvars, lvars, conv, overrides=overrides)
 
+    def _subst_deps(self, string):
+        """Return the variables a substitution of *string* refers to.
+
+        Follows the names in ``$NAME`` and ``${...}`` expansions through
+        the strings held by those variables (including the strings in
+        list and dict values).  Returns a tuple of (name, value, state)
+        triples, the value being ``_null`` for an undefined variable and
+        the state coming from :func:`_subst_memo_state`.
+        """
+        deps = {}
+        todo = [string]
+        while todo:
+            for token in _dollar_exps.findall(todo.pop()):
+                if token in ('$$', '$(', '$)'):
+                    continue
+                for name in _expansion_names.findall(token):
+                    if name in deps:
+                        continue
+                    value = self._dict.get(name, _null)
+                    deps[name] = (value, _subst_memo_state(value))
+                    todo.extend(s for s in _subst_memo_strings(value) if '$' in s)
+        return tuple((name, value, state) for name, (value, state) in deps.items())
+
+    def _subst_deps_valid(self, deps) -> bool:
+        """Return whether each of *deps* still has the value it had."""
+        get = self._dict.get
+        for name, value, state in deps:
+            current = get(name, _null)
+            if current is value and state is None:
+                continue
+            if (
+                state is None
+                or type(current) is not type(value)
+                or _subst_memo_state(current) != state
+            ):
+                return False
+        return True
+
+    def _subst_no_target_key(self, string, raw: int=0):
+        # tolerate stand-in fs objects that lack the lookup state
+        fs = self.fs
+        return (
+            string,
+            raw,
+            self._generation,
+            getattr(fs, '_cwd', None),
+            getattr(fs, 'lookup_generation', 0),
+        )
+
+    @SCons.Memoize.CountDictCall(_subst_no_target_key)
+    def _subst_no_target(self, string, raw: int=0):
+        """Memoized :meth:`subst` for target-independent expansions.
+
+        The key includes the generation counter, which every change made
+        through the environment bumps, and the current SConscript
+        directory and FS lookup generation, since relative paths in the
+        result (such as from ``$_CPPINCFLAGS``) depend on those.  Lists
+        and dicts can also be changed in place through a reference
+        fetched earlier, so the values of the variables the string
+        refers to are kept with the result and checked before it is
+        reused.
+        """
+        memo_key = self._subst_no_target_key(string, raw)
+        try:
+            memo_dict = self._memo['_subst_no_target']
+        except KeyError:
+            memo_dict = {}
+            self._memo['_subst_no_target'] = memo_dict
+        else:
+            try:
+                result, deps = memo_dict[memo_key]
+            except KeyError:
+                pass
+            else:
+                if self._subst_deps_valid(deps):
+                    return result
+
+        deps = self._subst_deps(string)
+        generation = self._generation
+        lvars = {'__env__': self}
+        result = SCons.Subst.scons_subst(string, self, raw, None, None, self.gvars(), lvars)
+
+        # Only keep the result if the expansion itself didn't change
+        # anything, and the value is something we can safely share.
+        if self._generation == generation and isinstance(result, str):
+            memo_dict[memo_key] = (result, deps)
+        return result
+
     def subst_kw(self, kw, raw: int=0, target=None, source=None):
         nkw = {}
         for k, v in kw.items():
@@ -1179,10 +1391,14 @@ class Base(SubstitutionEnvironment):
         """
         if SCons.Debug.track_instances: logInstanceCreation(self, 'Environment.Base')
         self._memo = {}
+        self._generation = 0
         self.fs = SCons.Node.FS.get_default_fs()
         self.ans = SCons.Node.Alias.default_ans
         self.lookup_list = SCons.Node.arg2nodes_lookups
         self._dict = semi_deepcopy(SCons.Defaults.ConstructionEnvironment)
+        self._cow_shared = set()
+        self._cow_escaped = set()
+        self._cow_exposed = False
         self._init_special()
         self.added_methods = []
 
@@ -1252,6 +1468,7 @@ class Base(SubstitutionEnvironment):
         # should override any values set by the tools.
         for key, val in save.items():
             self._dict[key] = val
+        self._changed()
 
         # Finally, apply any flags to be merged in
         if parse_flags:
@@ -1288,6 +1505,9 @@ class Base(SubstitutionEnvironment):
             path = SCons.Defaults.DefaultEnvironment()._CacheDir_path
 
         cachedir_class = self.validate_CacheDir_class()
+        if (cachedir_class is SCons.CacheDir.CacheDir
+                and SCons.CacheDir.is_remote(path)):
+            cachedir_class = SCons.CacheDir.HTTPCacheDir
         try:
             if (path == self._last_CacheDir_path
                     # this checks if the cachedir class type has changed from what the
@@ -1385,7 +1605,12 @@ class Base(SubstitutionEnvironment):
         """Private method to update an environment's consvar dict directly.
 
         Bypasses the normal checks that occur when users try to set items.
+        The values are taken over by the environment, so they must not be
+        referenced elsewhere (:meth:`Replace` passes copies).
         """
+        self._changed()
+        self._cow_shared.difference_update(other)
+        self._cow_escaped.difference_update(other)
         self._dict.update(other)
 
     def _update_onlynew(self, other) -> None:
@@ -1395,9 +1620,11 @@ class Base(SubstitutionEnvironment):
         the existing dict; values from `other` are not used for replacement.
         Bypasses the normal checks that occur when users try to set items.
         """
+        self._changed()
         for k, v in other.items():
             if k not in self._dict:
                 self._dict[k] = v
+                self._cow_escaped.add(k)
 
     #######################################################################
     # Public methods for manipulating an Environment.  These begin with
@@ -1415,6 +1642,8 @@ class Base(SubstitutionEnvironment):
         """
 
         kw = copy_non_reserved_keywords(kw)
+        self._cow_unshare(*kw)
+        self._changed()
         for key, val in kw.items():
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val)
@@ -1500,6 +1729,8 @@ class Base(SubstitutionEnvironment):
         will not be moved to the end (it will be left where it is).
         """
 
+        self._cow_unshare(envname)
+        self._changed()
         orig = ''
         if envname in self._dict and name in self._dict[envname]:
             orig = self._dict[envname][name]
@@ -1518,6 +1749,8 @@ class Base(SubstitutionEnvironment):
         values move to end.
         """
         kw = copy_non_reserved_keywords(kw)
+        self._cow_unshare(*kw)
+        self._changed()
         for key, val in kw.items():
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, unique=True, delete_existing=delete_existing)
@@ -1562,13 +1795,36 @@ class Base(SubstitutionEnvironment):
         a reference is copied when an object is not deep-copyable
         (like a function).  There are no references to any mutable
         objects in the original Environment.
+
+        The copying is done lazily where that can't be observed: values
+        that have never been handed out of (or passed into) the original
+        are shared, and each environment copies such a value the first
+        time it is fetched or modified through that environment.  Values
+        only ever read by substitution are never copied at all.
         """
 
         builders = self._dict.get('BUILDERS', {})
 
         clone = copy.copy(self)
         # BUILDERS is not safe to do a simple copy
-        clone._dict = semi_deepcopy_dict(self._dict, ['BUILDERS'])
+        if self._cow_exposed:
+            clone._dict = semi_deepcopy_dict(self._dict, ['BUILDERS'])
+            clone._cow_shared = set()
+        else:
+            clone._dict = self._dict.copy()
+            escaped = self._cow_escaped
+            for key in escaped:
+                if key != 'BUILDERS' and key in clone._dict:
+                    clone._dict[key] = semi_deepcopy(clone._dict[key])
+            shared = {
+                key for key, value in self._dict.items()
+                if not isinstance(value, str) and key not in escaped
+            }
+            shared.discard('BUILDERS')
+            self._cow_shared.update(shared)
+            clone._cow_shared = shared
+        clone._cow_escaped = set()
+        clone._cow_exposed = False
         clone._dict['BUILDERS'] = BuilderDict(builders, clone)
 
         # Check the methods added via AddMethod() and re-bind them to
@@ -1672,7 +1928,9 @@ class Base(SubstitutionEnvironment):
 
         """
         if not args:
+            self._cow_escape()
             return self._dict
+        self._cow_escape(*args)
         dlist = [self._dict[x] for x in args]
         if len(dlist) == 1:
             dlist = dlist[0]
@@ -1778,22 +2036,11 @@ class Base(SubstitutionEnvironment):
         filename = self.subst(filename)
         try:
             with open(filename, 'r') as fp:
-                lines = LogicalLines(fp).readlines()
+                tdlist = parse_depfile(fp)
         except IOError:
             if must_exist:
                 raise
             return
-        lines = [l for l in lines if l[0] != '#']
-        tdlist = []
-        for line in lines:
-            try:
-                target, depends = line.split(':', 1)
-            except (AttributeError, ValueError):
-                # Throws AttributeError if line isn't a string.  Can throw
-                # ValueError if line doesn't split into two or more elements.
-                pass
-            else:
-                tdlist.append((target.split(), depends.split()))
         if only_one:
             targets = []
             for td in tdlist:
@@ -1816,6 +2063,8 @@ class Base(SubstitutionEnvironment):
         """
 
         kw = copy_non_reserved_keywords(kw)
+        self._cow_unshare(*kw)
+        self._changed()
         for key, val in kw.items():
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, prepend=True)
@@ -1889,6 +2138,8 @@ class Base(SubstitutionEnvironment):
         will not be moved to the front (it will be left where it is).
         """
 
+        self._cow_unshare(envname)
+        self._changed()
         orig = ''
         if envname in self._dict and name in self._dict[envname]:
             orig = self._dict[envname][name]
@@ -1908,6 +2159,8 @@ class Base(SubstitutionEnvironment):
         values move to front.
         """
         kw = copy_non_reserved_keywords(kw)
+        self._cow_unshare(*kw)
+        self._changed()
         for key, val in kw.items():
             if key == 'CPPDEFINES':
                 _add_cppdefines(self._dict, val, unique=True, prepend=True, delete_existing=delete_existing)
@@ -2372,6 +2625,11 @@ class Base(SubstitutionEnvironment):
             t.add_prerequisite(plist)
         return tlist
 
+    def ResourcePool(self, name, size) -> None:
+        """Declare that at most 'size' tasks whose $RESOURCE_POOL is
+        'name' may be executed at the same time in a parallel build."""
+        SCons.Taskmaster.Job.add_resource_pool(self.subst(name), size)
+
     def Scanner(self, *args, **kw):
         nargs = []
         for arg in args:
@@ -2444,7 +2702,7 @@ class Base(SubstitutionEnvironment):
         """
         return SCons.Node.Python.ValueWithMemo(value, built_value, name)
 
-    def VariantDir(self, variant_dir, src_dir, duplicate: int=1) -> None:
+    def VariantDir(self, variant_dir, src_dir, duplicate: Union[int, str]=1) -> None:
         variant_dir = self.arg2nodes(variant_dir, self.fs.Dir)[0]
         src_dir = self.arg2nodes(src_dir, self.fs.Dir)[0]
         self.fs.VariantDir(variant_dir, src_dir, duplicate)
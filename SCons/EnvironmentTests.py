@@ -32,6 +32,7 @@ from collections import UserDict as UD, UserList as UL, deque
 
 import TestCmd
 
+import SCons.Subst
 import SCons.Warnings
 from SCons.Environment import (
     Environment,
@@ -458,6 +459,50 @@ class SubstitutionTestCase(unittest.TestCase):
             subst = env.subst('$FOO', call=None)
             assert subst is bar, subst
 
+    def test_subst_memo(self) -> None:
+        """Test memoization of target-independent substitutions"""
+        env = SubstitutionEnvironment(AAA='a', BBB='b', CCC='$AAA $BBB')
+        assert env.subst('$CCC') == 'a b'
+        memo = env._memo['_subst_no_target']
+        assert len(memo) == 1, memo
+        assert env.subst('$CCC') == 'a b'
+        assert len(memo) == 1, memo
+
+        # target-dependent expansions are not memoized
+        t = DummyNode('t')
+        assert env.subst('$CCC $TARGET', target=t) == 'a b t'
+        assert len(memo) == 1, memo
+
+        # changes through the environment bump the generation
+        g = env._generation
+        env['AAA'] = 'aa'
+        assert env._generation > g
+        assert '_subst_no_target' not in env._memo
+        assert env.subst('$CCC') == 'aa b'
+        del env['AAA']
+        assert env.subst('$CCC') == 'b'
+        env['AAA'] = 'a'
+        assert env.subst('$CCC') == 'a b'
+
+        # lists, dicts and callables are memoized too, but changes made
+        # in place or behind the environment's back are still seen
+        env = SubstitutionEnvironment(AAA='a', LLL=['l'], DDD={'x': 1},
+                                      CCC='$AAA $LLL', FFF=lambda: 'f')
+        lll = env['LLL']
+        assert env.subst('$CCC') == 'a l'
+        assert env.subst('${DDD["x"]} ${FFF()}') == '1 f'
+        assert len(env._memo['_subst_no_target']) == 2, env._memo
+        lll.append('-O2')
+        assert env.subst('$CCC') == 'a l -O2'
+        env._dict['LLL'].append('-g')
+        assert env.subst('$CCC') == 'a l -O2 -g'
+        env._dict['AAA'] = 'aa'
+        assert env.subst('$CCC') == 'aa l -O2 -g'
+        env['DDD']['x'] = 2
+        assert env.subst('${DDD["x"]} ${FFF()}') == '2 f'
+        env._dict['FFF'] = lambda: 'g'
+        assert env.subst('${DDD["x"]} ${FFF()}') == '2 g'
+
     def test_subst_kw(self) -> None:
         """Test substituting construction variables within dictionaries"""
         env = SubstitutionEnvironment(AAA = 'a', BBB = 'b')
@@ -1260,6 +1305,34 @@ env4.builder1.env, env3)
         test_it('foo.bar')
         test_it('foo-bar')
 
+    def test_subst_memo_CPPINCFLAGS(self) -> None:
+        """Test that $_CPPINCFLAGS expansions are memoized"""
+        env = self.TestEnvironment(CPPPATH=['inc', 'sub'],
+                                   INCPREFIX='-I', INCSUFFIX='')
+        save_subst = SCons.Subst.scons_subst
+        calls = []
+
+        def counting_subst(*args, **kw):
+            calls.append(args[0])
+            return save_subst(*args, **kw)
+
+        SCons.Subst.scons_subst = counting_subst
+        try:
+            assert env.subst('$_CPPINCFLAGS') == '-Iinc -Isub'
+            assert env.subst('$_CPPINCFLAGS') == '-Iinc -Isub'
+            assert len(calls) == 1, calls
+
+            env.Append(CPPPATH=['more'])
+            assert env.subst('$_CPPINCFLAGS') == '-Iinc -Isub -Imore'
+            assert env.subst('$_CPPINCFLAGS') == '-Iinc -Isub -Imore'
+            assert len(calls) == 2, calls
+
+            env['CPPPATH'].append('last')
+            assert env.subst('$_CPPINCFLAGS') == '-Iinc -Isub -Imore -Ilast'
+            assert len(calls) == 3, calls
+        finally:
+            SCons.Subst.scons_subst = save_subst
+
     def test_autogenerate(self) -> None:
         """Test autogenerating variables in a dictionary."""
 
@@ -1884,6 +1957,74 @@ def exists(env):
             self.assertIn(5, env2['ZZZ'])
             self.assertNotIn(5, env1['ZZZ'])
 
+        # Values are shared until first use through either environment,
+        # and in-place changes from either side must not leak
+        with self.subTest():
+            env1 = self.TestEnvironment(
+                XXX=['x'],
+                YYY=['y'],
+                CPPDEFINES=['A'],
+                ENV={'PATH': '/bin'},
+            )
+            env2 = env1.Clone()
+            self.assertIs(env1._dict['XXX'], env2._dict['XXX'])
+            self.assertIs(env1._dict['ENV'], env2._dict['ENV'])
+            self.assertEqual(env2.subst('$XXX $YYY'), 'x y')
+            self.assertIs(env1._dict['XXX'], env2._dict['XXX'])
+
+            env1['XXX'].append('parent')
+            env2.Append(YYY=['clone'], CPPDEFINES=['B'])
+            env2.AppendENVPath('PATH', '/usr/bin')
+            env3 = env2.Clone()
+            env3.Prepend(YYY=['clone3'])
+            self.assertEqual(env1['XXX'], ['x', 'parent'])
+            self.assertEqual(env2['XXX'], ['x'])
+            self.assertEqual(env3['XXX'], ['x'])
+            self.assertEqual(env1['YYY'], ['y'])
+            self.assertEqual(env2['YYY'], ['y', 'clone'])
+            self.assertEqual(env3['YYY'], ['clone3', 'y', 'clone'])
+            self.assertEqual(list(env1['CPPDEFINES']), ['A'])
+            self.assertEqual(list(env2['CPPDEFINES']), ['A', 'B'])
+            self.assertEqual(env1['ENV']['PATH'], '/bin')
+            self.assertNotEqual(env2['ENV']['PATH'], '/bin')
+
+        # Values referenced from outside the environment, whether handed
+        # out or passed in, are copied by the Clone itself
+        with self.subTest():
+            yyy = ['y']
+            env1 = self.TestEnvironment(XXX=['x'], ZZZ=['z'])
+            env1['YYY'] = yyy
+            xxx = env1['XXX']
+            env2 = env1.Clone()
+            self.assertIsNot(env1._dict['XXX'], env2._dict['XXX'])
+            self.assertIsNot(env1._dict['YYY'], env2._dict['YYY'])
+            self.assertIs(env1._dict['ZZZ'], env2._dict['ZZZ'])
+            xxx.append('parent')
+            yyy.append('parent')
+            self.assertIs(env1['XXX'], xxx)
+            self.assertIs(env1['YYY'], yyy)
+            self.assertEqual(env2['XXX'], ['x'])
+            self.assertEqual(env2['YYY'], ['y'])
+
+            # a read through the original keeps the original's object
+            # once it has been handed out
+            zzz = env1['ZZZ']
+            env3 = env1.Clone()
+            zzz.append('parent')
+            self.assertIs(env1['ZZZ'], zzz)
+            self.assertEqual(env2['ZZZ'], ['z'])
+            self.assertEqual(env3['ZZZ'], ['z'])
+
+            # handing out the whole dict makes every value escape
+            d = env1.Dictionary()
+            env4 = env1.Clone()
+            d['ZZZ'].append('dict')
+            d['NEW'] = ['n']
+            env5 = env1.Clone()
+            d['NEW'].append('dict')
+            self.assertEqual(env4['ZZZ'], ['z', 'parent'])
+            self.assertEqual(env5['NEW'], ['n'])
+
         # BUILDERS is special...
         with self.subTest():
             env1 = self.TestEnvironment(BUILDERS={'b1': Builder()})
@@ -3359,6 +3500,25 @@ def generate(env):
         expect = ['/tmp/foo', '/tmp/rrr', '/tmp/sss/foo']
         assert env.fs.list == expect, env.fs.list
 
+    def test_ResourcePool(self) -> None:
+        """Test the ResourcePool() method."""
+        import SCons.Taskmaster.Job
+        pools = SCons.Taskmaster.Job.resource_pools
+        save_pools = pools.copy()
+        try:
+            env = self.TestEnvironment(POOL='link')
+            env.ResourcePool('$POOL', 4)
+            assert pools['link'] == 4, pools
+            env.ResourcePool('link', '2')
+            assert pools['link'] == 2, pools
+            with self.assertRaises(SCons.Errors.UserError):
+                env.ResourcePool('link', 0)
+            with self.assertRaises(SCons.Errors.UserError):
+                env.ResourcePool('link', 'x')
+        finally:
+            pools.clear()
+            pools.update(save_pools)
+
     def test_Scanner(self) -> None:
         """Test the Scanner() method"""
         def scan(node, env, target, arg) -> None:
@@ -132,11 +132,7 @@ _do_execute_map = {0 : execute_nothing,
 
 
 def execute_actions_str(obj):
-    env = obj.get_build_env()
-    return "\n".join([action.genstring(obj.get_all_targets(),
-                                       obj.get_all_sources(),
-                                       env)
-                      for action in obj.get_action_list()])
+    return obj.get_actions_str()
 
 def execute_null_str(obj) -> str:
     return ''
@@ -167,7 +163,8 @@ class Executor(object, metaclass=NoSlotsPyPy):
                  '_unchanged_targets_list',
                  'action_list',
                  '_do_execute',
-                 '_execute_str')
+                 '_execute_str',
+                 'batch_fill')
 
     def __init__(self, action, env=None, overridelist=[{}],
                  targets=[], sources=[], builder_kw={}) -> None:
@@ -185,6 +182,8 @@ class Executor(object, metaclass=NoSlotsPyPy):
         self._do_execute = 1
         self._execute_str = 1
         self._memo = {}
+        # Lets a Tool's batch_key function track how full a batch is.
+        self.batch_fill = None
 
     def get_lvars(self):
         try:
@@ -395,6 +394,7 @@ class Executor(object, metaclass=NoSlotsPyPy):
         # TODO(batch):  remove duplicates?
         sources = [x for x in sources if x not in self.batches[0].sources]
         self.batches[0].sources.extend(sources)
+        self._memo = {}
 
     def get_sources(self):
         return self.batches[0].sources
@@ -406,6 +406,7 @@ class Executor(object, metaclass=NoSlotsPyPy):
         used in order to update multiple target files at once from multiple
         corresponding source files, for tools like MSVC that support it."""
         self.batches.append(Batch(targets, sources))
+        self._memo = {}
 
     def prepare(self):
         """
@@ -419,9 +420,11 @@ class Executor(object, metaclass=NoSlotsPyPy):
 
     def add_pre_action(self, action) -> None:
         self.pre_actions.append(action)
+        self._memo = {}
 
     def add_post_action(self, action) -> None:
         self.post_actions.append(action)
+        self._memo = {}
 
     # another extra indirection for new-style objects and nullify...
 
@@ -459,6 +462,37 @@ class Executor(object, metaclass=NoSlotsPyPy):
         self._memo['get_contents'] = result
         return result
 
+    @SCons.Memoize.CountMethodCall
+    def get_contents_sig(self):
+        """Fetch the signature of the signature contents.
+
+        This is the action signature recorded for (and compared against)
+        every target of this Executor, so it's hashed only once however
+        many targets there are.
+        """
+        try:
+            return self._memo['get_contents_sig']
+        except KeyError:
+            pass
+        result = SCons.Util.hash_signature(self.get_contents())
+        self._memo['get_contents_sig'] = result
+        return result
+
+    @SCons.Memoize.CountMethodCall
+    def get_actions_str(self) -> str:
+        """Fetch the string of the commands, as recorded for every target."""
+        try:
+            return self._memo['get_actions_str']
+        except KeyError:
+            pass
+        env = self.get_build_env()
+        result = "\n".join([action.genstring(self.get_all_targets(),
+                                             self.get_all_sources(),
+                                             env)
+                            for action in self.get_action_list()])
+        self._memo['get_actions_str'] = result
+        return result
+
     def get_timestamp(self) -> int:
         """Fetch a time stamp for this Executor.  We don't have one, of
         course (only files do), but this is the interface used by the
@@ -534,6 +568,42 @@ class Executor(object, metaclass=NoSlotsPyPy):
 
         return sourcelist
 
+    def _get_source_sigs_key(self, node, ignore=()):
+        if node:
+            for i, b in enumerate(self.batches):
+                if node in b.targets:
+                    return (i,) + tuple(ignore)
+            return (-1,) + tuple(ignore)
+        return (None,) + tuple(ignore)
+
+    @SCons.Memoize.CountDictCall(_get_source_sigs_key)
+    def get_source_sigs(self, node, ignore=()):
+        """Return the unique unignored sources of *node*, and their NodeInfo.
+
+        The targets of a batch have the same sources, so the list is
+        built once and shared by them all.  Returns a tuple of two lists,
+        which the caller must not modify.
+        """
+        key = self._get_source_sigs_key(node, ignore)
+        try:
+            memo_dict = self._memo['get_source_sigs']
+        except KeyError:
+            memo_dict = {}
+            self._memo['get_source_sigs'] = memo_dict
+        else:
+            try:
+                return memo_dict[key]
+            except KeyError:
+                pass
+
+        seen = set()
+        sources = [s for s in self.get_unignored_sources(node, ignore)
+                   if s not in seen and not seen.add(s)]
+        result = (sources, [s.get_ninfo() for s in sources])
+        memo_dict[key] = result
+
+        return result
+
     def get_implicit_deps(self):
         """Return the executor's implicit dependencies, i.e. the nodes of
         the commands to be executed."""
@@ -599,7 +669,8 @@ class Null(object, metaclass=NoSlotsPyPy):
                  '_unchanged_targets_list',
                  'action_list',
                  '_do_execute',
-                 '_execute_str')
+                 '_execute_str',
+                 'batch_fill')
 
     def __init__(self, *args, **kw) -> None:
         if SCons.Debug.track_instances:
@@ -615,6 +686,8 @@ class Null(object, metaclass=NoSlotsPyPy):
         pass
     def get_unignored_sources(self, *args, **kw):
         return tuple(())
+    def get_source_sigs(self, *args, **kw):
+        return ([], [])
     def get_action_targets(self):
         return []
     def get_action_list(self):
@@ -633,6 +706,10 @@ class Null(object, metaclass=NoSlotsPyPy):
         return 0
     def get_contents(self) -> str:
         return ''
+    def get_contents_sig(self):
+        return SCons.Util.hash_signature('')
+    def get_actions_str(self) -> str:
+        return ''
     def _morph(self) -> None:
         """Morph this Null executor to a real Executor object."""
         batches = self.batches
@@ -98,6 +98,8 @@ class MyNode:
         return 'cs-'+calc+'-'+self.name
     def disambiguate(self):
         return self
+    def get_ninfo(self):
+        return 'ninfo-' + self.name
 
     def is_up_to_date(self):
         return self.up_to_date
@@ -355,6 +357,12 @@ class ExecutorTestCase(unittest.TestCase):
                  'GENSTRING post t s'
         assert c == expect, c
 
+        # The string is kept until the action list changes.
+        assert x.get_actions_str() is c
+        x.add_post_action(MyAction(['post2']))
+        c = str(x)
+        assert c == expect + '\nGENSTRING post2 t s', c
+
     def test_nullify(self) -> None:
         """Test the nullify() method"""
         env = MyEnvironment(S='string')
@@ -396,6 +404,24 @@ class ExecutorTestCase(unittest.TestCase):
         c = x.get_contents()
         assert c == b'pre t sgrow t spost t s', c
 
+    def test_get_contents_sig(self) -> None:
+        """Test fetching the signature of the signature contents"""
+        env = MyEnvironment(C='contents')
+
+        x = SCons.Executor.Executor(MyAction(), env, [], ['t1', 't2'], ['s'])
+        sig = x.get_contents_sig()
+        expect = SCons.Util.hash_signature(b'action1 action2 t1 t2 s')
+        assert sig == expect, sig
+        assert x.get_contents_sig() is sig
+
+        x.add_sources(['s2'])
+        sig = x.get_contents_sig()
+        expect = SCons.Util.hash_signature(b'action1 action2 t1 t2 s s2')
+        assert sig == expect, sig
+
+        x.cleanup()
+        assert 'get_contents_sig' not in x._memo, x._memo
+
     def test_get_timestamp(self) -> None:
         """Test fetching the "timestamp" """
         x = SCons.Executor.Executor('b', 'e', 'o', 't', ['s1', 's2'])
@@ -457,6 +483,32 @@ class ExecutorTestCase(unittest.TestCase):
         r = x.get_unignored_sources(None, [s1, s3])
         assert r == [s2], list(map(str, r))
 
+    def test_get_source_sigs(self) -> None:
+        """Test fetching the sources and their info shared by a batch"""
+        env = MyEnvironment()
+        s1 = MyNode('s1')
+        s2 = MyNode('s2')
+        s3 = MyNode('s3')
+        t1 = MyNode('t1')
+        t2 = MyNode('t2')
+        t3 = MyNode('t3')
+        x = SCons.Executor.Executor('b', env, [{}], [t1, t2], [s1, s2, s1])
+
+        sources, sigs = x.get_source_sigs(t1, [])
+        assert sources == [s1, s2], list(map(str, sources))
+        assert sigs == ['ninfo-s1', 'ninfo-s2'], sigs
+        r = x.get_source_sigs(t2, [])
+        assert r[0] is sources and r[1] is sigs, r
+
+        r = x.get_source_sigs(t2, [s1])
+        assert r == ([s2], ['ninfo-s2']), r
+
+        x.add_batch([t3], [s3])
+        r = x.get_source_sigs(t3, [])
+        assert r == ([s3], ['ninfo-s3']), r
+        r = x.get_source_sigs(t1, [])
+        assert r == ([s1, s2], ['ninfo-s1', 'ninfo-s2']), r
+
     def test_changed_sources_for_alwaysBuild(self) -> None:
         """
         Ensure if a target is marked always build that the sources are always marked changed sources
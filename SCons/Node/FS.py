@@ -40,7 +40,7 @@ import stat
 import sys
 import time
 from itertools import chain
-from typing import Optional
+from typing import Optional, Union
 
 import SCons.Action
 import SCons.Debug
@@ -299,10 +299,14 @@ def LinkFunc(target, source, env) -> int:
     dir, file = os.path.split(dest)
     if dir and not target[0].fs.isdir(dir):
         os.makedirs(dir)
+    _link(source[0].fs, src, dest)
+    return 0
+
+def _link(fs, src, dest) -> None:
+    """Link or copy *src* to *dest* with the --duplicate methods."""
     if not Link_Funcs:
         # Set a default order of link functions.
         set_duplicate('hard-soft-copy')
-    fs = source[0].fs
     # Now link the files with the previously specified order.
     for func in Link_Funcs:
         try:
@@ -318,7 +322,54 @@ def LinkFunc(target, source, env) -> int:
             if func == Link_Funcs[-1]:
                 # exception of the last link method (copy) are fatal
                 raise
-    return 0
+
+def _duplicate_lazy(nodes) -> None:
+    """Duplicate the files of *nodes* waiting in lazy variant directories.
+
+    Each directory is created once for all of its files, and copies
+    left by an earlier build are kept if they're still current.  With
+    the -n option nothing is created, but the nodes are marked as
+    duplicated, like the Link action does.
+    """
+    pending = {}
+    for node in nodes:
+        if isinstance(node, File) and node.duplicate == 'lazy':
+            src = node._lazy_src()
+            if src is not None and src.exists():
+                pending.setdefault(node.dir, []).append((node, src))
+    execute = SCons.Action.execute_actions
+    for dir, pairs in pending.items():
+        if execute:
+            dir._create()
+        for node, src in pairs:
+            srcpath = src.get_abspath()
+            path = node.get_abspath()
+            if execute and not _is_duplicate(node.fs, srcpath, path):
+                if SCons.Node.print_duplicate:
+                    print("dup: linking lazy variant '{}' from '{}'".format(node, src))
+                if node.fs.islink(path) or node.fs.exists(path):
+                    node.fs.unlink(path)
+                try:
+                    _link(node.fs, srcpath, path)
+                except OSError as e:
+                    raise SCons.Errors.StopError("Cannot duplicate `{}' in `{}': {}.".format(src.get_internal_path(), dir._path, e.strerror))
+            node.linked = 1
+            # The node's signatures are still those of the source,
+            # only the memoized file status has to be refreshed.
+            node.clear_memoized_values()
+
+def _is_duplicate(fs, src, dest) -> bool:
+    """Is *dest* already a link to, or an unmodified copy of, *src*?"""
+    try:
+        dst_st = fs.stat(dest)
+        src_st = fs.stat(src)
+    except OSError:
+        return False
+    if dst_st.st_ino and (dst_st.st_dev, dst_st.st_ino) == (src_st.st_dev, src_st.st_ino):
+        return True
+    # A copy keeps the time stamp (see _copy_func).
+    return stat.S_ISREG(dst_st.st_mode) and \
+        (dst_st.st_size, dst_st.st_mtime) == (src_st.st_size, src_st.st_mtime)
 
 Link = SCons.Action.Action(LinkFunc, None)
 def LocalString(target, source, env) -> str:
@@ -1223,6 +1274,11 @@ class FS(LocalFS):
         self.SConstruct_dir = None
         self.max_drift = default_max_drift
 
+        # Bumped whenever a repository or variant directory is added,
+        # which can change what a path name resolves to.  Lets callers
+        # that cache path-dependent results know they have gone stale.
+        self.lookup_generation = 0
+
         self.Top = None
         if path is None:
             self.pathTop = os.getcwd()
@@ -1454,9 +1510,13 @@ class FS(LocalFS):
         """
         return self._lookup(name, directory, Dir, create)
 
-    def VariantDir(self, variant_dir, src_dir, duplicate: int=1):
+    def VariantDir(self, variant_dir, src_dir, duplicate: Union[int, str]=1):
         """Link the supplied variant directory to the source directory
-        for purposes of building files."""
+        for purposes of building files.
+
+        With *duplicate* ``'lazy'``, each source is duplicated only when
+        an action that uses it is about to run.
+        """
 
         if not isinstance(src_dir, SCons.Node.Node):
             src_dir = self.Dir(src_dir)
@@ -1468,6 +1528,9 @@ class FS(LocalFS):
             if variant_dir.srcdir == src_dir:
                 return # We already did this.
             raise SCons.Errors.UserError("'%s' already has a source directory: '%s'."%(variant_dir, variant_dir.srcdir))
+        if isinstance(duplicate, str) and duplicate != 'lazy':
+            raise SCons.Errors.UserError("Invalid duplicate value %r for VariantDir '%s'; "
+                                         "use a boolean or 'lazy'." % (duplicate, variant_dir))
         variant_dir.link(src_dir, duplicate)
 
     def Repository(self, *dirs) -> None:
@@ -1701,6 +1764,7 @@ class Dir(Base):
         supplied source directory."""
         self.srcdir = srcdir
         self.duplicate = duplicate
+        self.fs.lookup_generation += 1
         self.__clearRepositoryCache(duplicate)
         srcdir.variant_dirs.append(self)
 
@@ -1738,6 +1802,7 @@ class Dir(Base):
         if dir != self and dir not in self.repositories:
             self.repositories.append(dir)
             dir._tpath = '.'
+            self.fs.lookup_generation += 1
             self.__clearRepositoryCache()
 
     def up(self):
@@ -2074,7 +2139,8 @@ class Dir(Base):
                 srcnode = dir.Entry(name).disambiguate()
                 if self.duplicate:
                     node = self.Entry(name).disambiguate()
-                    node.do_duplicate(srcnode)
+                    if self.duplicate != 'lazy':
+                        node.do_duplicate(srcnode)
                     return node
                 else:
                     return srcnode
@@ -2490,6 +2556,33 @@ class RootDir(Dir):
         return _null
 
 
+def decode_text(contents) -> str:
+    """Decode the contents of a text file.
+
+    This attempts to figure out what the encoding of the text is
+    based upon the BOM bytes, falling back to UTF-8 and then Latin-1.
+    """
+    # The behavior of various decode() methods and functions
+    # w.r.t. the initial BOM bytes is different for different
+    # encodings and/or Python versions.  ('utf-8' does not strip
+    # them, but has a 'utf-8-sig' which does; 'utf-16' seems to
+    # strip them; etc.)  Just sidestep all the complication by
+    # explicitly stripping the BOM before we decode().
+    if contents[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+        return contents[len(codecs.BOM_UTF8):].decode('utf-8')
+    if contents[:len(codecs.BOM_UTF16_LE)] == codecs.BOM_UTF16_LE:
+        return contents[len(codecs.BOM_UTF16_LE):].decode('utf-16-le')
+    if contents[:len(codecs.BOM_UTF16_BE)] == codecs.BOM_UTF16_BE:
+        return contents[len(codecs.BOM_UTF16_BE):].decode('utf-16-be')
+    try:
+        return contents.decode('utf-8')
+    except UnicodeDecodeError as e:
+        try:
+            return contents.decode('latin-1')
+        except UnicodeDecodeError as e:
+            return contents.decode('utf-8', errors='backslashreplace')
+
+
 class FileNodeInfo(SCons.Node.NodeInfoBase):
     __slots__ = ('csig', 'timestamp', 'size')
     current_version_id = 2
@@ -2743,6 +2836,9 @@ class File(Base):
 
     def get_contents(self) -> bytes:
         """Return the contents of the file as bytes."""
+        src = self._lazy_src()
+        if src is not None:
+            return src.get_contents()
         return SCons.Node._get_contents_map[self._func_get_contents](self)
 
     def get_text_contents(self) -> str:
@@ -2752,31 +2848,15 @@ class File(Base):
         based upon the BOM bytes, and then decodes the contents so that
         it's a valid python string.
         """
-        contents = self.get_contents()
-        # The behavior of various decode() methods and functions
-        # w.r.t. the initial BOM bytes is different for different
-        # encodings and/or Python versions.  ('utf-8' does not strip
-        # them, but has a 'utf-8-sig' which does; 'utf-16' seems to
-        # strip them; etc.)  Just sidestep all the complication by
-        # explicitly stripping the BOM before we decode().
-        if contents[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
-            return contents[len(codecs.BOM_UTF8):].decode('utf-8')
-        if contents[:len(codecs.BOM_UTF16_LE)] == codecs.BOM_UTF16_LE:
-            return contents[len(codecs.BOM_UTF16_LE):].decode('utf-16-le')
-        if contents[:len(codecs.BOM_UTF16_BE)] == codecs.BOM_UTF16_BE:
-            return contents[len(codecs.BOM_UTF16_BE):].decode('utf-16-be')
-        try:
-            return contents.decode('utf-8')
-        except UnicodeDecodeError as e:
-            try:
-                return contents.decode('latin-1')
-            except UnicodeDecodeError as e:
-                return contents.decode('utf-8', errors='backslashreplace')
+        return decode_text(self.get_contents())
 
     def get_content_hash(self) -> str:
         """
         Compute and return the hash for this file.
         """
+        src = self._lazy_src()
+        if src is not None:
+            return src.get_content_hash()
         if not self.rexists():
             return hash_signature(SCons.Util.NOFILE)
         fname = self.rfile().get_abspath()
@@ -2964,6 +3044,65 @@ class File(Base):
         try: return binfo.bimplicit
         except AttributeError: return None
 
+    def get_depfile(self):
+        """Return the dependency file the compiler writes for this target.
+
+        Returns None unless $CC_DEPFILES is set for the target's build
+        and all its sources are C or C++ files, whose compiler writes
+        the file named by $CCDEPFILE while compiling them.
+        """
+        executor = self.get_executor()
+        env = executor.get_build_env()
+        if not env.get('CC_DEPFILES'):
+            return None
+        if env.subst('$CC_DEPFILES') in ('0', 'False', '', None):
+            return None
+        sources = executor.get_all_sources()
+        suffixes = env.get('CPPSUFFIXES', [])
+        if not sources or any(s.get_suffix() not in suffixes for s in sources):
+            return None
+        return env.subst('$CCDEPFILE', target=executor.get_all_targets(),
+                         source=sources) or None
+
+    def read_depfile(self) -> None:
+        """Take the implicit dependencies of this just built target from
+        the dependency file its compiler wrote, and remove the file.
+
+        The dependencies are stored in the .sconsign file like scanned
+        ones, so the next build can use them instead of scanning.
+        """
+        depfile = self.get_depfile()
+        if depfile is None:
+            return
+        try:
+            with open(depfile) as fp:
+                rules = SCons.Util.parse_depfile(fp)
+            os.remove(depfile)
+        except OSError:
+            return
+        executor = self.get_executor()
+        sources = set(executor.get_all_sources())
+        implicit = []
+        for _, depends in rules:
+            for name in depends:
+                node = self.fs.File(name, self.fs.Top)
+                if node in sources:
+                    continue
+                ninfo = node.get_ninfo()
+                if getattr(ninfo, 'csig', None) is None and node.exists():
+                    # The compiler found a file the scanner did not, so
+                    # it was never visited: record it as visit() would.
+                    ninfo.csig = node.get_csig()
+                    ninfo.timestamp = node.get_timestamp()
+                    ninfo.size = node.get_size()
+                implicit.append(node)
+        # Keep the dependencies on the commands themselves, which the
+        # scan added after those of the sources.
+        implicit.extend(executor.get_implicit_deps())
+        for tgt in executor.get_all_targets():
+            tgt.implicit = None
+            tgt.add_to_implicit(implicit)
+
     def rel_path(self, other):
         return self.dir.rel_path(other)
 
@@ -3018,6 +3157,25 @@ class File(Base):
         if self.exists():
             self.get_build_env().get_CacheDir().push(self)
 
+    def prefetch_from_cache(self) -> None:
+        """Let the cache get ready to retrieve the node's content.
+
+        Called from prepare(), as the node's task is about to be
+        executed, before the node is retrieved or built.
+        """
+        if self.nocache:
+            return
+        if not self.is_derived():
+            return
+        try:
+            get_CacheDir = self.get_build_env().get_CacheDir
+        except AttributeError:
+            # not every environment-like object has a CacheDir
+            return
+        cachedir = get_CacheDir()
+        if cachedir.is_enabled():
+            cachedir.prefetch(self)
+
     def retrieve_from_cache(self):
         """Try to retrieve the node's content from a cache
 
@@ -3168,6 +3326,8 @@ class File(Base):
         SCons.Node.Node.prepare(self)
 
         if self.get_state() != SCons.Node.up_to_date:
+            self.prefetch_from_cache()
+            self._duplicate_lazy_children()
             # Exists will report False for dangling symlinks so if it
             # exists or is a link (which would mean it's a dangling
             # link) then we should remove it as appropriate.
@@ -3206,6 +3366,57 @@ class File(Base):
         # _rexists attributes so they can be reevaluated.
         self.clear()
 
+    def _lazy_src(self):
+        """Return the source standing in for this node, if any.
+
+        A file in a variant directory with ``duplicate='lazy'`` is not
+        duplicated until an action that uses it is about to run; until
+        then its status and contents are those of the source file.
+        """
+        if self.duplicate != 'lazy' or self.linked:
+            return None
+        try:
+            return self._memo['_lazy_src']
+        except KeyError:
+            pass
+        src = None
+        if not self.is_derived():
+            srcnode = self.srcnode()
+            if srcnode is not self:
+                srcnode = srcnode.rfile()
+                if srcnode.get_abspath() != self.get_abspath():
+                    src = srcnode
+        self._memo['_lazy_src'] = src
+        return src
+
+    def _duplicate_lazy_children(self) -> None:
+        """Duplicate the children still waiting in lazy variant directories.
+
+        Called from prepare(), as the action that may read them is about
+        to run.
+        """
+        if SCons.Action.execute_actions:
+            _duplicate_lazy(self.all_children(scan=0))
+
+    def duplicate_lazy(self) -> None:
+        """Duplicate this file now if it's waiting in a lazy variant directory.
+
+        For a file SCons reads itself, such as an SConscript file.
+        """
+        _duplicate_lazy([self])
+
+    def stat(self):
+        src = self._lazy_src()
+        if src is not None:
+            return src.stat()
+        return super().stat()
+
+    def lstat(self):
+        src = self._lazy_src()
+        if src is not None:
+            return src.lstat()
+        return super().lstat()
+
     @SCons.Memoize.CountMethodCall
     def exists(self):
         try:
@@ -3296,6 +3507,7 @@ class File(Base):
          @see: release_target_info
         """
 
+        self.read_depfile()
         SCons.Node.Node.built(self)
 
         if (not SCons.Node.interactive and
@@ -3682,7 +3894,7 @@ class File(Base):
 
         executor = self.get_executor()
 
-        result = self.contentsig = hash_signature(executor.get_contents())
+        result = self.contentsig = executor.get_contents_sig()
         return result
 
     def get_cachedir_bsig(self):
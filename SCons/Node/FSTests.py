@@ -73,6 +73,9 @@ class Environment:
     def Dictionary(self, *args):
         return {}
 
+    def get(self, key, default=None):
+        return default
+
     def autogenerate(self, **kw):
         return {}
 
@@ -2265,6 +2268,31 @@ class DirTestCase(_tempdirTestCase):
         assert str(n) == os.path.normpath('bld1/exists'), str(n)
         assert os.path.exists(test.workpath('bld1', 'exists'))
 
+        test.subdir('src2')
+        test.write(['src2', 'exists'], "src2/exists\n")
+
+        bld2 = self.fs.Dir('bld2')
+        src2 = self.fs.Dir('src2')
+        self.fs.VariantDir(bld2, src2, duplicate='lazy')
+
+        n = bld2.srcdir_duplicate('exists')
+        assert str(n) == os.path.normpath('bld2/exists'), str(n)
+        assert not os.path.exists(test.workpath('bld2', 'exists'))
+        # Until it's duplicated, the source stands in for it.
+        assert n.exists()
+        assert n.get_contents() == b"src2/exists\n", n.get_contents()
+        assert n.getsize() == len("src2/exists\n"), n.getsize()
+        assert n.rfile() is n
+
+        n.duplicate_lazy()
+        assert os.path.exists(test.workpath('bld2', 'exists'))
+        assert n.linked
+        assert n.exists()
+        assert n.get_contents() == b"src2/exists\n", n.get_contents()
+
+        self.assertRaises(SCons.Errors.UserError, self.fs.VariantDir,
+                          self.fs.Dir('bld3'), src2, duplicate='later')
+
     def test_srcdir_find_file(self) -> None:
         """Test the Dir.srcdir_find_file() method
         """
@@ -144,6 +144,11 @@ def exists_file(node):
             src = src.rfile()
             if src.get_abspath() != node.get_abspath():
                 if src.exists():
+                    if node.duplicate == 'lazy':
+                        # Duplicated only when an action needs it, see
+                        # FS.File.prepare(); until then the source
+                        # stands in for it.
+                        return True
                     node.do_duplicate(src)
                     # Can't return 1 here because the duplication might
                     # not actually occur if the -n option is being used.
@@ -1073,8 +1078,11 @@ class Node(object, metaclass=NoSlotsPyPy):
         build_env = self.get_build_env()
         executor = self.get_executor()
 
-        # Here's where we implement --implicit-cache.
-        if implicit_cache and not implicit_deps_changed:
+        # Here's where we implement --implicit-cache.  Targets whose
+        # implicit dependencies come from the compiler's dependency file
+        # get the same treatment, as the stored ones are the compiler's.
+        if ((implicit_cache or self.get_depfile() is not None)
+                and not implicit_deps_changed):
             implicit = self.get_stored_implicit()
             if implicit is not None:
                 # We now add the implicit dependencies returned from the
@@ -1171,17 +1179,18 @@ class Node(object, metaclass=NoSlotsPyPy):
 
         if self.has_builder():
             binfo.bact = str(executor)
-            binfo.bactsig = hash_signature(executor.get_contents())
+            binfo.bactsig = executor.get_contents_sig()
 
         if self._specific_sources:
             sources = [s for s in self.sources if s not in ignore_set]
-
+            seen = set()
+            binfo.bsources = [s for s in sources if s not in seen and not seen.add(s)]
+            binfo.bsourcesigs = [s.get_ninfo() for s in binfo.bsources]
         else:
-            sources = executor.get_unignored_sources(self, self.ignore)
-
-        seen = set()
-        binfo.bsources = [s for s in sources if s not in seen and not seen.add(s)]
-        binfo.bsourcesigs = [s.get_ninfo() for s in binfo.bsources]
+            # Shared by the targets of a batch, so copy them.
+            bsources, bsourcesigs = executor.get_source_sigs(self, self.ignore)
+            binfo.bsources = bsources[:]
+            binfo.bsourcesigs = bsourcesigs[:]
 
         binfo.bdepends = [d for d in self.depends if d not in ignore_set]
         binfo.bdependsigs = [d.get_ninfo() for d in self.depends]
@@ -1222,6 +1231,10 @@ class Node(object, metaclass=NoSlotsPyPy):
         """Fetch the stored implicit dependencies"""
         return None
 
+    def get_depfile(self):
+        """Return the compiler dependency file for this node, if any."""
+        return None
+
     #
     #
     #
@@ -1499,8 +1512,7 @@ class Node(object, metaclass=NoSlotsPyPy):
                 result = True
 
         if self.has_builder():
-            contents = self.get_executor().get_contents()
-            newsig = hash_signature(contents)
+            newsig = self.get_executor().get_contents_sig()
             if bi.bactsig != newsig:
                 if t: Trace(': bactsig %s != newsig %s' % (bi.bactsig, newsig))
                 result = True
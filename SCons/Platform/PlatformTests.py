@@ -224,7 +224,7 @@ class TempFileMungeTestCase(unittest.TestCase):
         cmd = t(None, None, env, 0)
         # print("CMD is:%s"%cmd)
 
-        with open(cmd[-1],'rb') as f:
+        with open(cmd[-1][1:],'rb') as f:
             file_content = f.read()
         # print("Content is:[%s]"%file_content)
         # ...and restoring its setting.
@@ -254,7 +254,7 @@ class TempFileMungeTestCase(unittest.TestCase):
         cmd = t(None, None, env, 0)
         # print("CMD is: %s"%cmd)
 
-        with open(cmd[-1], 'rb') as f:
+        with open(cmd[-1][1:], 'rb') as f:
             file_content = f.read()
         # print("Content is:[%s]"%file_content)
         # # ...and restoring its setting.
@@ -297,6 +297,56 @@ class TempFileMungeTestCase(unittest.TestCase):
         assert cmd != defined_cmd, cmd
         assert cmd == target[0].attributes.tempfile_cmdlist[defined_cmd]
 
+    def test_tempfile_reuse(self) -> None:
+        """Test that identical command lines share one temporary file"""
+        defined_cmd = "a $VERY $OVERSIMPLIFIED line"
+        env = SCons.Environment.SubstitutionEnvironment(tools=[])
+        env['VERY'] = 'test'
+        env['OVERSIMPLIFIED'] = 'command'
+        env['MAXLINELENGTH'] = 5
+        old_actions = SCons.Action.print_actions
+        SCons.Action.print_actions = 0
+        try:
+            cmd1 = SCons.Platform.TempFileMunge(defined_cmd)(None, None, env, 0)
+            cmd2 = SCons.Platform.TempFileMunge("a test $OVERSIMPLIFIED line")(None, None, env, 0)
+            env['VERY'] = 'other'
+            cmd3 = SCons.Platform.TempFileMunge(defined_cmd)(None, None, env, 0)
+        finally:
+            SCons.Action.print_actions = old_actions
+        assert cmd1 == cmd2, (cmd1, cmd2)
+        assert cmd1 != cmd3, (cmd1, cmd3)
+        assert cmd1[0] == 'a', cmd1
+        assert cmd1[1][0] == '@', cmd1
+        tmp = cmd1[1][1:]
+        assert os.path.dirname(tmp) == os.path.dirname(cmd3[1][1:])
+        with open(tmp, 'rb') as f:
+            assert f.read() == b"test command line\n"
+
+        # A file which has gone away is written again.
+        os.unlink(tmp)
+        env['VERY'] = 'test'
+        SCons.Action.print_actions = 0
+        try:
+            cmd4 = SCons.Platform.TempFileMunge(defined_cmd)(None, None, env, 0)
+        finally:
+            SCons.Action.print_actions = old_actions
+        assert cmd4 == cmd1, (cmd4, cmd1)
+        assert os.path.isfile(tmp), tmp
+
+    def test_for_signature(self) -> None:
+        """Test that no temporary file is written for a signature"""
+        defined_cmd = "a $VERY $OVERSIMPLIFIED line"
+        t = SCons.Platform.TempFileMunge(defined_cmd)
+        env = SCons.Environment.SubstitutionEnvironment(tools=[])
+        env['VERY'] = 'unique signature'
+        env['OVERSIMPLIFIED'] = 'command'
+        env['MAXLINELENGTH'] = 5
+        env['TEMPFILEDIR'] = 'no_such_tempfile_dir'
+        cmd = t(None, None, env, 1)
+        assert cmd == defined_cmd, cmd
+        assert not os.path.exists(env['TEMPFILEDIR'])
+        assert env['TEMPFILEDIR'] not in SCons.Platform._tempfile_dirs
+
 
 
 class PlatformEscapeTestCase(unittest.TestCase):
@@ -42,10 +42,11 @@ their own platform definition.
 
 import SCons.compat
 
+import atexit
 import importlib
 import os
 import sys
-import tempfile
+import threading
 
 import SCons.Errors
 import SCons.Subst
@@ -141,6 +142,46 @@ class PlatformSpec:
         return self.name
 
 
+# The per-process directories holding the response files written
+# by TempFileMunge, by the directory they were created in.
+_tempfile_dirs = {}
+_tempfile_lock = threading.Lock()
+
+
+def _tempfile_cleanup() -> None:
+    """Remove the response files written by :func:`_response_file`."""
+    import shutil
+
+    for tmpdir in _tempfile_dirs.values():
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    _tempfile_dirs.clear()
+
+
+def _response_file(contents: bytes, suffix: str, tempfile_dir=None) -> str:
+    """Return the path of a response file holding *contents*.
+
+    The file is named by the hash of its contents, in a directory
+    private to this process, so a command line which has been seen
+    before reuses the file already written for it.  The files are
+    removed when SCons exits.
+    """
+    name = SCons.Util.hash_signature(contents) + suffix
+    with _tempfile_lock:
+        tmpdir = _tempfile_dirs.get(tempfile_dir)
+        if tmpdir is None:
+            import tempfile
+
+            tmpdir = tempfile.mkdtemp(prefix='scons-', dir=tempfile_dir)
+            if not _tempfile_dirs:
+                atexit.register(_tempfile_cleanup)
+            _tempfile_dirs[tempfile_dir] = tmpdir
+        path = os.path.join(tmpdir, name)
+        if not os.path.isfile(path):
+            with open(path, 'wb') as f:
+                f.write(contents)
+    return path
+
+
 class TempFileMunge:
     """Convert long command lines to use a temporary file.
 
@@ -191,6 +232,11 @@ class TempFileMunge:
 
         env["TEMPFILEARGESCFUNC"] = tempfile_arg_esc_func
 
+    Temporary files are named by the hash of their contents, so
+    identical command lines share a single file, which is written only
+    once.  The files are removed when SCons exits, rather than by the
+    command that uses them.
+
     """
     def __init__(self, cmd, cmdstr = None) -> None:
         self.cmd = cmd
@@ -203,7 +249,8 @@ class TempFileMunge:
             # Subst.py, which has the logic to strip any $( $) that
             # may be in the command line we squirreled away.  So we
             # just return the raw command line and let the upper
-            # string substitution layers do their thing.
+            # string substitution layers do their thing.  There's no
+            # call for a temporary file here.
             return self.cmd
 
         # Now we're actually being called because someone is actually
@@ -255,22 +302,6 @@ class TempFileMunge:
         else:
             tempfile_dir = None
 
-        fd, tmp = tempfile.mkstemp(suffix, dir=tempfile_dir, text=True)
-        native_tmp = SCons.Util.get_native_path(tmp)
-
-        if env.get('SHELL', None) == 'sh':
-            # The sh shell will try to escape the backslashes in the
-            # path, so unescape them.
-            native_tmp = native_tmp.replace('\\', r'\\\\')
-            # In Cygwin, we want to use rm to delete the temporary
-            # file, because del does not exist in the sh shell.
-            rm = env.Detect('rm') or 'del'
-        else:
-            # Don't use 'rm' if the shell is not sh, because rm won't
-            # work with the Windows shells (cmd.exe or command.com) or
-            # Windows path names.
-            rm = 'del'
-
         if 'TEMPFILEPREFIX' in env:
             prefix = env.subst('$TEMPFILEPREFIX')
         else:
@@ -282,8 +313,14 @@ class TempFileMunge:
             for arg in cmd[1:]
         ]
         join_char = env.get('TEMPFILEARGJOIN', ' ')
-        os.write(fd, bytearray(join_char.join(args) + "\n", 'utf-8'))
-        os.close(fd)
+        contents = (join_char.join(args) + "\n").encode('utf-8')
+        tmp = _response_file(contents, suffix, tempfile_dir)
+        native_tmp = SCons.Util.get_native_path(tmp)
+
+        if env.get('SHELL', None) == 'sh':
+            # The sh shell will try to escape the backslashes in the
+            # path, so unescape them.
+            native_tmp = native_tmp.replace('\\', r'\\\\')
 
         # XXX Using the SCons.Action.print_actions value directly
         # like this is bogus, but expedient.  This class should
@@ -309,10 +346,10 @@ class TempFileMunge:
                     str(cmd[0]) + " " + " ".join(args))
                 self._print_cmd_str(target, source, env, cmdstr)
 
-        cmdlist = [cmd[0], prefix + native_tmp + '\n' + rm, native_tmp]
+        cmdlist = [cmd[0], prefix + native_tmp]
 
         # Store the temporary file command list into the target Node.attributes
-        # to avoid creating two temporary files one for print and one for execute.
+        # to avoid expanding it twice, once for print and once for execute.
         if node is not None:
             try:
                 # Storing in tempfile_cmdlist by self.cmd provided when intializing
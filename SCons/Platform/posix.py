@@ -28,7 +28,7 @@ will usually be imported through the generic SCons.Platform.Platform()
 selection method.
 """
 
-import platform
+import os
 import subprocess
 
 from SCons.Platform import TempFileMunge
@@ -53,8 +53,16 @@ def escape(arg):
     return '"' + arg + '"'
 
 
+def _pass_fds():
+    """Return the jobserver file descriptors commands must inherit."""
+    from SCons.Taskmaster.Job import jobserver
+    if jobserver is None:
+        return ()
+    return jobserver.pass_fds()
+
 def exec_subprocess(l, env):
-    proc = subprocess.Popen(l, env = env, close_fds = True)
+    proc = subprocess.Popen(l, env = env, close_fds = True,
+                            pass_fds = _pass_fds())
     return proc.wait()
 
 def subprocess_spawn(sh, escape, cmd, args, env):
@@ -62,6 +70,7 @@ def subprocess_spawn(sh, escape, cmd, args, env):
 
 def exec_popen3(l, env, stdout, stderr):
     proc = subprocess.Popen(l, env = env, close_fds = True,
+                            pass_fds = _pass_fds(),
                             stdout = stdout,
                             stderr = stderr)
     return proc.wait()
@@ -96,7 +105,7 @@ def generate(env) -> None:
     env['LIBPREFIXES']    = [ '$LIBPREFIX' ]
     env['LIBSUFFIXES']    = [ '$LIBSUFFIX', '$SHLIBSUFFIX' ]
     env['HOST_OS']        = 'posix'
-    env['HOST_ARCH']      = platform.machine()
+    env['HOST_ARCH']      = os.uname().machine
     env['PSPAWN']         = pspawn
     env['SPAWN']          = spawn
     env['SHELL']          = 'sh'
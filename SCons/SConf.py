@@ -34,10 +34,14 @@ libraries are installed, if some command line options are supported etc.
 import SCons.compat
 
 import atexit
+import copy
 import io
+import json
 import os
 import re
 import sys
+import threading
+import time
 import traceback
 
 import SCons.Action
@@ -98,9 +102,15 @@ def SetProgressDisplay(display) -> None:
 SConfFS = None
 
 _ac_build_counter = defaultdict(int)
+_ac_check_counter = defaultdict(int)
 _ac_config_logs = {}  # all config.log files created in this build
 _ac_config_hs   = {}  # all config.h files created in this build
 sconf_global = None   # current sconf object
+_check_many = threading.local()  # per-thread sconf while CheckMany() runs
+
+def _current_sconf():
+    """Return the sconf object checks in this thread are running with."""
+    return getattr(_check_many, 'sconf', None) or sconf_global
 
 def _createConfigH(target, source, env) -> None:
     t = open(str(target[0]), "w")
@@ -161,6 +171,87 @@ class ConfigureCacheError(SConfError):
         super().__init__('"%s" is not yet built and cache is forced.' % str(target))
 
 
+class ResultCache:
+    """A directory of Configure test results shared between build trees.
+
+    Results are stored by a key computed from the test program text,
+    the command lines that build it and the signatures of the tools
+    they run, so any build tree running the same test with the same
+    tools can reuse them.  Each result also lists the signatures of the
+    files the test found (headers, libraries), and is only reused while
+    those are unchanged.  The layout follows that of a cache
+    directory: a ``config`` file and one JSON file per result, in
+    subdirectories named by the first characters of the key.
+    """
+
+    # bump to invalidate the results of older versions
+    version = 2
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.config = {'prefix_len': 2}
+        config_file = os.path.join(path, 'config')
+        try:
+            os.makedirs(path, exist_ok=True)
+            with open(config_file, 'x') as config:
+                json.dump(self.config, config)
+        except FileExistsError:
+            try:
+                with open(config_file) as config:
+                    self.config = json.load(config)
+            except ValueError:
+                msg = "Failed to read configure cache configuration for " + path
+                raise SCons.Errors.SConsEnvironmentError(msg)
+        except OSError:
+            msg = "Failed to create configure cache directory " + path
+            raise SCons.Errors.SConsEnvironmentError(msg)
+
+    def entrypath(self, key) -> str:
+        subdir = key[:self.config['prefix_len']].upper()
+        return os.path.join(self.path, subdir, key + '.json')
+
+    def get(self, key):
+        """Return the result stored under *key*, or None."""
+        entrypath = self.entrypath(key)
+        try:
+            with open(entrypath) as f:
+                entry = json.load(f)
+            # mark the result as used, for pruning by access time
+            os.utime(entrypath)
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, key, entry) -> None:
+        """Store *entry* under *key*, atomically replacing any old one."""
+        entrypath = self.entrypath(key)
+        try:
+            os.makedirs(os.path.dirname(entrypath), exist_ok=True)
+            temp = "%s.tmp%d.%d" % (entrypath, os.getpid(), threading.get_ident())
+            with open(temp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temp, entrypath)
+        except OSError:
+            # a shared cache we can't write to only costs us speed
+            pass
+
+
+_tool_signatures = {}
+
+def _tool_signature(path) -> str:
+    """Return the content signature of the tool at *path*."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return path
+    key = (path, st.st_size, st.st_mtime_ns)
+    try:
+        return _tool_signatures[key]
+    except KeyError:
+        sig = _tool_signatures[key] = SCons.Util.hash_file_signature(path)
+        return sig
+
+
 # define actions for building text files
 def _createSource(target, source, env) -> None:
     fd = open(str(target[0]), "w")
@@ -230,8 +321,9 @@ class SConfBuildTask(SCons.Taskmaster.AlwaysTask):
     non_sconf_nodes = set()
 
     def display(self, message) -> None:
-        if sconf_global.logstream:
-            sconf_global.logstream.write("scons: Configure: " + message + "\n")
+        sconf = _current_sconf()
+        if sconf.logstream:
+            sconf.logstream.write("scons: Configure: " + message + "\n")
 
     def display_cached_string(self, bi) -> None:
         """
@@ -304,7 +396,7 @@ class SConfBuildTask(SCons.Taskmaster.AlwaysTask):
         if not self.targets[0].has_builder():
             return
 
-        sconf = sconf_global
+        sconf = _current_sconf()
 
         is_up_to_date, cached_error, cachable = self.collect_node_states()
 
@@ -393,8 +485,14 @@ class SConfBuildTask(SCons.Taskmaster.AlwaysTask):
         # and reset their node info.
         # If we do not reset their node info, any changes in these
         # nodes will not trigger builds in the normal build process
-        for node in self.non_sconf_nodes:
-            node.ninfo = node.new_ninfo()
+        sconf = _current_sconf()
+        if sconf is not None and sconf.reset_nodes is not None:
+            # Inside CheckMany(), the other checks may be about to store
+            # the node info of these nodes, so leave it until the end.
+            sconf.reset_nodes.update(self.non_sconf_nodes)
+        else:
+            for node in self.non_sconf_nodes:
+                node.ninfo = node.new_ninfo()
         super().postprocess()
 
 class SConfBase:
@@ -459,8 +557,15 @@ class SConfBase:
         self.logfile = log_file
         self.logstream = None
         self.lastTarget = None
+        self._last_deps = [] # files found by the last test built
         self.depth = _depth
         self.cached = 0 # will be set, if all test results are cached
+        self.lock = None # held by the running check inside CheckMany()
+        self.messages = None # buffered progress messages inside CheckMany()
+        self.conftest_key = None # names the conftest files inside CheckMany()
+        self.conftest_counter = None
+        self.reset_nodes = None # nodes to reset once CheckMany() is done
+        self.result_cache = None # shared result cache from $CONFIGURECACHE
 
         # add default tests
         default_tests = {
@@ -573,7 +678,12 @@ class SConfBase:
             tm = SCons.Taskmaster.Taskmaster(nodes, SConfBuildTask)
             # we don't want to build tests in parallel
             jobs = SCons.Taskmaster.Job.Jobs(1, tm)
-            jobs.run()
+            if self.lock is None:
+                jobs.run()
+            else:
+                # Inside CheckMany() we are not in the main thread,
+                # which is the only one allowed to set signal handlers.
+                jobs.job.start()
             for n in nodes:
                 state = n.get_state()
                 if (state != SCons.Node.executed and
@@ -600,12 +710,56 @@ class SConfBase:
         environment as the SPAWN variable so Action.py doesn't have to
         know or care whether it's spawning a piped command or not.
         """
-        return self.pspawn(sh, escape, cmd, args, env, self.logstream, self.logstream)
+        if self.lock is None:
+            return self.pspawn(sh, escape, cmd, args, env, self.logstream, self.logstream)
+        # Let the other checks of a CheckMany() batch run while this
+        # one waits for its command.
+        stdout, stderr = sys.stdout, sys.stderr
+        self.lock.release()
+        try:
+            return self.pspawn(sh, escape, cmd, args, env, self.logstream, self.logstream)
+        finally:
+            self.lock.acquire()
+            sys.stdout, sys.stderr = stdout, stderr
+
+    @property
+    def lastTarget(self):
+        """The target built by the last test.
+
+        If the result of the test came from the shared result cache,
+        the target is built when it is first asked for.
+        """
+        if self._replay is not None:
+            builder, text, extension = self._replay
+            self._replay = None
+            self._try_build(builder, text, extension)
+        return self._lastTarget
+
+    @lastTarget.setter
+    def lastTarget(self, node) -> None:
+        self._replay = None
+        self._lastTarget = node
+
+    def _cache_hit(self, entry, builder, text, extension):
+        """Note a test whose result came from the shared result cache."""
+        self.lastTarget = None
+        if entry['result']:
+            self._replay = (builder, text, extension)
 
     def TryBuild(self, builder, text=None, extension: str=""):
         """Low level TryBuild implementation. Normally you don't need to
         call that - you can use TryCompile / TryLink / TryRun instead
         """
+        key = self._result_key('build', builder, text, extension)
+        entry = self._cached_result(key)
+        if entry is not None:
+            self._cache_hit(entry, builder, text, extension)
+            return entry['result']
+        result = self._try_build(builder, text, extension)
+        self._cache_result(key, 'build', text, result)
+        return result
+
+    def _try_build(self, builder, text=None, extension: str=""):
         global _ac_build_counter
 
         # Make sure we have a PSPAWN value, and save the current
@@ -626,8 +780,16 @@ class SConfBase:
 
         if text is not None:
             textSig = SCons.Util.hash_signature(sourcetext)
-            textSigCounter = str(_ac_build_counter[textSig])
-            _ac_build_counter[textSig] += 1
+            if self.conftest_key is None:
+                counter = _ac_build_counter
+            else:
+                # Inside CheckMany(), the files are counted by the test,
+                # so their names do not depend on what the tests running
+                # at the same time have built.
+                textSig = SCons.Util.hash_signature(textSig + self.conftest_key)
+                counter = self.conftest_counter
+            textSigCounter = str(counter[textSig])
+            counter[textSig] += 1
 
             f = "_".join([f, textSig, textSigCounter])
             textFile = self.confdir.File(f + extension)
@@ -670,6 +832,8 @@ class SConfBase:
             self.lastTarget = nodes[0]
         else:
             self.lastTarget = None
+        if self.result_cache is not None:
+            self._last_deps = self._found_deps(nodesToBeBuilt)
 
         return result
 
@@ -681,11 +845,22 @@ class SConfBase:
         """
         builder = SCons.Builder.Builder(action=action)
         self.env.Append( BUILDERS = {'SConfActionBuilder' : builder} )
-        ok = self.TryBuild(self.env.SConfActionBuilder, text, extension)
-        del self.env['BUILDERS']['SConfActionBuilder']
+        try:
+            key = self._result_key('action', self.env.SConfActionBuilder,
+                                   text, extension)
+            entry = self._cached_result(key)
+            if entry is not None:
+                self._cache_hit(entry, self.env.SConfActionBuilder,
+                                text, extension)
+                return (entry['result'], entry['output'])
+            ok = self._try_build(self.env.SConfActionBuilder, text, extension)
+        finally:
+            del self.env['BUILDERS']['SConfActionBuilder']
         if ok:
             outputStr = self.lastTarget.get_text_contents()
+            self._cache_result(key, 'action', text, 1, outputStr)
             return (1, outputStr)
+        self._cache_result(key, 'action', text, 0, "")
         return (0, "")
 
     def TryCompile( self, text, extension):
@@ -710,7 +885,14 @@ class SConfBase:
         (0, '') otherwise. The target (a file containing the program's stdout)
         is saved in self.lastTarget (for further processing).
         """
-        ok = self.TryLink(text, extension)
+        key = self._result_key('run', self.env.Program, text, extension)
+        entry = self._cached_result(key)
+        if entry is not None:
+            self._cache_hit(entry, self.env.Program, text, extension)
+            return (entry['result'], entry['output'])
+        # The program must really be there to be run, so don't take
+        # the result of linking it from the shared cache.
+        ok = self._try_build(self.env.Program, text, extension)
         if ok:
             prog = self.lastTarget
             pname = prog.get_internal_path()
@@ -725,9 +907,103 @@ class SConfBase:
             ok = self.BuildNodes(node)
             if ok:
                 outputStr = SCons.Util.to_str(output.get_contents())
+                self._cache_result(key, 'run', text, 1, outputStr)
                 return( 1, outputStr)
+        self._cache_result(key, 'run', text, 0, "")
         return (0, "")
 
+    def _result_key(self, kind, builder, text, extension):
+        """Return the key of a test in the shared result cache.
+
+        The key covers the test text, the command lines of the builder
+        and of the builders it uses to make its sources, which carry the
+        relevant construction variables, and the signatures of the tools
+        those command lines run.  The command lines are computed for
+        placeholder files at the top, so they are the same whichever
+        build tree or configure directory the test is run in.
+        Returns None if there is no shared result cache.
+        """
+        if self.result_cache is None:
+            return None
+        parts = [str(ResultCache.version), kind, extension, text or ""]
+        old_fs_dir = SConfFS.getcwd()
+        SConfFS.chdir(SConfFS.Top, change_os_dir=False)
+        try:
+            source = [SConfFS.Top.File("conftest" + extension)]
+            target = [SConfFS.Top.File("conftest.out")]
+            bld = builder.builder
+            for b in [bld] + bld.get_src_builders(self.env):
+                try:
+                    contents = b.action.get_contents(target, source, self.env)
+                    deps = b.action.get_implicit_deps(target, source, self.env)
+                except SCons.Errors.UserError:
+                    # a source builder for other kinds of source files
+                    continue
+                parts.append(SCons.Util.to_str(contents))
+                parts.extend(_tool_signature(d.get_abspath()) for d in deps)
+        finally:
+            SConfFS.chdir(old_fs_dir, change_os_dir=False)
+        return SCons.Util.hash_signature("\0".join(parts))
+
+    @staticmethod
+    def _found_deps(nodes):
+        """Return the files building *nodes* used, other than the test's.
+
+        These are the headers the scanners found, the libraries linked
+        and the like, as sorted ``[path, signature]`` pairs.  Paths
+        under the top directory are relative to it, so another build
+        tree checks its own copy.
+        """
+        top = SConfFS.Top.get_abspath() + os.sep
+        deps = {}
+        seen = set()
+        stack = list(nodes)
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(node.children(scan=0))
+            if (not isinstance(node, (SCons.Node.FS.File, SCons.Node.FS.Entry))
+                    or getattr(node.attributes, 'conftest_node', 0)):
+                continue
+            path = node.get_abspath()
+            sig = _tool_signature(path)
+            if path.startswith(top):
+                path = path[len(top):]
+            deps[path] = sig
+        return [list(dep) for dep in sorted(deps.items())]
+
+    def _cached_result(self, key):
+        """Return the shared cache entry for *key*, or None.
+
+        An entry is only used if the files its test found are unchanged.
+        """
+        if key is None or cache_mode == FORCE:
+            return None
+        entry = self.result_cache.get(key)
+        if entry is None:
+            return None
+        top = SConfFS.Top.get_abspath()
+        for path, sig in entry.get('deps', ()):
+            if _tool_signature(os.path.join(top, path)) != sig:
+                return None
+        if self.logstream is not None:
+            self.logstream.write("scons: Configure: result %s taken from the "
+                                 "configure cache %s\n"
+                                 % (entry['result'], self.result_cache.path))
+        return entry
+
+    def _cache_result(self, key, kind, text, result, output=None) -> None:
+        if key is None or dryrun:
+            return
+        self.result_cache.put(key, {'kind': kind,
+                                    'text': text,
+                                    'result': int(bool(result)),
+                                    'output': output,
+                                    'deps': self._last_deps,
+                                    'time': time.time()})
+
     class TestWrapper:
         """A wrapper around Tests (to ensure sanity)"""
         def __init__(self, test, sconf) -> None:
@@ -736,12 +1012,172 @@ class SConfBase:
         def __call__(self, *args, **kw):
             if not self.sconf.active:
                 raise SCons.Errors.UserError
-            context = CheckContext(self.sconf)
-            ret = self.test(context, *args, **kw)
-            if self.sconf.config_h is not None:
-                self.sconf.config_h_text = self.sconf.config_h_text + context.config_h
-            context.Result("error: no result")
-            return ret
+            return self.sconf._run_test(self.test, args, kw)
+
+    def _conftest_key(self, test, args, kw) -> str:
+        """Reserve the key naming the conftest files of a CheckMany() test.
+
+        The key is the signature of the test and its arguments, and the
+        number of tests with the same signature given before, so it is
+        the same from one run to the next as long as the tests are
+        given in the same order.
+        """
+        sig = SCons.Util.hash_signature(
+            str((getattr(test, '__name__', ''), tuple(args), kw)))
+        count = _ac_check_counter[sig]
+        _ac_check_counter[sig] += 1
+        return "%s_%d" % (sig, count)
+
+    def _run_test(self, test, args, kw):
+        context = CheckContext(self)
+        ret = test(context, *args, **kw)
+        if self.config_h is not None:
+            self.config_h_text = self.config_h_text + context.config_h
+        context.Result("error: no result")
+        return ret
+
+    def CheckMany(self, checks, jobs=None):
+        """Run several independent tests concurrently.
+
+        Each entry of *checks* is the name of a test, or a tuple of the
+        name followed by the positional arguments of the test, the last
+        of which may be a dictionary of keyword arguments.  Up to *jobs*
+        tests run at the same time, by default as many as the ``-j``
+        option allows.  Returns the list of test results.
+
+        Every test runs with its own copy of the environment, so tests
+        in one batch do not see each other's changes.  Once the batch
+        is done, the messages, config.log output, config.h lines and
+        environment changes of each test are applied in the order the
+        tests were given, exactly as if they had run one after another.
+        """
+        if not self.active or self.lock is not None:
+            raise SCons.Errors.UserError("CheckMany() needs an active Configure context.")
+        if jobs is None:
+            try:
+                jobs = self.env.GetOption('num_jobs')
+            except AttributeError:
+                jobs = 1
+
+        calls = []
+        for check in checks:
+            if SCons.Util.is_String(check):
+                check = (check,)
+            name, args, kw = check[0], list(check[1:]), {}
+            if args and SCons.Util.is_Dict(args[-1]):
+                kw = args.pop()
+            try:
+                test = getattr(self, name).test
+            except AttributeError:
+                raise SCons.Errors.UserError("Unknown configure test %s." % repr(name))
+            calls.append((test, args, kw))
+
+        before = SCons.Util.semi_deepcopy_dict(self.env.Dictionary(),
+                                               exclude=['BUILDERS'])
+        workers = [self._worker() for _ in calls]
+        reset_nodes = set()
+        for worker in workers:
+            worker.reset_nodes = reset_nodes
+        lock = threading.Lock()
+        stdout, stderr = sys.stdout, sys.stderr
+
+        def run(worker, test, args, kw):
+            with lock:
+                _check_many.sconf = worker
+                worker.lock = lock
+                try:
+                    return worker._run_test(test, args, kw)
+                finally:
+                    _check_many.sconf = None
+
+        # Done once for the batch rather than in each BuildNodes() call,
+        # since the checks save and restore these while others run.
+        save_max_drift = SConfFS.get_max_drift()
+        old_fs_dir = SConfFS.getcwd()
+        old_os_dir = os.getcwd()
+        SConfFS.chdir(SConfFS.Top, change_os_dir=True)
+        SConfFS.set_max_drift(0)
+        results = []
+        import concurrent.futures
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max(jobs, 1)) as pool:
+                futures = []
+                for worker, call in zip(workers, calls):
+                    # The keys naming the conftest files are handed out
+                    # in the order the tests were given, not as they run.
+                    worker.conftest_key = self._conftest_key(*call)
+                    worker.conftest_counter = defaultdict(int)
+                    futures.append(pool.submit(run, worker, *call))
+                for worker, future in zip(workers, futures):
+                    ret = future.result()
+                    with lock:
+                        sys.stdout, sys.stderr = stdout, stderr
+                        self._merge(worker, before)
+                    results.append(ret)
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            for node in reset_nodes:
+                node.ninfo = node.new_ninfo()
+            SConfFS.set_max_drift(save_max_drift)
+            os.chdir(old_os_dir)
+            SConfFS.chdir(old_fs_dir, change_os_dir=False)
+        return results
+
+    def _worker(self):
+        """Return a copy of this context for one test of CheckMany()."""
+        worker = copy.copy(self)
+        worker.env = self.env.Clone()
+        if self.logstream is not None:
+            # a real file, since commands write their output straight to it
+            import tempfile
+
+            worker.logstream = SCons.Util.Unbuffered(tempfile.TemporaryFile("w+"))
+        worker.lastTarget = None
+        worker._last_deps = []
+        worker.cached = 0
+        worker.config_h_text = ""
+        worker.messages = []
+        return worker
+
+    # construction variables the tests themselves set while building
+    _private_vars = ('BUILDERS', 'PSTDERR', 'PSTDOUT', 'SPAWN')
+
+    def _merge(self, worker, before) -> None:
+        """Apply the output and environment changes of a CheckMany() test."""
+        for msg in worker.messages:
+            progress_display(msg, append_newline=0)
+        if self.logstream is not None:
+            worker.logstream.seek(0)
+            self.logstream.write(worker.logstream.read())
+            worker.logstream.close()
+        self.config_h_text = self.config_h_text + worker.config_h_text
+
+        after = worker.env.Dictionary()
+        for key, value in after.items():
+            old = before.get(key)
+            if key in self._private_vars or (key in before and old == value):
+                continue
+            if SCons.Util.is_List(value) and (old is None or SCons.Util.is_List(old)):
+                # Lists (LIBS and friends) are merged by what was added
+                # to them, so several tests can each add something.
+                old, value = list(old or []), list(value)
+                if value[:len(old)] == old:
+                    self.env.Append(**{key: value[len(old):]})
+                    continue
+                if value[len(value) - len(old):] == old:
+                    self.env.Prepend(**{key: value[:len(value) - len(old)]})
+                    continue
+            self.env[key] = value
+        for key in before:
+            if key not in after and key in self.env and key not in self._private_vars:
+                del self.env[key]
+
+    def _progress(self, msg) -> None:
+        if self.messages is None:
+            progress_display(msg, append_newline=0)
+        else:
+            self.messages.append(msg)
 
     def AddTest(self, test_name, test_instance) -> None:
         """Adds test_class to this SConf instance. It can be called with
@@ -811,6 +1247,9 @@ class SConfBase:
         sconfSrcBld = SCons.Builder.Builder(action=action)
         self.env.Append( BUILDERS={'SConfSourceBuilder':sconfSrcBld} )
         self.config_h_text = _ac_config_hs.get(self.config_h, "")
+        cache_path = self.env.subst('$CONFIGURECACHE')
+        if cache_path:
+            self.result_cache = ResultCache(SConfFS.Dir(cache_path).get_abspath())
         self.active = 1
         # only one SConf instance should be active at a time ...
         sconf_global = self
@@ -978,7 +1417,7 @@ class CheckContext:
             # The self.sconf.cached flag can only be set between those calls
             msg = "(cached) " + msg
             self.sconf.cached = 0
-        progress_display(msg, append_newline=0)
+        self.sconf._progress(msg)
         self.Log("scons: Configure: " + msg + "\n")
 
     def Log(self, msg) -> None:
@@ -25,6 +25,7 @@ import io
 import os
 import re
 import sys
+import time
 from types import ModuleType
 import unittest
 
@@ -835,6 +836,108 @@ int main(void) {
         finally:
             sconf.Finish()
 
+    def test_CheckMany(self) -> None:
+        """Test SConf.CheckMany()
+        """
+        def CheckSleep(context, n):
+            context.Message("Checking sleep %s ... " % n)
+            (ret, output) = context.TryAction("sleep 1 && echo %s > $TARGET" % n)
+            context.Result(ret)
+            return output.strip()
+
+        self._resetSConfState()
+        sconf = self.SConf.SConf(self.scons_env,
+                                 custom_tests={'CheckSleep': CheckSleep},
+                                 conf_dir=self.test.workpath('config.tests'),
+                                 log_file=self.test.workpath('config.log'),
+                                 config_h=self.test.workpath('config.h'))
+        try:
+            r = sconf.CheckMany([
+                ('CheckCHeader', 'stdio.h'),
+                ('CheckLib', existing_lib, 'main'),
+                ('CheckLib', 'hopefullynolib', 'main'),
+                ('CheckTypeSize', 'char', {'expect': 1}),
+                'CheckCC',
+            ], jobs=3)
+            assert r == [True, True, False, 1, True], r
+            assert sconf.env['LIBS'] == [existing_lib], sconf.env['LIBS']
+
+            # the output is in the order of the checks
+            text = sconf.config_h_text
+            assert text.find('HAVE_STDIO_H') < text.find('HAVE_LIB' + existing_lib.upper()) \
+                < text.find('HAVE_LIBHOPEFULLYNOLIB') < text.find('SIZEOF_CHAR'), text
+            log = self.test.read(self.test.workpath('config.log'), mode='r')
+            assert log.find('stdio.h') < log.find('hopefullynolib') \
+                < log.find('char'), log
+
+            if os.name == 'posix':
+                # the checks really run concurrently
+                start = time.time()
+                r = sconf.CheckMany([('CheckSleep', n) for n in range(4)], jobs=4)
+                assert r == ['0', '1', '2', '3'], r
+                assert time.time() - start < 3, time.time() - start
+        finally:
+            sconf.Finish()
+
+    def test_CheckMany_names(self) -> None:
+        """Test that CheckMany() names conftest files in the order given
+        """
+        delays = {}
+
+        def CheckSame(context, name):
+            # the same source in every check, built after a delay
+            context.Message("Checking same %s ... " % name)
+            if delays[name]:
+                context.TryAction("sleep %s" % delays[name])
+            ret = context.TryCompile("int main(void) { return 0; }\n", ".c")
+            context.Result(ret)
+            return os.path.basename(str(context.sconf.lastTarget))
+
+        names = []
+        for conf_dir, delay in (('first.tests', 1), ('second.tests', 0)):
+            # the first check is built last, then first
+            delays.update(a=delay, b=1 - delay)
+            self._resetSConfState()
+            sconf = self.SConf.SConf(self.scons_env,
+                                     custom_tests={'CheckSame': CheckSame},
+                                     conf_dir=self.test.workpath(conf_dir),
+                                     log_file=self.test.workpath('config.log'))
+            try:
+                names.append(sconf.CheckMany([('CheckSame', 'a'),
+                                              ('CheckSame', 'b')], jobs=2))
+            finally:
+                sconf.Finish()
+        assert names[0][0] != names[0][1], names
+        assert names[0] == names[1], names
+
+    def test_ResultCache(self) -> None:
+        """Test sharing results through $CONFIGURECACHE
+        """
+        self._resetSConfState()
+        cache = self.SConf.ResultCache(self.test.workpath('cache'))
+        assert cache.get('0123') is None
+        cache.put('0123', {'result': 1})
+        assert cache.get('0123') == {'result': 1}
+        assert os.path.exists(self.test.workpath('cache', '01', '0123.json'))
+
+        for conf_dir in ('config1.tests', 'config2.tests'):
+            self._resetSConfState()
+            self.scons_env['CONFIGURECACHE'] = self.test.workpath('cache')
+            sconf = self.SConf.SConf(self.scons_env,
+                                     conf_dir=self.test.workpath(conf_dir),
+                                     log_file=self.test.workpath('config.log'))
+            try:
+                assert sconf.TryCompile("int main(void) { return 0; }\n", ".c")
+                assert not sconf.TryCompile("syntax error\n", ".c")
+                assert sconf.TryRun('#include <stdio.h>\nint main(void) { printf("hi"); return 0; }\n',
+                                    ".c") == (1, "hi")
+            finally:
+                sconf.Finish()
+        # the second directory got all results from the shared cache
+        assert not os.listdir(self.test.workpath('config2.tests'))
+        log = self.test.read(self.test.workpath('config.log'), mode='r')
+        assert log.count('taken from the configure cache') == 3, log
+
     def test_CustomChecks(self) -> None:
         """Test Custom Checks
         """
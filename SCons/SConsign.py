@@ -57,6 +57,9 @@ DataBase = {}
 DB_Module = SCons.dblite
 DB_Name = None
 DB_sync_list = []
+# Maps id() of open database handles to (handle, StringTable); the handle
+# is kept so the id can't be reused by another database.
+DB_Strings = {}
 
 def current_sconsign_filename():
     hash_format = SCons.Util.get_hash_format()
@@ -125,6 +128,7 @@ def write() -> None:
     for sig_file in sig_files:
         sig_file.write(sync=0)
     for db in DB_sync_list:
+        write_string_table(db)
         try:
             syncmethod = db.sync
         except AttributeError:
@@ -186,6 +190,454 @@ class SConsignEntry:
                 setattr(self, key, value)
 
 
+# The binary .sconsign encoding.
+#
+# Every encoded blob starts with MAGIC (which can't start a pickle),
+# a kind byte and a format version:
+#
+#   table:   MAGIC b'T' version, 8-byte table id, count, then each
+#            string as length + UTF-8 bytes
+#   record:  MAGIC b'R' version, 8-byte table id, digest width, the
+#            record's NodeInfo table (count, then each NodeInfo), then
+#            count and each entry (see _Encoder.entry)
+#   file:    MAGIC b'F' version, table length, table, record
+#
+# All integers are unsigned LEB128 varints (timestamps are zigzagged
+# first).  Paths and file names are stored as indexes into a string
+# table which is shared by all directory records of a database (stored
+# under STRING_TABLE_KEY), so each dependency path is stored once per
+# database instead of once per dependent; likewise NodeInfo is stored
+# once per directory record.  Action strings change whenever flags do,
+# so they are stored inline (length + UTF-8 bytes) rather than piling
+# up in the table.  Hex digests
+# are stored as raw bytes.  Anything else (custom NodeInfo/BuildInfo
+# classes, unexpected values) falls back to a pickle per object.
+
+MAGIC = b'\x00SCB'
+FORMAT_VERSION = 2
+STRING_TABLE_KEY = '\x00strings'
+
+_PICKLED = 0
+_ENCODED = 1
+
+_BINFO_STRINGS = ('bsources', 'bdepends', 'bimplicit')
+_BINFO_SIGS = ('bsourcesigs', 'bdependsigs', 'bimplicitsigs')
+
+
+class _NotEncodable(Exception):
+    """Raised by the encoders to fall back to pickling an object."""
+
+
+def _varint(n):
+    if n < 0x80:
+        if n < 0:
+            raise _NotEncodable(n)
+        return bytes((n,))
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7f) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _read_varint(data, pos):
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7f
+    shift = 7
+    while True:
+        pos += 1
+        b = data[pos]
+        result |= (b & 0x7f) << shift
+        if b < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+class StringTable:
+    """Append-only table of the strings used by encoded records.
+
+    Records refer to strings by their index, so strings are never removed
+    or reordered; rewriting a database with ``sconsign --convert``
+    starts a fresh, compact table.  Only paths and file names go in the
+    table, and the encoded strings are kept, so writing the table again
+    only encodes the strings added since it was read.
+    """
+
+    def __init__(self, strings=(), table_id=None) -> None:
+        self.strings = []
+        self.index = {}
+        self.body = bytearray()
+        self.id = table_id if table_id is not None else os.urandom(8)
+        for s in strings:
+            self.add(s)
+        self.dirty = False
+
+    def add(self, s) -> int:
+        try:
+            return self.index[s]
+        except KeyError:
+            i = self.index[s] = len(self.strings)
+            self.strings.append(s)
+            self.body += _text(s)
+            self.dirty = True
+            return i
+
+    def encode(self) -> bytes:
+        return b''.join([MAGIC, b'T', _varint(FORMAT_VERSION), self.id,
+                         _varint(len(self.strings)), self.body])
+
+    @classmethod
+    def decode(cls, data) -> "StringTable":
+        _check_header(data, b'T')
+        pos = len(MAGIC) + 1
+        _, pos = _read_varint(data, pos)
+        table_id = bytes(data[pos:pos + 8])
+        pos += 8
+        count, pos = _read_varint(data, pos)
+        strings = []
+        append = strings.append
+        for _ in range(count):
+            s, pos = _read_text(data, pos)
+            append(s)
+        if pos != len(data):
+            raise ValueError("trailing data after .sconsign string table")
+        return cls(strings, table_id)
+
+
+def _text(s) -> bytes:
+    b = s.encode('utf-8', 'surrogateescape')
+    return _varint(len(b)) + b
+
+
+def _read_text(data, pos):
+    n, pos = _read_varint(data, pos)
+    return str(data[pos:pos + n], 'utf-8', 'surrogateescape'), pos + n
+
+
+def is_encoded(data) -> bool:
+    """Return whether *data* uses the binary encoding (rather than pickle)."""
+    return data[:len(MAGIC)] == MAGIC
+
+
+def _check_header(data, kind) -> None:
+    if data[:len(MAGIC)] != MAGIC or data[len(MAGIC):len(MAGIC) + 1] != kind:
+        raise ValueError("not an encoded .sconsign %r blob" % kind)
+    version, _ = _read_varint(data, len(MAGIC) + 1)
+    if version != FORMAT_VERSION:
+        raise ValueError("unsupported .sconsign format version %d" % version)
+
+
+class _Encoder:
+    def __init__(self, strings) -> None:
+        self.strings = strings
+        self.width = None
+        self.ninfos = []
+        self.ninfo_index = {}
+
+    def digest(self, value) -> bytes:
+        try:
+            raw = bytes.fromhex(value)
+        except (TypeError, ValueError):
+            raise _NotEncodable(value)
+        if self.width is None:
+            self.width = len(raw)
+        if len(raw) != self.width or raw.hex() != value:
+            raise _NotEncodable(value)
+        return raw
+
+    def string(self, value) -> bytes:
+        if type(value) is not str:
+            raise _NotEncodable(value)
+        return _varint(self.strings.add(value))
+
+    def text(self, value) -> bytes:
+        if type(value) is not str:
+            raise _NotEncodable(value)
+        return _text(value)
+
+    def _ninfo_bytes(self, ninfo, FileNodeInfo) -> bytes:
+        try:
+            if type(ninfo) is not FileNodeInfo:
+                raise _NotEncodable(ninfo)
+            flags = 0
+            out = []
+            csig = getattr(ninfo, 'csig', None)
+            if csig is not None:
+                flags |= 1
+                out.append(self.digest(csig))
+            timestamp = getattr(ninfo, 'timestamp', None)
+            if timestamp is not None:
+                if type(timestamp) is not int:
+                    raise _NotEncodable(timestamp)
+                flags |= 2
+                out.append(_varint(~timestamp << 1 | 1 if timestamp < 0
+                                   else timestamp << 1))
+            size = getattr(ninfo, 'size', None)
+            if size is not None:
+                if type(size) is not int:
+                    raise _NotEncodable(size)
+                flags |= 4
+                out.append(_varint(size))
+            return bytes((_ENCODED, flags)) + b''.join(out)
+        except _NotEncodable:
+            p = pickle.dumps(ninfo, PICKLE_PROTOCOL)
+            return bytes((_PICKLED,)) + _varint(len(p)) + p
+
+    def ninfo(self, ninfo, FileNodeInfo) -> bytes:
+        """Return a reference to *ninfo* in the record's NodeInfo table.
+
+        Dependencies shared by many targets in a directory (headers,
+        tools) have identical NodeInfo, so each is stored only once.
+        """
+        b = self._ninfo_bytes(ninfo, FileNodeInfo)
+        try:
+            i = self.ninfo_index[b]
+        except KeyError:
+            i = self.ninfo_index[b] = len(self.ninfos)
+            self.ninfos.append(b)
+        return _varint(i)
+
+    def entry(self, entry, FileNodeInfo, FileBuildInfo) -> bytes:
+        if type(entry) is not SConsignEntry:
+            raise _NotEncodable(entry)
+        flags = 0
+        out = []
+        ninfo = getattr(entry, 'ninfo', None)
+        if ninfo is not None:
+            flags |= 1
+            out.append(self.ninfo(ninfo, FileNodeInfo))
+        binfo = getattr(entry, 'binfo', None)
+        if binfo is not None:
+            if type(binfo) is not FileBuildInfo or hasattr(binfo, 'dependency_map'):
+                raise _NotEncodable(binfo)
+            flags |= 2
+            bflags = 0
+            bit = 1
+            for name in _BINFO_STRINGS:
+                value = getattr(binfo, name, None)
+                if value is not None:
+                    bflags |= bit
+                    out.append(_varint(len(value)))
+                    out.extend([self.string(v) for v in value])
+                bit <<= 1
+            for name in _BINFO_SIGS:
+                value = getattr(binfo, name, None)
+                if value is not None:
+                    bflags |= bit
+                    out.append(_varint(len(value)))
+                    out.extend([self.ninfo(v, FileNodeInfo) for v in value])
+                bit <<= 1
+            bact = getattr(binfo, 'bact', None)
+            if bact is not None:
+                bflags |= bit
+                out.append(self.text(bact))
+            bit <<= 1
+            bactsig = getattr(binfo, 'bactsig', None)
+            if bactsig is not None:
+                bflags |= bit
+                out.append(self.digest(bactsig))
+            out.insert(1 if flags & 1 else 0, _varint(bflags))
+        return bytes((_ENCODED, flags)) + b''.join(out)
+
+
+def encode_entries(entries, strings) -> bytes:
+    """Encode a directory's *entries* dict, adding strings to *strings*."""
+    from SCons.Node.FS import FileNodeInfo, FileBuildInfo
+
+    encoder = _Encoder(strings)
+    body = [_varint(len(entries))]
+    for key, entry in entries.items():
+        body.append(encoder.string(key))
+        width = encoder.width
+        try:
+            body.append(encoder.entry(entry, FileNodeInfo, FileBuildInfo))
+        except _NotEncodable:
+            encoder.width = width
+            p = pickle.dumps(entry, PICKLE_PROTOCOL)
+            body.append(bytes((_PICKLED,)) + _varint(len(p)) + p)
+    header = [MAGIC, b'R', _varint(FORMAT_VERSION), strings.id,
+              _varint(encoder.width or 0), _varint(len(encoder.ninfos))]
+    return b''.join(header + encoder.ninfos + body)
+
+
+class _Decoder:
+    def __init__(self, data, strings, width, FileNodeInfo) -> None:
+        self.data = data
+        self.strings = strings.strings
+        self.width = width
+        self.FileNodeInfo = FileNodeInfo
+        # The record's NodeInfo table: (csig, timestamp, size) tuples
+        # for encoded entries, pickle data for the rest.
+        self.ninfos = []
+
+    def pickled(self, pos):
+        n, pos = _read_varint(self.data, pos)
+        return pickle.loads(self.data[pos:pos + n]), pos + n
+
+    def read_ninfo(self, pos):
+        data = self.data
+        if data[pos] == _PICKLED:
+            n, pos = _read_varint(data, pos + 1)
+            return data[pos:pos + n], pos + n
+        flags = data[pos + 1]
+        pos += 2
+        csig = timestamp = size = None
+        if flags & 1:
+            csig = data[pos:pos + self.width].hex()
+            pos += self.width
+        if flags & 2:
+            n, pos = _read_varint(data, pos)
+            timestamp = ~(n >> 1) if n & 1 else n >> 1
+        if flags & 4:
+            size, pos = _read_varint(data, pos)
+        return (csig, timestamp, size), pos
+
+    def ninfo(self, pos):
+        i, pos = _read_varint(self.data, pos)
+        fields = self.ninfos[i]
+        if type(fields) is bytes:
+            return pickle.loads(fields), pos
+        ninfo = self.FileNodeInfo()
+        csig, timestamp, size = fields
+        if csig is not None:
+            ninfo.csig = csig
+        if timestamp is not None:
+            ninfo.timestamp = timestamp
+        if size is not None:
+            ninfo.size = size
+        return ninfo, pos
+
+    def entry(self, pos, FileBuildInfo):
+        data = self.data
+        if data[pos] == _PICKLED:
+            return self.pickled(pos + 1)
+        flags = data[pos + 1]
+        pos += 2
+        entry = SConsignEntry()
+        if flags & 1:
+            entry.ninfo, pos = self.ninfo(pos)
+        if flags & 2:
+            strings = self.strings
+            binfo = FileBuildInfo()
+            bflags, pos = _read_varint(data, pos)
+            bit = 1
+            for name in _BINFO_STRINGS:
+                if bflags & bit:
+                    n, pos = _read_varint(data, pos)
+                    value = []
+                    for _ in range(n):
+                        i, pos = _read_varint(data, pos)
+                        value.append(strings[i])
+                    setattr(binfo, name, value)
+                bit <<= 1
+            for name in _BINFO_SIGS:
+                if bflags & bit:
+                    n, pos = _read_varint(data, pos)
+                    value = []
+                    for _ in range(n):
+                        ninfo, pos = self.ninfo(pos)
+                        value.append(ninfo)
+                    setattr(binfo, name, value)
+                bit <<= 1
+            if bflags & bit:
+                binfo.bact, pos = _read_text(data, pos)
+            bit <<= 1
+            if bflags & bit:
+                binfo.bactsig = data[pos:pos + self.width].hex()
+                pos += self.width
+            entry.binfo = binfo
+        return entry, pos
+
+
+def decode_entries(data, strings) -> dict:
+    """Decode a record made by :func:`encode_entries` back into entries."""
+    from SCons.Node.FS import FileNodeInfo, FileBuildInfo
+
+    _check_header(data, b'R')
+    pos = len(MAGIC) + 1
+    _, pos = _read_varint(data, pos)
+    if data[pos:pos + 8] != strings.id:
+        raise ValueError("record does not match the .sconsign string table")
+    pos += 8
+    width, pos = _read_varint(data, pos)
+    decoder = _Decoder(data, strings, width, FileNodeInfo)
+    count, pos = _read_varint(data, pos)
+    for _ in range(count):
+        fields, pos = decoder.read_ninfo(pos)
+        decoder.ninfos.append(fields)
+    count, pos = _read_varint(data, pos)
+    entries = {}
+    for _ in range(count):
+        i, pos = _read_varint(data, pos)
+        entries[decoder.strings[i]], pos = decoder.entry(pos, FileBuildInfo)
+    if pos != len(data):
+        raise ValueError("trailing data after .sconsign record")
+    return entries
+
+
+def encode_file(entries) -> bytes:
+    """Encode *entries* as a self-contained per-directory .sconsign file."""
+    strings = StringTable()
+    record = encode_entries(entries, strings)
+    table = strings.encode()
+    return b''.join([MAGIC, b'F', _varint(FORMAT_VERSION),
+                     _varint(len(table)), table, record])
+
+
+def decode_file(data) -> dict:
+    """Decode a per-directory .sconsign file made by :func:`encode_file`."""
+    _check_header(data, b'F')
+    pos = len(MAGIC) + 1
+    _, pos = _read_varint(data, pos)
+    n, pos = _read_varint(data, pos)
+    strings = StringTable.decode(data[pos:pos + n])
+    return decode_entries(data[pos + n:], strings)
+
+
+def get_string_table(db) -> StringTable:
+    """Return the string table of database *db*, reading it on first use."""
+    try:
+        handle, strings = DB_Strings[id(db)]
+    except KeyError:
+        pass
+    else:
+        if handle is db:
+            return strings
+    try:
+        raw = db[STRING_TABLE_KEY]
+    except KeyError:
+        strings = StringTable()
+    else:
+        try:
+            strings = StringTable.decode(raw)
+        except (ValueError, IndexError, TypeError) as e:
+            # Records written against the lost table carry its id, so
+            # they will be ignored as corrupt rather than misread.
+            SCons.Warnings.warn(SCons.Warnings.CorruptSConsignWarning,
+                                "Ignoring corrupt .sconsign string table (%s)" % e)
+            strings = StringTable()
+    DB_Strings[id(db)] = (db, strings)
+    return strings
+
+
+def write_string_table(db) -> None:
+    """Store the string table of database *db* if strings were added."""
+    handle, strings = DB_Strings.get(id(db), (None, None))
+    if handle is db and strings.dirty:
+        db[STRING_TABLE_KEY] = strings.encode()
+        strings.dirty = False
+
+
+def loads(data, strings=None) -> dict:
+    """Load a directory's entries from a database record in either format."""
+    if is_encoded(data):
+        return decode_entries(data, strings)
+    return pickle.loads(data)
+
+
 class Base:
     """
     This is the controlling class for the signatures for the collection of
@@ -264,7 +716,7 @@ class DB(Base):
             pass
         else:
             try:
-                self.entries = pickle.loads(rawentries)
+                self.entries = loads(rawentries, get_string_table(db))
                 if not isinstance(self.entries, dict):
                     self.entries = {}
                     raise TypeError
@@ -302,9 +754,11 @@ class DB(Base):
         path = normcase(self.dir.get_internal_path())
         for key, entry in self.entries.items():
             entry.convert_to_sconsign()
-        db[path] = pickle.dumps(self.entries, PICKLE_PROTOCOL)
+        db[path] = encode_entries(self.entries, get_string_table(db))
 
         if sync:
+            # The record may refer to strings new to the table.
+            write_string_table(db)
             try:
                 syncmethod = db.sync
             except AttributeError:
@@ -324,7 +778,11 @@ class Dir(Base):
         if not fp:
             return
 
-        self.entries = pickle.load(fp)
+        data = fp.read()
+        if is_encoded(data):
+            self.entries = decode_file(data)
+        else:
+            self.entries = pickle.loads(data)
         if not isinstance(self.entries, dict):
             self.entries = {}
             raise TypeError
@@ -397,7 +855,7 @@ class DirFile(Dir):
                 return
         for key, entry in self.entries.items():
             entry.convert_to_sconsign()
-        pickle.dump(self.entries, file, PICKLE_PROTOCOL)
+        file.write(encode_file(self.entries))
         file.close()
         if fname != self.sconsign:
             try:
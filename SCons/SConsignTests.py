@@ -21,13 +21,16 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import io
 import os
+import pickle
 import unittest
 
 import TestCmd
 
 import SCons.dblite
 import SCons.SConsign
+from SCons.compat import PICKLE_PROTOCOL
 from SCons.Util import get_hash_format, get_current_hash_algorithm_used
 
 class BuildInfo:
@@ -341,6 +344,93 @@ class SConsignFileTestCase(SConsignTestCase):
         assert fake_dbm.mode == "c", fake_dbm.mode
 
 
+class EncodingTestCase(unittest.TestCase):
+
+    @staticmethod
+    def entry(name, csig, timestamp, size):
+        from SCons.Node.FS import FileNodeInfo, FileBuildInfo
+
+        def ninfo(csig, timestamp, size):
+            ni = FileNodeInfo()
+            ni.csig = csig
+            ni.timestamp = timestamp
+            ni.size = size
+            return ni
+
+        entry = SCons.SConsign.SConsignEntry()
+        entry.ninfo = ninfo(csig, timestamp, size)
+        entry.binfo = FileBuildInfo()
+        entry.binfo.bsources = [name + '.c']
+        entry.binfo.bsourcesigs = [ninfo('0' * 32, 1, 2)]
+        entry.binfo.bdepends = []
+        entry.binfo.bdependsigs = []
+        entry.binfo.bimplicit = ['common.h', '/usr/bin/cc']
+        entry.binfo.bimplicitsigs = [ninfo('ab' * 16, -5, 0),
+                                     ninfo('cd' * 16, 1700000000, 123456)]
+        entry.binfo.bact = 'cc -o %s.o -c %s.c' % (name, name)
+        entry.binfo.bactsig = 'ef' * 16
+        return entry
+
+    def assertEntryEqual(self, e1, e2) -> None:
+        self.assertEqual(e1.ninfo.__getstate__(), e2.ninfo.__getstate__())
+        self.assertEqual(e1.binfo.format(), e2.binfo.format())
+
+    def test_round_trip(self) -> None:
+        """Test encoding and decoding entries with a shared string table"""
+        entries = {
+            'foo.o': self.entry('foo', '12' * 16, 1700000001, 100),
+            'bar.o': self.entry('bar', '34' * 16, 1700000002, 200),
+        }
+        strings = SCons.SConsign.StringTable()
+        data = SCons.SConsign.encode_entries(entries, strings)
+        assert SCons.SConsign.is_encoded(data), data[:8]
+        assert strings.dirty
+        # Paths shared by both entries are only stored once.
+        assert strings.strings.count('common.h') == 1, strings.strings
+
+        # Action strings are stored in the record, not the table.
+        assert 'cc -o foo.o -c foo.c' not in strings.strings, strings.strings
+
+        encoded = strings.encode()
+        strings = SCons.SConsign.StringTable.decode(encoded)
+        self.assertEqual(strings.encode(), encoded)
+        result = SCons.SConsign.loads(data, strings)
+        self.assertEqual(sorted(result), ['bar.o', 'foo.o'])
+        for name in entries:
+            self.assertEntryEqual(result[name], entries[name])
+        # NodeInfo shared between entries must not share the object.
+        assert result['foo.o'].binfo.bimplicitsigs[0] is not \
+            result['bar.o'].binfo.bimplicitsigs[0]
+
+        pickled = pickle.dumps(entries, PICKLE_PROTOCOL)
+        assert len(data) < len(pickled), (len(data), len(pickled))
+        self.assertEqual(sorted(SCons.SConsign.loads(pickled)), ['bar.o', 'foo.o'])
+
+    def test_fallback(self) -> None:
+        """Test that unexpected objects and values are pickled"""
+        entry = self.entry('foo', 'not a digest', 1.5, 100)
+        entries = {'foo.o': entry, 'dummy': DummySConsignEntry('dummy')}
+        strings = SCons.SConsign.StringTable()
+        data = SCons.SConsign.encode_entries(entries, strings)
+        result = SCons.SConsign.decode_entries(data, strings)
+        self.assertEntryEqual(result['foo.o'], entry)
+        self.assertEqual(result['dummy'].name, 'dummy')
+
+    def test_table_mismatch(self) -> None:
+        """Test that a record is not decoded against another string table"""
+        entries = {'foo.o': self.entry('foo', '12' * 16, 1, 1)}
+        data = SCons.SConsign.encode_entries(entries, SCons.SConsign.StringTable())
+        with self.assertRaises(ValueError):
+            SCons.SConsign.decode_entries(data, SCons.SConsign.StringTable())
+
+    def test_file(self) -> None:
+        """Test the self-contained encoding of per-directory files"""
+        entries = {'foo.o': self.entry('foo', '12' * 16, 1, 1)}
+        data = SCons.SConsign.encode_file(entries)
+        result = SCons.SConsign.Dir(io.BytesIO(data)).entries
+        self.assertEntryEqual(result['foo.o'], entries['foo.o'])
+
+
 class writeTestCase(SConsignTestCase):
 
     def test_write(self) -> None:
@@ -378,6 +468,30 @@ class writeTestCase(SConsignTestCase):
 
         assert fake_dbm.sync_count == 1, fake_dbm.sync_count
 
+    def test_write_sync(self) -> None:
+        """Test that a synced DB record is written with its string table"""
+
+        class Fake_DBM(dict):
+            def open(self, name, mode):
+                return self
+            def sync(self) -> None:
+                pass
+
+        fake_dbm = Fake_DBM()
+
+        SCons.SConsign.DataBase = {}
+        SCons.SConsign.File(self.test.workpath('sconsign_sync'), fake_dbm)
+
+        f = SCons.SConsign.DB(DummyNode())
+        f.set_entry('foo', EncodingTestCase.entry('foo', '12' * 16, 1, 1))
+        f.write(sync=1)
+
+        assert SCons.SConsign.STRING_TABLE_KEY in fake_dbm, list(fake_dbm)
+        strings = SCons.SConsign.StringTable.decode(
+            fake_dbm[SCons.SConsign.STRING_TABLE_KEY])
+        entries = SCons.SConsign.loads(fake_dbm[f.dir.get_internal_path()], strings)
+        self.assertEqual(list(entries), ['foo'])
+
 
 
 if __name__ == "__main__":
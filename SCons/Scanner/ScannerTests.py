@@ -24,9 +24,11 @@
 import collections
 import unittest
 
+import TestCmd
 import TestUnit
 
 import SCons.compat
+import SCons.Node.FS
 import SCons.Scanner
 from SCons.Scanner import ScannerBase, Selector, Classic, ClassicCPP, Current, FindPathDirs
 
@@ -609,6 +611,50 @@ class ClassicCPPTestCase(unittest.TestCase):
         finally:
             SCons.Node.FS.find_file = save
 
+    def test_prefetch(self) -> None:
+        """Test reading ahead with the Scanner.ClassicCPP prefetch() method"""
+        test = TestCmd.TestCmd(workdir='')
+        test.subdir('inc', 'src')
+        test.write(['src', 'f.c'], '#include "f.h"\n#include <g.h>\n')
+        test.write(['src', 'f.h'], '#include "missing.h"\n')
+        test.write(['inc', 'g.h'], '#include "h.h"\n')
+        test.write(['inc', 'h.h'], '\n')
+        fs = SCons.Node.FS.FS(test.workpath(''))
+        env = DummyEnvironment()
+        s = ClassicCPP("Test", ['.c', '.h'], None,
+                       r'^[ \t]*#[ \t]*include[ \t]*(<|")([^>"]+)(>|")')
+        path = (fs.Dir('inc'),)
+
+        request = s.prefetch(fs.File('src/f.c'), path)
+        request()
+        for name in ('src/f.c', 'src/f.h', 'inc/g.h', 'inc/h.h'):
+            assert test.workpath(name) in SCons.Scanner._prefetched, name
+
+        # The scan takes what was read ahead rather than reading the file.
+        def find_include_names(node):
+            raise AssertionError("%s read again" % node)
+        s.find_include_names = find_include_names
+        f_c = fs.File('src/f.c')
+        deps = s(f_c, env, path)
+        assert list(map(str, deps)) == ['src/f.h', 'inc/g.h'], deps
+        assert f_c.includes == [('"', 'f.h', '"'), ('<', 'g.h', '>')], f_c.includes
+
+        # A file changed since it was read ahead is read again.
+        del s.find_include_names
+        test.write(['inc', 'h.h'], '#include <g.h>\n')
+        fs = SCons.Node.FS.FS(test.workpath(''))
+        path = (fs.Dir('inc'),)
+        deps = s(fs.File('inc/h.h'), env, path)
+        assert list(map(str, deps)) == ['inc/g.h'], deps
+
+        # Scanners finding includes their own way don't read ahead.
+        class MyScanner(ClassicCPP):
+            def find_include_names(self, node):
+                return []
+        m = MyScanner("Test", ['.c'], None, r'')
+        assert m.prefetch(fs.File('src/f.c'), path) is None
+        assert ScannerBase(lambda n, e, p: []).prefetch(f_c, path) is None
+
 def suite():
     suite = unittest.TestSuite()
     tclasses = [
@@ -23,6 +23,7 @@
 
 """The Scanner package for the SCons software construction utility."""
 
+import os
 import re
 
 import SCons.Node.FS
@@ -37,6 +38,13 @@ class _Null:
 # used as an actual argument value.
 _null = _Null
 
+# The include names found in files read ahead of time by Classic.prefetch(),
+# keyed by absolute path, with the modification time and size of the file
+# they were read from.
+_prefetched = {}
+# The (file, search directories) pairs whose includes have been followed.
+_prefetch_followed = set()
+
 def Scanner(function, *args, **kwargs):
     """Factory function to create a Scanner Object.
 
@@ -274,6 +282,16 @@ class ScannerBase:
         self.function[skey] = scanner
         self.add_skey(skey)
 
+    def prefetch(self, node, path=()):
+        """Return a function doing the costly part of scanning *node* ahead.
+
+        The function is safe to run in another thread: it works on file
+        names only and doesn't touch the Node tree.  The results are
+        picked up when the Node is scanned.  Returns None if this scanner
+        has nothing to read ahead.
+        """
+        return None
+
 
 # keep the old name for a while in case external users are using.
 # there are no more internal uses of this class by the name "Base"
@@ -368,18 +386,97 @@ class Classic(Current):
     def sort_key(include):
         return SCons.Node.FS._my_normcase(include)
 
+    @staticmethod
+    def include_dirs(include, source_dir, dirs):
+        """Return the name of *include* and the directories to search for
+        it, for :meth:`prefetch`, which has directory names rather than
+        Nodes."""
+        return include, (source_dir,) + dirs
+
     def find_include_names(self, node):
         return self.cre.findall(node.get_text_contents())
 
+    def _reads_ahead(self) -> bool:
+        # Subclasses finding includes their own way are not read ahead.
+        return (type(self).find_include_names is Classic.find_include_names
+                and type(self).find_include in (Classic.find_include,
+                                                ClassicCPP.find_include))
+
+    def prefetch(self, node, path=()):
+        if not self._reads_ahead():
+            return None
+        node = node.rfile()
+        if callable(path):
+            path = path()
+        dirs = tuple(d.get_abspath() for d in path)
+        abspath = node.get_abspath()
+
+        def read_ahead() -> None:
+            self._prefetch(abspath, dirs)
+
+        return read_ahead
+
+    def _prefetch(self, abspath, dirs) -> None:
+        """Read and find the includes of *abspath* and, if this scanner
+        is recursive, of the files they name, searched for in *dirs*."""
+        recursive = self.recurse_nodes != self._recurse_no_nodes
+        todo = [abspath]
+        while todo:
+            fname = todo.pop()
+            if (fname, dirs) in _prefetch_followed:
+                continue
+            _prefetch_followed.add((fname, dirs))
+            try:
+                includes = _prefetched[fname][2]
+            except KeyError:
+                try:
+                    st = os.stat(fname)
+                    with open(fname, 'rb') as f:
+                        contents = f.read()
+                except OSError:
+                    continue
+                text = SCons.Node.FS.decode_text(contents)
+                includes = self.cre.findall(text)
+                includes = list(map(SCons.Util.silent_intern, includes))
+                _prefetched[fname] = (st.st_mtime_ns, st.st_size, includes)
+            if not recursive:
+                continue
+            source_dir = os.path.dirname(fname)
+            for include in includes:
+                name, search = self.include_dirs(include, source_dir, dirs)
+                for d in search:
+                    found = os.path.join(d, name)
+                    if os.path.isfile(found):
+                        todo.append(os.path.normpath(found))
+                        break
+
+    @staticmethod
+    def prefetched_include_names(node):
+        """Return the include names read ahead for *node*, if the file
+        has not changed since, else None."""
+        try:
+            mtime, size, includes = _prefetched[node.get_abspath()]
+        except KeyError:
+            return None
+        st = node.stat()
+        if st is None or (st.st_mtime_ns, st.st_size) != (mtime, size):
+            return None
+        return includes
+
     def scan(self, node, path=()):
         # cache the includes list in node so we only scan it once:
         if node.includes is not None:
             includes = node.includes
         else:
-            includes = self.find_include_names(node)
-            # Intern the names of the include files. Saves some memory
-            # if the same header is included many times.
-            node.includes = list(map(SCons.Util.silent_intern, includes))
+            includes = None
+            if _prefetched and self._reads_ahead():
+                includes = self.prefetched_include_names(node)
+            if includes is None:
+                includes = self.find_include_names(node)
+                # Intern the names of the include files. Saves some memory
+                # if the same header is included many times.
+                includes = list(map(SCons.Util.silent_intern, includes))
+            node.includes = includes
 
         # This is a hand-coded DSU (decorate-sort-undecorate, or
         # Schwartzian transform) pattern.  The sort key is the raw name
@@ -427,6 +524,13 @@ class ClassicCPP(Classic):
         i = SCons.Util.silent_intern(include[1])
         return n, i
 
+    @staticmethod
+    def include_dirs(include, source_dir, dirs):
+        include = list(map(SCons.Util.to_str, include))
+        if include[0] == '"':
+            return include[1], (source_dir,) + dirs
+        return include[1], dirs + (source_dir,)
+
     @staticmethod
     def sort_key(include):
         return SCons.Node.FS._my_normcase(' '.join(include))
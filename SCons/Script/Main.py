@@ -39,7 +39,6 @@ import re
 import sys
 import time
 import traceback
-import platform
 import threading
 from typing import Optional, List
 
@@ -58,8 +57,7 @@ import SCons.Script
 import SCons.Taskmaster
 import SCons.Util
 import SCons.Warnings
-import SCons.Script.Interactive
-from SCons.Util.stats import count_stats, memory_stats, time_stats, ENABLE_JSON, write_scons_stats_file, JSON_OUTPUT_FILE
+from SCons.Util.stats import count_stats, memory_stats, memprofile_stats, time_stats, ENABLE_JSON, write_scons_stats_file, JSON_OUTPUT_FILE
 
 from SCons import __version__ as SConsVersion
 
@@ -352,34 +350,124 @@ class BuildTask(SCons.Taskmaster.OutOfDateTask):
                 sys.stdout.write("scons: " + explanation)
 
 
+class CleanBatch:
+    """The files and directories to remove in a batched clean.
+
+    With ``--experimental=batch_clean``, the clean tasks only collect
+    what they would remove.  When the Taskmaster is done, the files are
+    removed in batches on a thread pool, then the directories, deepest
+    first, one level at a time.
+    """
+
+    batch_size = 256
+
+    def __init__(self, num_jobs: int=1) -> None:
+        self.num_jobs = num_jobs
+        self.files = {}
+        self.dirs = {}
+        self.lock = threading.Lock()
+
+    def add(self, path, pathstr, isdir: bool=False) -> bool:
+        """Add *path* to remove; return whether it wasn't already added."""
+        with self.lock:
+            if path in self.files or path in self.dirs:
+                return False
+            if isdir:
+                self.dirs[path] = pathstr
+            else:
+                self.files[path] = pathstr
+            return True
+
+    @staticmethod
+    def _remove_all(func, paths):
+        errors = []
+        for path in paths:
+            try:
+                func(path)
+            except OSError as e:
+                errors.append((path, e))
+        return errors
+
+    def _run(self, pool, func, paths):
+        paths = sorted(paths)
+        batches = [paths[i:i + self.batch_size]
+                   for i in range(0, len(paths), self.batch_size)]
+        errors = []
+        for result in pool.map(self._remove_all, [func] * len(batches), batches):
+            errors.extend(result)
+        return errors
+
+    def remove(self) -> None:
+        """Remove the collected files and directories."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        levels = {}
+        for path in self.dirs:
+            levels.setdefault(path.count(os.sep), []).append(path)
+        workers = self.num_jobs if self.num_jobs > 1 else None
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            errors = self._run(pool, os.unlink, self.files)
+            for depth in sorted(levels, reverse=True):
+                errors.extend(self._run(pool, os.rmdir, levels[depth]))
+        for path, e in sorted(errors, key=lambda x: x[0]):
+            pathstr = self.files.get(path) or self.dirs[path]
+            print("scons: Could not remove '%s':" % pathstr, e.strerror)
+        self.files = {}
+        self.dirs = {}
+
+
 class CleanTask(SCons.Taskmaster.AlwaysTask):
     """An SCons clean task."""
-    def fs_delete(self, path, pathstr, remove: bool=True):
+
+    # The CleanBatch collecting the paths to remove, if batched.
+    batch = None
+
+    def fs_delete(self, path, pathstr, remove: bool=True) -> bool:
+        """Remove *path*, or add it to the batch to remove.
+
+        Returns whether all of it was removed (or added).
+        """
+        batch = self.batch if remove else None
         try:
             if os.path.lexists(path):
                 if os.path.isfile(path) or os.path.islink(path):
-                    if remove: os.unlink(path)
+                    if batch is None:
+                        if remove: os.unlink(path)
+                    elif not batch.add(path, pathstr):
+                        return True
                     display("Removed " + pathstr)
                 elif os.path.isdir(path) and not os.path.islink(path):
                     # delete everything in the dir
+                    complete = True
                     for e in sorted(os.listdir(path)):
                         p = os.path.join(path, e)
                         s = os.path.join(pathstr, e)
                         if os.path.isfile(p):
-                            if remove: os.unlink(p)
+                            if batch is None:
+                                if remove: os.unlink(p)
+                            elif not batch.add(p, s):
+                                continue
                             display("Removed " + s)
-                        else:
-                            self.fs_delete(p, s, remove)
+                        elif not self.fs_delete(p, s, remove):
+                            complete = False
                     # then delete dir itself
-                    if remove: os.rmdir(path)
+                    if batch is None:
+                        if remove: os.rmdir(path)
+                    elif not batch.add(path, pathstr, isdir=True) or not complete:
+                        # Left for the batch to report why it can't
+                        # be removed.
+                        return complete
                     display("Removed directory " + pathstr)
                 else:
                     errstr = "Path '%s' exists but isn't a file or directory."
                     raise SCons.Errors.UserError(errstr % pathstr)
         except SCons.Errors.UserError as e:
             print(e)
+            return False
         except (IOError, OSError) as e:
             print("scons: Could not remove '%s':" % pathstr, e.strerror)
+            return False
+        return True
 
     def _get_files_to_clean(self):
         result = []
@@ -403,6 +491,10 @@ class CleanTask(SCons.Taskmaster.AlwaysTask):
 
     def remove(self) -> None:
         for t in self._get_files_to_clean():
+            if self.batch is not None and isinstance(t, SCons.Node.FS.File):
+                if (t.exists() or t.islink()) and self.batch.add(t.get_abspath(), str(t)):
+                    display("Removed " + str(t))
+                continue
             try:
                 removed = t.remove()
             except OSError as e:
@@ -452,11 +544,13 @@ class QuestionTask(SCons.Taskmaster.AlwaysTask):
 
 
 class TreePrinter:
-    def __init__(self, derived: bool=False, prune: bool=False, status: bool=False, sLineDraw: bool=False) -> None:
+    def __init__(self, derived: bool=False, prune: bool=False, status: bool=False,
+                 sLineDraw: bool=False, json: bool=False) -> None:
         self.derived = derived
         self.prune = prune
         self.status = status
         self.sLineDraw = sLineDraw
+        self.json = json
     def get_all_children(self, node):
         return node.all_children()
     def get_derived_children(self, node):
@@ -467,6 +561,9 @@ class TreePrinter:
             func = self.get_derived_children
         else:
             func = self.get_all_children
+        if self.json:
+            SCons.Util.print_json_tree(t, func, showtags=self.status)
+            return
         s = self.status and 2 or 0
         SCons.Util.print_tree(t, func, prune=self.prune, showtags=s, lastChild=True, singleLineDraw=self.sLineDraw)
 
@@ -700,6 +797,8 @@ def _set_debug_values(options) -> None:
     print_memoizer = "memoizer" in debug_values
     if "memory" in debug_values:
         memory_stats.enable(sys.stdout)
+    if "memprofile" in debug_values:
+        memprofile_stats.enable(sys.stdout)
     print_objects = ("objects" in debug_values)
     if print_objects:
         SCons.Debug.track_instances = True
@@ -1085,6 +1184,7 @@ def _main(parser):
 
     memory_stats.append('after reading SConscript files:')
     count_stats.append(('post-', 'read'))
+    memprofile_stats.append('after reading SConscript files:')
 
     # Re-{enable,disable} warnings in case they disabled some in
     # the SConscript file.
@@ -1152,6 +1252,8 @@ def _main(parser):
     fs.set_max_drift(options.max_drift)
 
     SCons.Taskmaster.Job.explicit_stack_size = options.stack_size
+    SCons.Taskmaster.Job.max_load = options.max_load
+    SCons.Taskmaster.Job.min_free_mem = options.min_free_mem
 
     # Hash format and chunksize are set late to support SetOption being called
     # in a SConscript or SConstruct file.
@@ -1162,8 +1264,10 @@ def _main(parser):
     platform = SCons.Platform.platform_module()
 
     if options.interactive:
-        SCons.Script.Interactive.interact(fs, OptionsParser, options,
-                                          targets, target_top)
+        from . import Interactive
+
+        Interactive.interact(fs, OptionsParser, options,
+                             targets, target_top)
 
     else:
 
@@ -1308,13 +1412,17 @@ def _build_targets(fs, options, targets, target_top):
             """Leave the order of dependencies alone."""
             return dependencies
 
-    taskmaster = SCons.Taskmaster.Taskmaster(nodes, task_class, order, options.taskmastertrace_file)
+    if 'tm_ready_queue' in options.experimental:
+        tm_class = SCons.Taskmaster.ReadyQueueTaskmaster
+    else:
+        tm_class = SCons.Taskmaster.Taskmaster
+    taskmaster = tm_class(nodes, task_class, order, options.taskmastertrace_file)
 
     # Let the BuildTask objects get at the options to respond to the
     # various print_* settings, tree_printer list, etc.
     BuildTask.options = options
 
-    is_pypy = platform.python_implementation() == 'PyPy'
+    is_pypy = sys.implementation.name == 'pypy'
     # As of 3.7, python removed support for threadless platforms.
     # See https://www.python.org/dev/peps/pep-0011/
     is_37_or_later = sys.version_info >= (3, 7)
@@ -1327,6 +1435,11 @@ def _build_targets(fs, options, targets, target_top):
     # to check if python configured with threads.
     global num_jobs
     num_jobs = options.num_jobs
+    jobserver = _setup_jobserver(options)
+    if jobserver is not None and not _jobs_were_set(options):
+        # --jobserver was given without -j: run as many jobs as the
+        # make that started us was allowed.
+        num_jobs = jobserver.jobs or os.cpu_count() or 1
     jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
     if num_jobs > 1:
         msg = None
@@ -1336,6 +1449,11 @@ def _build_targets(fs, options, targets, target_top):
         if msg:
             SCons.Warnings.warn(SCons.Warnings.NoParallelSupportWarning, msg)
 
+    if options.clean and not options.no_exec and 'batch_clean' in options.experimental:
+        CleanTask.batch = CleanBatch(jobs.num_jobs)
+    else:
+        CleanTask.batch = None
+
     memory_stats.append('before building targets:')
     count_stats.append(('pre-', 'build'))
 
@@ -1345,6 +1463,8 @@ def _build_targets(fs, options, targets, target_top):
         closing_message=closing_message,
         failure_message=failure_message
         ) -> None:
+        if CleanTask.batch is not None and not jobs.were_interrupted():
+            CleanTask.batch.remove()
         if jobs.were_interrupted():
             if not options.no_progress and not options.silent:
                 sys.stderr.write("scons: Build interrupted.\n")
@@ -1357,10 +1477,15 @@ def _build_targets(fs, options, targets, target_top):
             progress_display("scons: " + failure_message)
         else:
             progress_display("scons: " + closing_message)
+        memprofile_stats.append('after building targets:')
         if not options.no_exec:
             if jobs.were_interrupted():
                 progress_display("scons: writing .sconsign file.")
             SCons.SConsign.write()
+            memprofile_stats.append('after writing .sconsign file:')
+        if SCons.Taskmaster.Job.jobserver is not None:
+            SCons.Taskmaster.Job.jobserver.close()
+            SCons.Taskmaster.Job.jobserver = None
 
     progress_display("scons: " + opening_message)
     jobs.run(postfunc = jobs_postfunc)
@@ -1370,6 +1495,39 @@ def _build_targets(fs, options, targets, target_top):
 
     return nodes
 
+def _jobs_were_set(options) -> bool:
+    """Return whether -j was given, on the command line or in SConscripts."""
+    return ('num_jobs' in options.__dict__
+            or 'num_jobs' in options.__SConscript_settings__)
+
+
+def _jobserver_was_set(options) -> bool:
+    """Return whether --jobserver was given on the command line."""
+    return 'jobserver' in options.__dict__
+
+
+def _setup_jobserver(options):
+    """Set up the GNU make jobserver selected by the --jobserver option.
+
+    In ``auto`` mode, join the jobserver of a ``make`` that started us,
+    if any, provided -j or --jobserver was given: a plain ``scons`` run
+    from a Makefile stays a serial build.  In ``server`` mode, join it,
+    or else make a jobserver for the build commands to share when
+    building in parallel.
+    """
+    jobserver = None
+    if options.jobserver == 'server' or (
+            options.jobserver == 'auto'
+            and (_jobs_were_set(options) or _jobserver_was_set(options))):
+        jobserver = SCons.Taskmaster.Job.JobServer.from_makeflags(
+            os.environ.get('MAKEFLAGS'))
+    if (jobserver is None and options.jobserver == 'server'
+            and options.num_jobs > 1 and os.name == 'posix'):
+        jobserver = SCons.Taskmaster.Job.JobServer.create(options.num_jobs)
+    SCons.Taskmaster.Job.jobserver = jobserver
+    return jobserver
+
+
 def _exec_main(parser, values) -> None:
     sconsflags = os.environ.get('SCONSFLAGS', '')
     all_args = sconsflags.split() + sys.argv[1:]
@@ -1493,6 +1651,7 @@ def main() -> None:
         sys.exit(2)
 
     memory_stats.print_stats()
+    memprofile_stats.print_stats()
     count_stats.print_stats()
 
     if print_objects:
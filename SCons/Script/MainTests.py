@@ -21,8 +21,16 @@
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import os
+import subprocess
+import sys
 import unittest
 
+import TestCmd
+
+import SCons
+import SCons.Script.Main
+
 # Unit tests of various classes within SCons.Script.Main.py.
 #
 # Most of the tests of this functionality are actually end-to-end scripts
@@ -33,6 +41,42 @@ import unittest
 # have to reach into SCons.Script.Main for various classes or other bits
 # of private functionality.
 
+
+class ImportTestCase(unittest.TestCase):
+
+    def test_lazy_imports(self) -> None:
+        """Test that importing SCons.Script leaves rarely used modules alone"""
+        lazy = ['concurrent.futures', 'inspect', 'logging', 'platform',
+                'SCons.Script.Interactive', 'tempfile', 'urllib.parse', 'uuid']
+        root = os.path.dirname(os.path.dirname(SCons.__file__))
+        code = ("import sys; sys.path.insert(0, %r); import SCons.Script; "
+                "print(sorted(m for m in %r if m in sys.modules))" % (root, lazy))
+        output = subprocess.check_output([sys.executable, '-c', code],
+                                         universal_newlines=True)
+        self.assertEqual(output.strip(), '[]')
+
+
+class CleanBatchTestCase(unittest.TestCase):
+
+    def test_remove(self) -> None:
+        """Test removing a batch of files and directories"""
+        test = TestCmd.TestCmd(workdir='')
+        test.subdir('d', ['d', 'e'], ['d', 'e', 'f'], 'g')
+        batch = SCons.Script.Main.CleanBatch()
+        batch.batch_size = 2
+        for path in [['d', 'e', 'f', '1'], ['d', 'e', '2'], ['d', '3'], ['g', '4']]:
+            test.write(path, "")
+            self.assertTrue(batch.add(test.workpath(*path), os.path.join(*path)))
+        self.assertFalse(batch.add(test.workpath('d', '3'), 'd/3'))
+        # Added top-down, removed bottom-up.
+        for path in [['d'], ['d', 'e'], ['d', 'e', 'f']]:
+            self.assertTrue(batch.add(test.workpath(*path), os.path.join(*path), isdir=True))
+        batch.remove()
+        self.assertFalse(os.path.exists(test.workpath('d')))
+        self.assertEqual(os.listdir(test.workpath('g')), [])
+        self.assertEqual((batch.files, batch.dirs), ({}, {}))
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -40,7 +40,8 @@ SUPPRESS_HELP = optparse.SUPPRESS_HELP
 
 diskcheck_all = SCons.Node.FS.diskcheck_types()
 
-experimental_features = {'warp_speed', 'transporter', 'ninja', 'tm_v2'}
+experimental_features = {'warp_speed', 'transporter', 'ninja', 'tm_v2', 'tm_ready_queue', 'scan_ahead',
+                         'batch_clean'}
 
 
 def diskcheck_convert(value):
@@ -65,6 +66,29 @@ def diskcheck_convert(value):
     return result
 
 
+def mem_size_convert(value) -> int:
+    """Convert a memory size such as ``512M`` or ``2G`` to bytes.
+
+    A plain number is a count of bytes; the suffixes ``K``, ``M``,
+    ``G`` and ``T`` (optionally followed by ``B``, in either case)
+    multiply by powers of 1024.
+
+    Raises:
+        ValueError: *value* is not a valid, non-negative size.
+    """
+    s = str(value).strip().upper()
+    if s.endswith('B'):
+        s = s[:-1]
+    factor = 1
+    if s and s[-1] in 'KMGT':
+        factor = 1024 ** ('KMGT'.index(s[-1]) + 1)
+        s = s[:-1]
+    size = int(float(s) * factor)
+    if size < 0:
+        raise ValueError(value)
+    return size
+
+
 class SConsValues(optparse.Values):
     """
     Holder class for uniform access to SCons options, regardless
@@ -140,7 +164,9 @@ class SConsValues(optparse.Values):
         'implicit_deps_changed',
         'implicit_deps_unchanged',
         'max_drift',
+        'max_load',
         'md5_chunksize',
+        'min_free_mem',
         'no_exec',
         'no_progress',
         'num_jobs',
@@ -184,6 +210,18 @@ class SConsValues(optparse.Values):
             except ValueError:
                 raise SCons.Errors.UserError(
                     "An integer is required: %s" % repr(value))
+        elif name == 'max_load':
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise SCons.Errors.UserError(
+                    "A number is required: %s" % repr(value))
+        elif name == 'min_free_mem':
+            try:
+                value = mem_size_convert(value)
+            except ValueError:
+                raise SCons.Errors.UserError(
+                    "A memory size is required: %s" % repr(value))
         elif name == 'duplicate':
             try:
                 value = str(value)
@@ -699,7 +737,7 @@ def Parser(version):
     }
 
     debug_options = ["count", "duplicate", "explain", "findlibs",
-                     "includes", "memoizer", "memory", "objects",
+                     "includes", "memoizer", "memory", "memprofile", "objects",
                      "pdb", "prepare", "presub", "stacktrace",
                      "time", "action-timestamps", "json"]
 
@@ -891,11 +929,29 @@ def Parser(version):
                   help="Allow N jobs at once",
                   metavar="N")
 
+    jobserver_options = ["auto", "server", "none"]
+
+    opt_jobserver_help = "Controls GNU make jobserver use [%s]" \
+                         % ", ".join(jobserver_options)
+
+    op.add_option('--jobserver',
+                  nargs=1, choices=jobserver_options,
+                  dest="jobserver", default="auto",
+                  help=opt_jobserver_help,
+                  metavar="MODE")
+
     op.add_option('-k', '--keep-going',
                   dest='keep_going', default=False,
                   action="store_true",
                   help="Keep going when a target can't be made")
 
+    op.add_option('-l', '--load-average', '--max-load',
+                  nargs=1, type="float",
+                  dest='max_load', default=None,
+                  action="store",
+                  help="Don't start new jobs while the load average is at least N",
+                  metavar="N")
+
     op.add_option('--max-drift',
                   nargs=1, type="int",
                   dest='max_drift', default=SCons.Node.FS.default_max_drift,
@@ -903,6 +959,20 @@ def Parser(version):
                   help="Set maximum system clock drift to N seconds",
                   metavar="N")
 
+    def opt_min_free_mem(option, opt, value, parser):
+        try:
+            size = mem_size_convert(value)
+        except ValueError:
+            raise OptionValueError("`%s' is not a valid memory size" % value)
+        setattr(parser.values, option.dest, size)
+
+    op.add_option('--min-free-mem',
+                  nargs=1, type="string",
+                  dest='min_free_mem', default=None,
+                  action="callback", callback=opt_min_free_mem,
+                  help="Don't start new jobs while less than SIZE memory is free",
+                  metavar="SIZE")
+
     op.add_option('-n', '--no-exec', '--just-print', '--dry-run', '--recon',
                   dest='no_exec', default=False,
                   action="store_true",
@@ -961,7 +1031,7 @@ def Parser(version):
                   help="Trace Node evaluation to FILE",
                   metavar="FILE")
 
-    tree_options = ["all", "derived", "prune", "status", "linedraw"]
+    tree_options = ["all", "derived", "prune", "status", "linedraw", "json"]
 
     def opt_tree(option, opt, value, parser, tree_options=tree_options):
         tp = Main.TreePrinter()
@@ -976,6 +1046,8 @@ def Parser(version):
                 tp.status = True
             elif o == 'linedraw':
                 tp.sLineDraw = True
+            elif o == 'json':
+                tp.json = True
             else:
                 raise OptionValueError(opt_invalid('--tree', o, tree_options))
         parser.values.tree_printers.append(tp)
@@ -1037,14 +1109,6 @@ def Parser(version):
         msg = "Warning:  the %s option is not yet implemented\n" % opt
         sys.stderr.write(msg)
 
-    op.add_option('-l', '--load-average', '--max-load',
-                  nargs=1, type="float",
-                  dest="load_average", default=0,
-                  action="callback", callback=opt_not_yet,
-                  # action="store",
-                  # help="Don't start multiple jobs unless load is below "
-                  #      "LOAD-AVERAGE"
-                  help=SUPPRESS_HELP)
     op.add_option('--list-actions',
                   dest="list_actions",
                   action="callback", callback=opt_not_yet,
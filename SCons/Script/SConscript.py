@@ -206,6 +206,8 @@ def _SConscript(fs, *files, **kw):
                 # tree to make sure the os's cwd and the cwd of
                 # fs match so we can open the SConscript.
                 fs.chdir(top, change_os_dir=True)
+                if isinstance(f, SCons.Node.FS.File):
+                    f.duplicate_lazy()
                 if f.rexists():
                     actual = f.rfile()
                     _file_ = open(actual.get_abspath(), "rb")
@@ -565,9 +567,10 @@ class SConsEnvironment(SCons.Environment.Base):
               called script(s) can import.
             variant_dir (str): mirror sources needed for the build in
              a variant directory to allow building in it.
-            duplicate (bool): physically duplicate sources instead of just
-              adjusting paths of derived files (used only with 'variant_dir')
-              (default is True).
+            duplicate (bool or str): physically duplicate sources instead of
+              just adjusting paths of derived files, or ``'lazy'`` to duplicate
+              each one only when an action is about to use it (used only with
+              'variant_dir') (default is True).
             must_exist (bool): fail if a requested script is missing
               (default is False, default is deprecated).
 
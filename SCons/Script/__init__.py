@@ -341,6 +341,7 @@ GlobalDefaultEnvironmentFunctions = [
     'PyPackageDir',
     'Repository',
     'Requires',
+    'ResourcePool',
     'SConsignFile',
     'SideEffect',
     'Split',
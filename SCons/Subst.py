@@ -25,7 +25,6 @@
 
 import collections
 import re
-from inspect import signature, Parameter
 
 import SCons.Errors
 from SCons.Util import is_String, is_Sequence
@@ -326,6 +325,19 @@ def subst_dict(target, source):
 
 _callable_args_set = {'target', 'source', 'env', 'for_signature'}
 
+
+def _has_subst_args(func) -> bool:
+    """Return whether *func* is to be called with the substitution arguments.
+
+    That is, whether the only parameters it needs values for are
+    *target*, *source*, *env* and *for_signature*.
+    """
+    # inspect is slow to import, and not needed by many runs.
+    from inspect import signature, Parameter
+
+    return {k for k, v in signature(func).parameters.items() if
+            k in _callable_args_set or v.default == Parameter.empty} == _callable_args_set
+
 class StringSubber:
     """A class to construct the results of a scons_subst() call.
 
@@ -422,8 +434,7 @@ class StringSubber:
             # string if called on, so we make an exception in this condition for Null class
             # Also allow callables where the only non default valued args match the expected defaults
             # this should also allow functools.partial's to work.
-            if isinstance(s, SCons.Util.Null) or {k for k, v in signature(s).parameters.items() if
-                                                  k in _callable_args_set or v.default == Parameter.empty} == _callable_args_set:
+            if isinstance(s, SCons.Util.Null) or _has_subst_args(s):
 
                 s = s(target=lvars['TARGETS'],
                      source=lvars['SOURCES'],
@@ -599,8 +610,7 @@ class ListSubber(collections.UserList):
             # string if called on, so we make an exception in this condition for Null class
             # Also allow callables where the only non default valued args match the expected defaults
             # this should also allow functools.partial's to work.
-            if isinstance(s, SCons.Util.Null) or {k for k, v in signature(s).parameters.items() if
-                                                  k in _callable_args_set or v.default == Parameter.empty} == _callable_args_set:
+            if isinstance(s, SCons.Util.Null) or _has_subst_args(s):
 
                 s = s(target=lvars['TARGETS'],
                      source=lvars['SOURCES'],
@@ -29,15 +29,18 @@ stop, and wait on jobs.
 
 import SCons.compat
 
-import logging
 import os
 import signal
+import stat
 import sys
 import threading
+import time
 
+from collections import deque
 from enum import Enum
 
 import SCons.Errors
+import SCons.Node
 import SCons.Warnings
 
 
@@ -65,6 +68,330 @@ class InterruptState:
         return self.interrupted
 
 
+# The sizes of the resource pools declared with env.ResourcePool(),
+# keyed by pool name.
+resource_pools = {}
+
+
+def add_resource_pool(name, size) -> None:
+    """Declare the resource pool *name*, allowing *size* concurrent tasks."""
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        size = 0
+    if size < 1:
+        raise SCons.Errors.UserError(
+            "Resource pool %s must have a size of at least 1" % repr(name))
+    resource_pools[name] = size
+
+
+class ResourcePools:
+    """Limits the number of tasks executing at once in each resource pool.
+
+    A parallel job asks :meth:`acquire` for each task that needs
+    executing.  If the task's pool is full, the task is held back and
+    the job goes on to dispatch other work; when a task of the pool
+    finishes, :meth:`release` moves the oldest held task of that pool to
+    the :attr:`ready` queue, from which the job takes it with
+    :meth:`next_ready` when it can start another task.  Tasks that are
+    not in a declared pool are not limited.
+
+    This class is not thread safe: calls are serialized by the job.
+    """
+
+    def __init__(self, sizes) -> None:
+        self.sizes = dict(sizes)
+        self.in_use = dict.fromkeys(self.sizes, 0)
+        self.held = {name: deque() for name in self.sizes}
+        self.running = {}
+        self.ready = deque()
+
+    def acquire(self, task) -> bool:
+        """Claim a slot for *task*, returning False if it is held back."""
+        if not self.sizes:
+            return True
+        get_resource_pool = getattr(task, 'get_resource_pool', None)
+        if get_resource_pool is None:
+            return True
+        pool = get_resource_pool()
+        if pool not in self.sizes:
+            return True
+        if self.in_use[pool] >= self.sizes[pool]:
+            self.held[pool].append(task)
+            return False
+        self.in_use[pool] += 1
+        self.running[task] = pool
+        return True
+
+    def release(self, task) -> None:
+        """Give back the slot held by *task*, readying a held task."""
+        pool = self.running.pop(task, None)
+        if pool is None:
+            return
+        held = self.held[pool]
+        if held:
+            task = held.popleft()
+            self.running[task] = pool
+            self.ready.append(task)
+        else:
+            self.in_use[pool] -= 1
+
+    def next_ready(self, taskmaster):
+        """Return the next task released from its pool, or None.
+
+        Once *taskmaster* has stopped the build, the held and ready
+        tasks are not started at all: they are dropped, and their
+        targets are given back to *taskmaster* as ones that will not be
+        built.
+        """
+        if taskmaster.stopped:
+            tasks = list(self.ready)
+            self.ready.clear()
+            for held in self.held.values():
+                tasks.extend(held)
+                held.clear()
+            for task in tasks:
+                pool = self.running.pop(task, None)
+                if pool is not None:
+                    self.in_use[pool] -= 1
+                taskmaster.will_not_build(task.targets)
+            return None
+        if self.ready:
+            return self.ready.popleft()
+        return None
+
+
+# Set from the --max-load and --min-free-mem options: parallel jobs do
+# not start new tasks while the load average is at least max_load, or
+# while less than min_free_mem bytes of memory are available.
+max_load = None
+min_free_mem = None
+
+
+def get_load_average():
+    """Return the one-minute load average, or None if unavailable."""
+    try:
+        return os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+
+
+def get_available_memory():
+    """Return the memory available to new processes in bytes, or None.
+
+    Uses ``MemAvailable`` from ``/proc/meminfo`` where there is one,
+    otherwise the count of free physical pages, if the system reports it.
+    """
+    try:
+        with open('/proc/meminfo', 'rb') as f:
+            for line in f:
+                if line.startswith(b'MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class LoadThrottle:
+    """Holds back new tasks while the system is busy or short of memory.
+
+    A parallel job asks :meth:`can_start` before starting each task
+    beyond the first one running.  The load average and the available
+    memory are sampled at most every :attr:`interval` seconds, so the
+    job count goes down while the machine is under pressure, and back
+    up to the ``-j`` limit as tasks finish once the pressure has gone.
+    A measure the system does not report does not limit anything.
+    """
+
+    interval = 0.25
+
+    def __init__(self, max_load=None, min_free_mem=None) -> None:
+        self.max_load = max_load
+        self.min_free_mem = min_free_mem
+        self.next_sample = 0.0
+        self.busy = False
+
+    def can_start(self, jobs) -> bool:
+        """Return whether a task may start while *jobs* tasks are running."""
+        if not jobs or (self.max_load is None and self.min_free_mem is None):
+            return True
+        now = time.monotonic()
+        if now >= self.next_sample:
+            self.next_sample = now + self.interval
+            self.busy = self._busy()
+        return not self.busy
+
+    def _busy(self) -> bool:
+        if self.max_load is not None:
+            load = get_load_average()
+            if load is not None and load >= self.max_load:
+                return True
+        if self.min_free_mem is not None:
+            mem = get_available_memory()
+            if mem is not None and mem < self.min_free_mem:
+                return True
+        return False
+
+
+class JobServer:
+    """A GNU make jobserver that parallel jobs take their job tokens from.
+
+    The jobserver is a pipe (or, from GNU make 4.4, a named fifo)
+    holding one byte per job that may run on top of the one job every
+    process in the build is allowed without a token.  A parallel job
+    calls :meth:`reserve` before starting each task beyond the first
+    one running, reading a token from the pipe if it holds too few, and
+    :meth:`trim` as tasks finish, writing back the tokens it no longer
+    needs.  Reads never block: when no token is free the job waits for
+    one of its own tasks to finish and then tries again.
+
+    An instance is either joined to the jobserver of a ``make`` that
+    started SCons (see :meth:`from_makeflags`) or made by SCons itself
+    for the commands it runs (see :meth:`create`).  In both cases
+    :meth:`makeflags` gives the ``MAKEFLAGS`` setting which lets a
+    ``make`` run by a build command share the same tokens.
+    """
+
+    def __init__(self, read_fd=None, write_fd=None, fifo=None, owned=False, jobs=None) -> None:
+        self.fifo = fifo
+        self.owned = owned
+        self.jobs = jobs
+        self.tokens = []
+        self.private_fd = None
+        if fifo is not None:
+            # Open the reading end first, so opening the writing end
+            # cannot fail for want of a reader.
+            self.private_fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+            read_fd = self.private_fd
+            write_fd = os.open(fifo, os.O_WRONLY)
+        else:
+            # Reading the pipe must not block, but setting O_NONBLOCK
+            # on it would also affect the other processes sharing it.
+            # Where possible, open it again to get a file description
+            # of our own.
+            try:
+                self.private_fd = os.open('/proc/self/fd/%d' % read_fd,
+                                          os.O_RDONLY | os.O_NONBLOCK)
+            except OSError:
+                pass
+        self.read_fd = read_fd
+        self.write_fd = write_fd
+
+    @classmethod
+    def from_makeflags(cls, makeflags):
+        """Join the jobserver described by a ``MAKEFLAGS`` value.
+
+        Returns None if *makeflags* names no jobserver, or if the one it
+        names cannot be used (for example because ``make`` did not pass
+        the pipe on because the recipe is not marked with ``+``, in which
+        case the descriptors may be closed or reused for other files).
+        """
+        if not makeflags or os.name != 'posix':
+            return None
+        auth = None
+        jobs = None
+        for flag in makeflags.split(' -- ')[0].split():
+            if flag.startswith(('--jobserver-auth=', '--jobserver-fds=')):
+                auth = flag.split('=', 1)[1]
+            elif flag.startswith('-j') and flag[2:].isdigit():
+                jobs = int(flag[2:])
+        if auth is None:
+            return None
+        try:
+            if auth.startswith('fifo:'):
+                return cls(fifo=auth[len('fifo:'):], jobs=jobs)
+            read_fd, write_fd = [int(fd) for fd in auth.split(',')]
+            for fd in (read_fd, write_fd):
+                if not stat.S_ISFIFO(os.fstat(fd).st_mode):
+                    raise ValueError("fd %d is not a pipe" % fd)
+        except (OSError, ValueError):
+            msg = "Jobserver %s from MAKEFLAGS is not available; " \
+                  "prefix the command running SCons with '+' in the " \
+                  "Makefile to share it." % auth
+            SCons.Warnings.warn(SCons.Warnings.SConsWarning, msg)
+            return None
+        return cls(read_fd, write_fd, jobs=jobs)
+
+    @classmethod
+    def create(cls, jobs):
+        """Make a jobserver allowing *jobs* jobs in all."""
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, b'+' * (jobs - 1))
+        return cls(read_fd, write_fd, owned=True, jobs=jobs)
+
+    def _read_token(self):
+        if self.private_fd is not None:
+            try:
+                return os.read(self.private_fd, 1)
+            except (BlockingIOError, InterruptedError):
+                return b''
+        # Without a private file description, check that a token is
+        # waiting first. Another process may take it in the meantime,
+        # in which case the read waits for that process to return one.
+        import select
+        if not select.select([self.read_fd], [], [], 0)[0]:
+            return b''
+        return os.read(self.read_fd, 1)
+
+    def reserve(self, jobs) -> bool:
+        """Take a token for another task if *jobs* tasks are running.
+
+        Returns False if no token is free.
+        """
+        if len(self.tokens) < jobs:
+            token = self._read_token()
+            if not token:
+                return False
+            self.tokens.append(token)
+        return True
+
+    def trim(self, jobs) -> None:
+        """Give back the tokens not needed to run *jobs* tasks."""
+        while len(self.tokens) > max(jobs - 1, 0):
+            os.write(self.write_fd, self.tokens.pop())
+
+    def pass_fds(self):
+        """Return the file descriptors commands must inherit, if any."""
+        if self.fifo is None:
+            return (self.read_fd, self.write_fd)
+        return ()
+
+    def makeflags(self, makeflags=None) -> str:
+        """Return *makeflags* extended to share the jobserver."""
+        makeflags = makeflags or ''
+        if '--jobserver-auth=' in makeflags:
+            return makeflags
+        if self.fifo is not None:
+            auth = 'fifo:' + self.fifo
+        else:
+            auth = '%d,%d' % (self.read_fd, self.write_fd)
+        flags = '--jobserver-auth=' + auth
+        if self.jobs:
+            flags = '-j%d %s' % (self.jobs, flags)
+        # Variable assignments come last, after a lone '--'.
+        head, sep, tail = makeflags.partition(' -- ')
+        return head.rstrip() + ' ' + flags + sep + tail
+
+    def close(self) -> None:
+        """Give back all tokens, and close the jobserver if we made it."""
+        self.trim(0)
+        if self.private_fd is not None:
+            os.close(self.private_fd)
+        if self.owned or self.fifo is not None:
+            if self.fifo is None:
+                os.close(self.read_fd)
+            os.close(self.write_fd)
+        self.private_fd = None
+
+
+# The jobserver parallel jobs take tokens from, if any: set up by
+# SCons.Script.Main from the --jobserver option.
+jobserver = None
+
+
 class Jobs:
     """An instance of this class initializes N jobs, and provides
     methods for starting, stopping, and waiting on all N jobs.
@@ -90,6 +417,7 @@ class Jobs:
         from SCons.Script import GetOption
 
         self.job = None
+        self.scan_ahead = None
         if num > 1:
             stack_size = explicit_stack_size
             if stack_size is None:
@@ -101,6 +429,9 @@ class Jobs:
                     self.job = NewParallel(taskmaster, num, stack_size)
                 else:
                     self.job = LegacyParallel(taskmaster, num, stack_size)
+                if 'scan_ahead' in experimental_option:
+                    self.scan_ahead = ScanAhead(num, stack_size)
+                    taskmaster.scan_ahead = self.scan_ahead
 
                 self.num_jobs = num
             except NameError:
@@ -122,6 +453,8 @@ class Jobs:
         try:
             self.job.start()
         finally:
+            if self.scan_ahead:
+                self.scan_ahead.close()
             postfunc()
             self._reset_sig_handler()
 
@@ -358,6 +691,104 @@ else:
                 worker.join(1.0)
             self.workers = []
 
+    class ScanAhead:
+        """Reads the sources of upcoming candidate Nodes ahead of time.
+
+        The Taskmaster scans a Node for implicit dependencies when it
+        takes the Node off its candidates list, while holding the lock
+        that serializes all access to it, so a cold build with many
+        headers spends much of its time reading them one at a time.
+        When children are put on the candidates list, the Taskmaster
+        passes them to :meth:`submit`, and worker threads then do the
+        costly part of scanning their sources (see
+        :meth:`SCons.Scanner.ScannerBase.prefetch`) without that lock.
+        The scan in the Taskmaster picks up what has been read, and
+        does the rest itself as before, so the results are the same.
+
+        The requests are served newest first, the same order the
+        candidates list is worked through.
+
+        Enabled with ``--experimental=scan_ahead``.
+        """
+
+        def __init__(self, num, stack_size) -> None:
+            self.requests = queue.LifoQueue(0)
+            self.submitted = set()
+            self.workers = []
+            try:
+                prev_size = threading.stack_size(stack_size * 1024)
+            except (AttributeError, ValueError):
+                # The job has already warned about it.
+                prev_size = None
+            for _ in range(num):
+                worker = threading.Thread(target=self._work)
+                worker.daemon = True
+                worker.start()
+                self.workers.append(worker)
+            if prev_size is not None:
+                threading.stack_size(prev_size)
+
+        def _work(self) -> None:
+            while True:
+                request = self.requests.get()
+                if request is None:
+                    break
+                try:
+                    request()
+                except Exception:
+                    # Reading ahead is only an optimization: the
+                    # Taskmaster's own scan reports any problem.
+                    pass
+
+        def submit(self, nodes) -> None:
+            """Queue the sources of *nodes* to be read ahead."""
+            for node in nodes:
+                if node in self.submitted:
+                    continue
+                self.submitted.add(node)
+                try:
+                    requests = self._requests(node)
+                except Exception:
+                    continue
+                for request in requests:
+                    self.requests.put(request)
+
+        @staticmethod
+        def _requests(node) -> list:
+            """Return the read-ahead functions for the sources of *node*."""
+            if not node.has_builder() or node.implicit is not None:
+                return []
+            if ((SCons.Node.implicit_cache or node.get_depfile() is not None)
+                    and not SCons.Node.implicit_deps_changed
+                    and node.get_stored_implicit() is not None):
+                # Likely not scanned at all, see SCons.Node.Node.scan().
+                return []
+            executor = node.get_executor()
+            env = executor.get_build_env()
+            kw = executor.get_kw()
+            initial_scanner = node.builder.source_scanner
+            requests = []
+            for source in executor.get_all_sources():
+                source = source.disambiguate()
+                scanner = source._get_scanner(env, initial_scanner, None, kw)
+                if not scanner:
+                    continue
+                path = executor.get_build_scanner_path(scanner)
+                request = scanner.prefetch(source, path)
+                if request is not None:
+                    requests.append(request)
+            return requests
+
+        def close(self) -> None:
+            """Stops the worker threads, dropping the requests left."""
+            # The queue is last in, first out, so the workers take the
+            # sentinels before anything still waiting.
+            for _ in self.workers:
+                self.requests.put(None)
+            for worker in self.workers:
+                worker.join(1.0)
+            self.workers = []
+
     class LegacyParallel:
         """This class is used to execute tasks in parallel, and is somewhat
         less efficient than Serial, but is appropriate for parallel builds.
@@ -383,6 +814,9 @@ else:
             self.taskmaster = taskmaster
             self.interrupted = InterruptState()
             self.tp = ThreadPool(num, stack_size, self.interrupted)
+            self.pools = ResourcePools(resource_pools)
+            self.throttle = LoadThrottle(max_load, min_free_mem)
+            self.jobserver = jobserver
 
             self.maxjobs = num
 
@@ -398,6 +832,20 @@ else:
                 # Start up as many available tasks as we're
                 # allowed to.
                 while jobs < self.maxjobs:
+                    if not self.throttle.can_start(jobs):
+                        break
+                    if self.jobserver and not self.jobserver.reserve(jobs):
+                        break
+
+                    # Tasks held back for a resource pool slot that
+                    # has since been released go first.  They have
+                    # already been prepared.
+                    task = self.pools.next_ready(self.taskmaster)
+                    if task is not None:
+                        self.tp.put(task)
+                        jobs += 1
+                        continue
+
                     task = self.taskmaster.next_task()
                     if task is None:
                         break
@@ -411,13 +859,18 @@ else:
                         task.postprocess()
                     else:
                         if task.needs_execute():
-                            # dispatch task
-                            self.tp.put(task)
-                            jobs += 1
+                            # dispatch task, unless its resource
+                            # pool is full
+                            if self.pools.acquire(task):
+                                self.tp.put(task)
+                                jobs += 1
                         else:
                             task.executed()
                             task.postprocess()
 
+                if self.jobserver:
+                    self.jobserver.trim(jobs)
+
                 if not task and not jobs:
                     break
 
@@ -443,9 +896,16 @@ else:
 
                     task.postprocess()
 
+                    # Ready the task held back for the pool slot this
+                    # one has given up, if any.
+                    self.pools.release(task)
+
                     if self.tp.resultsQueue.empty():
                         break
 
+                if self.jobserver:
+                    self.jobserver.trim(jobs)
+
             self.tp.cleanup()
             self.taskmaster.cleanup()
 
@@ -475,6 +935,11 @@ else:
             self.interrupted = InterruptState()
             self.workers = []
 
+            # Guarded under `tm_lock`.
+            self.pools = ResourcePools(resource_pools)
+            self.throttle = LoadThrottle(max_load, min_free_mem)
+            self.jobserver = jobserver
+
             # The `tm_lock` is what ensures that we only have one
             # thread interacting with the taskmaster at a time. It
             # also protects access to our state that gets updated
@@ -502,6 +967,8 @@ else:
                 self.trace = False
 
         def _setup_logging(self):
+            import logging
+
             jl = logging.getLogger("Job")
             jl.setLevel(level=logging.DEBUG)
             jl.addHandler(self.taskmaster.trace.log_handler)
@@ -630,6 +1097,7 @@ else:
                             rtask.failed()
 
                         rtask.postprocess()
+                        self.pools.release(rtask)
                         self.jobs -= 1
 
                     # We are done with any task objects that were in
@@ -642,6 +1110,38 @@ else:
                     # until results arrive if jobs are pending, or
                     # mark the walk as complete if not.
                     while self.state == NewParallel.State.SEARCHING:
+                        # Every task beyond the first needs a token
+                        # from the jobserver, if there is one. If
+                        # none is free, stall until one of our jobs
+                        # completes and then try again.
+                        if self.jobserver and not self.jobserver.reserve(self.jobs):
+                            if self.trace:
+                                self.trace_message("No jobserver token: marking stalled")
+                            self.state = NewParallel.State.STALLED
+                            continue
+
+                        # Don't start more work while the system is
+                        # under pressure. There are jobs outstanding,
+                        # so stall until one of them completes and
+                        # then take another look.
+                        if not self.throttle.can_start(self.jobs):
+                            if self.trace:
+                                self.trace_message("System is busy: marking stalled")
+                            self.state = NewParallel.State.STALLED
+                            continue
+
+                        # Tasks held back for a resource pool slot
+                        # that has since been released go first.
+                        # They have already been prepared.
+                        task = self.pools.next_ready(self.taskmaster)
+                        if task is not None:
+                            self.jobs += 1
+                            if self.trace:
+                                self.trace_message("Found task released from its resource pool")
+                            self.state = NewParallel.State.READY
+                            self.can_search_cv.notify()
+                            continue
+
                         if self.trace:
                             self.trace_message("Searching for new tasks")
                         task = self.taskmaster.next_task()
@@ -667,6 +1167,10 @@ else:
                                         self.trace_message("Found internal task")
                                     task.executed()
                                     task.postprocess()
+                                elif not self.pools.acquire(task):
+                                    if self.trace:
+                                        self.trace_message("Holding back task: resource pool is full")
+                                    task = None
                                 else:
                                     self.jobs += 1
                                     if self.trace:
@@ -706,6 +1210,10 @@ else:
                                 self.state = NewParallel.State.COMPLETED
                                 self.can_search_cv.notify_all()
 
+                    # Give back the jobserver tokens we no longer need.
+                    if self.jobserver:
+                        self.jobserver.trim(self.jobs)
+
                 # We no longer hold `tm_lock` here. If we have a task,
                 # we can now execute it. If there are threads waiting
                 # to search, one of them can now begin turning the
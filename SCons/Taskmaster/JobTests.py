@@ -25,8 +25,11 @@ import unittest
 import random
 import math
 import os
+import tempfile
 
+import SCons.Errors
 import SCons.Taskmaster.Job
+import SCons.Warnings
 from SCons.Script.Main import OptionsParser
 
 
@@ -81,6 +84,7 @@ class Task:
     def __init__(self, i, taskmaster) -> None:
         self.i = i
         self.taskmaster = taskmaster
+        self.targets = [i]
         self.was_executed = 0
         self.was_prepared = 0
 
@@ -199,6 +203,7 @@ class Taskmaster:
         self.num_executed = 0
         self.num_failed = 0
         self.num_postprocessed = 0
+        self.not_built = []
         self.parallel_list = [0] * (n+1)
         self.found_parallel = False
         self.Task = Task
@@ -236,6 +241,13 @@ class Taskmaster:
         """analyze the task order to see if they were serial"""
         return not self.found_parallel
 
+    @property
+    def stopped(self) -> bool:
+        return bool(self.stop)
+
+    def will_not_build(self, nodes) -> None:
+        self.not_built.extend(nodes)
+
     def exception_set(self) -> None:
         pass
 
@@ -412,6 +424,245 @@ class ParallelExceptionTestCase(JobTestCase):
         self.assertTrue(taskmaster.num_postprocessed >= 1,
                     "one or more tasks should have been postprocessed")
 
+class PoolTask(Task):
+    """A task that every other time runs in the 'link' resource pool."""
+
+    def get_resource_pool(self):
+        if self.i % 2:
+            return 'link'
+        return None
+
+    def _do_something(self) -> None:
+        tm = self.taskmaster
+        pool = self.get_resource_pool()
+        with tm.guard:
+            tm.running[pool] = tm.running.get(pool, 0) + 1
+            tm.max_running[pool] = max(tm.max_running.get(pool, 0),
+                                       tm.running[pool])
+        time.sleep(0.02)
+        with tm.guard:
+            tm.running[pool] -= 1
+
+class FailingPoolTask(Task):
+    """A task in the 'link' resource pool; the first one fails."""
+
+    def get_resource_pool(self):
+        return 'link'
+
+    def _do_something(self) -> None:
+        time.sleep(0.05)
+        if self.i == 1:
+            raise Exception("failed")
+
+class ResourcePoolTestCase(JobTestCase):
+
+    def _test_pools(self) -> None:
+        taskmaster = Taskmaster(num_tasks, self, PoolTask)
+        taskmaster.running = {}
+        taskmaster.max_running = {}
+        taskmaster.trace = None
+        jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
+        jobs.run()
+
+        self.assertTrue(taskmaster.all_tasks_are_executed(),
+                        "all the tasks were not executed")
+        self.assertTrue(taskmaster.all_tasks_are_postprocessed(),
+                        "all the tasks were not postprocessed")
+        self.assertEqual(taskmaster.max_running['link'], 2,
+                         "the resource pool limit was not honored")
+        self.assertTrue(taskmaster.max_running[None] > 2,
+                        "tasks outside the pool were not run in parallel")
+
+    def _test_stop(self) -> None:
+        taskmaster = Taskmaster(5, self, FailingPoolTask)
+        taskmaster.trace = None
+        jobs = SCons.Taskmaster.Job.Jobs(4, taskmaster)
+        jobs.run()
+
+        self.assertEqual(taskmaster.begin_list, [1],
+                         "a held task was started after the build stopped")
+        self.assertEqual(taskmaster.num_failed, 1)
+        self.assertEqual(sorted(taskmaster.not_built), [2, 3, 4, 5],
+                         "the held tasks were not given back")
+
+    def runTest(self) -> None:
+        """test that parallel jobs honor resource pools"""
+        save_pools = SCons.Taskmaster.Job.resource_pools.copy()
+        try:
+            SCons.Taskmaster.Job.add_resource_pool('link', 2)
+            self._test_pools()
+            SCons.Taskmaster.Job.add_resource_pool('link', 1)
+            self._test_stop()
+
+            SCons.Taskmaster.Job.add_resource_pool('link', 2)
+            OptionsParser.values.experimental = ['tm_v2']
+            self._test_pools()
+            SCons.Taskmaster.Job.add_resource_pool('link', 1)
+            self._test_stop()
+
+            with self.assertRaises(SCons.Errors.UserError):
+                SCons.Taskmaster.Job.add_resource_pool('link', 0)
+        finally:
+            SCons.Taskmaster.Job.resource_pools.clear()
+            SCons.Taskmaster.Job.resource_pools.update(save_pools)
+
+class LoadThrottleTestCase(JobTestCase):
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.load = 0.0
+        self.mem = 8 * 1024 ** 3
+        self.save = (SCons.Taskmaster.Job.get_load_average,
+                     SCons.Taskmaster.Job.get_available_memory)
+        SCons.Taskmaster.Job.get_load_average = lambda: self.load
+        SCons.Taskmaster.Job.get_available_memory = lambda: self.mem
+
+    def tearDown(self) -> None:
+        (SCons.Taskmaster.Job.get_load_average,
+         SCons.Taskmaster.Job.get_available_memory) = self.save
+        SCons.Taskmaster.Job.max_load = None
+        SCons.Taskmaster.Job.min_free_mem = None
+
+    def test_can_start(self) -> None:
+        """test the load and memory limits of LoadThrottle"""
+        throttle = SCons.Taskmaster.Job.LoadThrottle(max_load=4)
+        throttle.interval = 0
+        self.assertTrue(throttle.can_start(3))
+        self.load = 4.0
+        self.assertFalse(throttle.can_start(3))
+        self.assertTrue(throttle.can_start(0),
+                        "the first job was held back")
+        self.load = 1.5
+        self.assertTrue(throttle.can_start(3))
+
+        throttle = SCons.Taskmaster.Job.LoadThrottle(min_free_mem=1024 ** 3)
+        throttle.interval = 0
+        self.assertTrue(throttle.can_start(1))
+        self.mem = 1024 ** 2
+        self.assertFalse(throttle.can_start(1))
+        self.mem = None
+        self.assertTrue(throttle.can_start(1),
+                        "unknown memory held back a job")
+
+    def test_interval(self) -> None:
+        """test that LoadThrottle samples at most once per interval"""
+        throttle = SCons.Taskmaster.Job.LoadThrottle(max_load=4)
+        throttle.interval = 3600
+        self.assertTrue(throttle.can_start(1))
+        self.load = 10.0
+        self.assertTrue(throttle.can_start(1))
+
+    def test_parallel(self) -> None:
+        """test that parallel jobs run one task at a time under load"""
+        self.load = 100.0
+        SCons.Taskmaster.Job.max_load = 1
+        for experimental in ([], ['tm_v2']):
+            OptionsParser.values.experimental = experimental
+            taskmaster = Taskmaster(20, self, RandomTask)
+            taskmaster.trace = None
+            jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
+            jobs.run()
+
+            self.assertTrue(taskmaster.tasks_were_serial(),
+                            "the tasks were executed in parallel")
+            self.assertTrue(taskmaster.all_tasks_are_executed(),
+                            "all the tests were not executed")
+            self.assertTrue(taskmaster.all_tasks_are_postprocessed(),
+                            "all the tests were not postprocessed")
+
+
+@unittest.skipIf(os.name != 'posix', "jobservers are only supported on POSIX")
+class JobServerTestCase(JobTestCase):
+
+    def tearDown(self) -> None:
+        SCons.Taskmaster.Job.jobserver = None
+
+    def test_reserve_trim(self) -> None:
+        """test taking and giving back JobServer tokens"""
+        jobserver = SCons.Taskmaster.Job.JobServer.create(3)
+        try:
+            self.assertTrue(jobserver.reserve(0))
+            self.assertEqual(jobserver.tokens, [])
+            self.assertTrue(jobserver.reserve(1))
+            self.assertTrue(jobserver.reserve(2))
+            self.assertEqual(len(jobserver.tokens), 2)
+            self.assertFalse(jobserver.reserve(3),
+                             "took more tokens than the jobserver holds")
+            jobserver.trim(2)
+            self.assertEqual(len(jobserver.tokens), 1)
+            jobserver.trim(0)
+            self.assertEqual(jobserver.tokens, [])
+            self.assertTrue(jobserver.reserve(2))
+        finally:
+            jobserver.close()
+
+    def test_from_makeflags(self) -> None:
+        """test joining a jobserver from MAKEFLAGS"""
+        JobServer = SCons.Taskmaster.Job.JobServer
+        self.assertIsNone(JobServer.from_makeflags(None))
+        self.assertIsNone(JobServer.from_makeflags(' -j4'))
+        read_fd, write_fd = os.pipe()
+        try:
+            for flag in ('--jobserver-auth', '--jobserver-fds'):
+                makeflags = ' -j4 %s=%d,%d -- CC=gcc' % (flag, read_fd, write_fd)
+                jobserver = JobServer.from_makeflags(makeflags)
+                self.assertEqual(jobserver.read_fd, read_fd)
+                self.assertEqual(jobserver.write_fd, write_fd)
+                self.assertEqual(jobserver.jobs, 4)
+                jobserver.close()
+                os.fstat(read_fd)
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
+
+        save = SCons.Warnings._warningOut
+        SCons.Warnings._warningOut = lambda warning: None
+        try:
+            self.assertIsNone(JobServer.from_makeflags(
+                ' -j4 --jobserver-auth=%d,%d' % (read_fd, write_fd)))
+            # Descriptors make did not pass on may be open on other files.
+            with tempfile.TemporaryFile() as f:
+                self.assertIsNone(JobServer.from_makeflags(
+                    ' -j4 --jobserver-auth=%d,%d' % (f.fileno(), f.fileno())))
+        finally:
+            SCons.Warnings._warningOut = save
+
+    def test_makeflags(self) -> None:
+        """test the MAKEFLAGS setting a JobServer gives commands"""
+        jobserver = SCons.Taskmaster.Job.JobServer.create(4)
+        try:
+            auth = '--jobserver-auth=%d,%d' % (jobserver.read_fd,
+                                                jobserver.write_fd)
+            self.assertEqual(jobserver.makeflags(), ' -j4 ' + auth)
+            self.assertEqual(jobserver.makeflags('k -- X=1'),
+                             'k -j4 %s -- X=1' % auth)
+            self.assertEqual(jobserver.makeflags(' ' + auth), ' ' + auth)
+            self.assertEqual(jobserver.pass_fds(),
+                             (jobserver.read_fd, jobserver.write_fd))
+        finally:
+            jobserver.close()
+
+    def test_parallel(self) -> None:
+        """test that parallel jobs run one task at a time with no tokens"""
+        for experimental in ([], ['tm_v2']):
+            OptionsParser.values.experimental = experimental
+            jobserver = SCons.Taskmaster.Job.JobServer.create(1)
+            SCons.Taskmaster.Job.jobserver = jobserver
+            try:
+                taskmaster = Taskmaster(20, self, RandomTask)
+                taskmaster.trace = None
+                jobs = SCons.Taskmaster.Job.Jobs(num_jobs, taskmaster)
+                jobs.run()
+            finally:
+                jobserver.close()
+
+            self.assertTrue(taskmaster.tasks_were_serial(),
+                            "the tasks were executed in parallel")
+            self.assertTrue(taskmaster.all_tasks_are_executed(),
+                            "all the tests were not executed")
+            self.assertTrue(taskmaster.all_tasks_are_postprocessed(),
+                            "all the tests were not postprocessed")
+
 #---------------------------------------------------------------------
 # Above tested Job object with contrived Task and Taskmaster objects.
 # Now test Job object with actual Task and Taskmaster objects.
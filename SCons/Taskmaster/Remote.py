@@ -0,0 +1,436 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""Remote execution of command actions.
+
+A command action whose construction environment sets
+``$REMOTE_EXECUTOR`` is not spawned locally, but handed to the
+:class:`RemoteExecutor` object in that variable as a *request*, a
+dictionary which can be sent as JSON::
+
+    {
+        'shell': '/bin/sh',
+        'commands': [['cc', '-c', '-o', 'foo.o', 'foo.c']],
+        'cwd': '.',
+        'env': {'PATH': '/usr/bin:/bin'},
+        'inputs': {'foo.c': ['<digest>', 0o644], 'foo.h': [...]},
+        'outputs': ['foo.o'],
+        'ignore_errors': False,
+    }
+
+The paths of inputs and outputs, and the directory to run the commands
+in, are relative to the top-level directory.  The inputs are all the
+files the targets depend on, and the files named on the command lines,
+identified by a hash of their contents.  Files outside the top-level
+directory named by absolute paths on the command lines, such as
+``$TEMPFILE`` response files, go under ``.scons_outside_top``, and the
+arguments naming them are rewritten to match.  Before making the
+request, the inputs are put in the executor's
+:class:`ContentStore`, from which the executor materializes them in a
+sandbox directory.  The executor runs the commands there, puts the
+outputs it finds in the store, and returns a *response*::
+
+    {
+        'status': 0,
+        'failed': None,
+        'stdout': '...',
+        'stderr': '...',
+        'outputs': {'foo.o': ['<digest>', 0o644]},
+    }
+
+where ``failed`` is the index of the command that failed, if any.  The
+outputs are then fetched from the store into place.
+
+:class:`LocalExecutor` is a stand-in for a pool of executor machines,
+running worker processes on the local machine which speak this protocol
+in JSON lines over a pipe.
+"""
+
+import atexit
+import json
+import os
+import queue
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+
+import SCons.Errors
+import SCons.Util
+
+
+class ContentStore:
+    """Files stored by a hash of their contents.
+
+    The file with digest *d* is kept as ``<path>/<d[:2]>/<d>``, and is
+    made read-only: it can be hard linked into place as an input, as
+    long as the commands reading it do not write to it.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = os.path.abspath(path)
+        os.makedirs(self.path, exist_ok=True)
+
+    def blob(self, digest) -> str:
+        """Return the file name of the stored file with *digest*."""
+        return os.path.join(self.path, digest[:2], digest)
+
+    def has(self, digest) -> bool:
+        return os.path.exists(self.blob(digest))
+
+    def put(self, fname, digest=None) -> str:
+        """Store the contents of *fname*, returning their digest.
+
+        If *digest* is given, it is taken to be the digest of the
+        contents, which need not be read if they are already stored.
+        """
+        if digest is None:
+            digest = SCons.Util.hash_file_signature(fname)
+        blob = self.blob(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob))
+            os.close(fd)
+            try:
+                shutil.copyfile(fname, tmp)
+                os.chmod(tmp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+                os.replace(tmp, blob)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        return digest
+
+    def get(self, digest, fname, mode=None, link: bool=False) -> None:
+        """Materialize the stored file with *digest* as *fname*.
+
+        The file is hard linked from the store if *link* is true and
+        it need not be writable or executable, otherwise copied.
+        """
+        blob = self.blob(digest)
+        if link and (mode is None or not mode & 0o333):
+            try:
+                os.link(blob, fname)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(blob, fname)
+        if mode is not None:
+            os.chmod(fname, mode)
+
+
+class RemoteExecutor(ABC):
+    """Runs the commands of actions somewhere other than here.
+
+    Subclasses implement :meth:`execute`, which is called from the
+    threads of a parallel build, and so must be thread safe.
+    """
+
+    def __init__(self, store) -> None:
+        self.store = store
+
+    @abstractmethod
+    def execute(self, request) -> dict:
+        """Run the commands of *request*, returning the response."""
+        return
+
+    def close(self) -> None:
+        """Release any resources held by the executor."""
+        pass
+
+
+class LocalExecutor(RemoteExecutor):
+    """An executor running requests in worker processes on this machine.
+
+    Up to *workers* processes are started as they are needed, and each
+    runs one request at a time.  The content store is kept in the
+    directory *store*.
+    """
+
+    def __init__(self, workers=None, store='.scons_store') -> None:
+        super().__init__(ContentStore(store))
+        self.workers = workers or os.cpu_count() or 1
+        self.lock = threading.Lock()
+        self.idle = queue.Queue()
+        self.processes = []
+        atexit.register(self.close)
+
+    def _start_worker(self):
+        env = os.environ.copy()
+        engine = os.path.dirname(os.path.dirname(SCons.__file__))
+        env['PYTHONPATH'] = os.pathsep.join(
+            [engine] + [p for p in [env.get('PYTHONPATH')] if p])
+        return subprocess.Popen(
+            [sys.executable, '-m', 'SCons.Taskmaster.Remote', self.store.path],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env,
+            universal_newlines=True)
+
+    def _get_worker(self):
+        # The idle queue holds None in place of a worker that died, to
+        # wake a thread waiting for it so that it starts a new one.
+        while True:
+            try:
+                proc = self.idle.get_nowait()
+            except queue.Empty:
+                with self.lock:
+                    if len(self.processes) < self.workers:
+                        proc = self._start_worker()
+                        self.processes.append(proc)
+                        return proc
+                proc = self.idle.get()
+            if proc is not None:
+                return proc
+
+    def execute(self, request) -> dict:
+        proc = self._get_worker()
+        try:
+            proc.stdin.write(json.dumps(request) + '\n')
+            proc.stdin.flush()
+            line = proc.stdout.readline()
+            if not line:
+                raise OSError("executor process exited with status %s"
+                              % proc.wait())
+            response = json.loads(line)
+        except (OSError, ValueError) as e:
+            proc.kill()
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.wait()
+            with self.lock:
+                self.processes.remove(proc)
+            self.idle.put(None)
+            raise SCons.Errors.BuildError(errstr="Remote execution failed: %s" % e)
+        self.idle.put(proc)
+        return response
+
+    def close(self) -> None:
+        with self.lock:
+            processes, self.processes = self.processes, []
+        for proc in processes:
+            proc.stdin.close()
+            proc.wait()
+
+
+# Where files outside the top-level directory named on the command
+# lines are put in the sandbox.
+_OUTSIDE_TOP = '.scons_outside_top'
+
+
+def _absolute_arg(arg):
+    """Split *arg* into a prefix and the absolute path it names.
+
+    The path may follow a prefix: the ``@`` of a ``$TEMPFILE``
+    response file, an ``--option=`` or a single-letter option such as
+    ``-I``.  Returns the path as None if *arg* does not name one.
+    """
+    start = arg.find(os.sep)
+    if start == -1 or not (start == 0 or arg[start - 1] in '=@'
+                           or (arg[0] == '-' and start <= 2)):
+        return arg, None
+    return arg[:start], os.path.normpath(arg[start:])
+
+
+def _sandbox_path(fname, top) -> str:
+    """Return the path in the sandbox of the absolute path *fname*."""
+    path = os.path.relpath(fname, top)
+    if path == os.pardir or path.startswith(os.pardir + os.sep):
+        path = os.path.join(_OUTSIDE_TOP, fname.lstrip(os.sep))
+    return path
+
+
+def make_request(shell, cmd_lines, ENV, target, source, ignore, store):
+    """Return the request for running *cmd_lines* to build *target*.
+
+    The inputs are put in *store* on the way.  Returns None if the
+    commands cannot be run remotely: if a target is outside the
+    top-level directory, or the action runs outside it.
+    """
+    # pylint: disable=import-outside-toplevel
+    import SCons.Node.FS
+
+    if os.name != 'posix':
+        return None
+    top = SCons.Node.FS.get_default_fs().Top.get_abspath()
+    cwd = os.path.relpath(os.getcwd(), top)
+    if cwd == os.pardir or cwd.startswith(os.pardir + os.sep):
+        return None
+    outputs = [t.get_internal_path() for t in target]
+    if any(os.path.isabs(path) for path in outputs):
+        return None
+
+    # Files are read through absolute paths from here on, as another
+    # thread may change directory to run an action with chdir.
+    def add_input(path, digest=None, fname=None) -> None:
+        if fname is None:
+            fname = os.path.join(top, path)
+        inputs[path] = [store.put(fname, digest),
+                        stat.S_IMODE(os.stat(fname).st_mode)]
+
+    inputs = {}
+    for t in target:
+        for child in t.children():
+            if not isinstance(child, SCons.Node.FS.File):
+                continue
+            child = child.rfile()
+            path = child.get_internal_path()
+            if path in inputs or os.path.isabs(path) or not child.exists():
+                continue
+            add_input(path, child.get_csig())
+    # Files named on the command line, such as a script run by the
+    # command, are needed too, whether or not they are dependencies.
+    # Absolute paths are rewritten to their place in the sandbox,
+    # which for a file outside the top-level directory, such as a
+    # response file in a temporary directory, is under _OUTSIDE_TOP.
+    # The command itself is left alone, as the executor provides it.
+    commands = []
+    for line in cmd_lines:
+        command = [str(arg) for arg in line]
+        for i, arg in enumerate(command):
+            if i:
+                prefix, fname = _absolute_arg(arg)
+                if fname is not None:
+                    path = _sandbox_path(fname, top)
+                    if path not in inputs and os.path.isfile(fname):
+                        add_input(path, fname=fname)
+                    if path in inputs or not path.startswith(_OUTSIDE_TOP):
+                        command[i] = prefix + os.path.relpath(path, cwd)
+                    continue
+            path = os.path.normpath(os.path.join(cwd, arg))
+            if (path in inputs or os.path.isabs(arg)
+                    or path.startswith(os.pardir)
+                    or not os.path.isfile(os.path.join(top, path))):
+                continue
+            add_input(path)
+        commands.append(command)
+
+    return {
+        'shell': shell,
+        'commands': commands,
+        'cwd': cwd,
+        'env': ENV,
+        'inputs': inputs,
+        'outputs': outputs,
+        'ignore_errors': bool(ignore),
+    }
+
+
+def execute(executor, shell, cmd_lines, ENV, target, source, ignore):
+    """Run *cmd_lines* through *executor*.
+
+    Returns a tuple of the exit status and the command line that
+    failed, if any, or None if the commands have to be run locally.
+    """
+    # pylint: disable=import-outside-toplevel
+    import SCons.Node.FS
+
+    request = make_request(shell, cmd_lines, ENV, target, source,
+                           ignore, executor.store)
+    if request is None:
+        return None
+    response = executor.execute(request)
+    if response['stdout']:
+        sys.stdout.write(response['stdout'])
+    if response['stderr']:
+        sys.stderr.write(response['stderr'])
+    top = SCons.Node.FS.get_default_fs().Top.get_abspath()
+    for path, (digest, mode) in response['outputs'].items():
+        fname = os.path.join(top, path)
+        if os.path.lexists(fname):
+            os.unlink(fname)
+        executor.store.get(digest, fname, mode)
+    failed = response['failed']
+    if failed is None:
+        return response['status'], None
+    return response['status'], cmd_lines[failed]
+
+
+def run_request(store, request) -> dict:
+    """Run the commands of *request* in a sandbox, as an executor does."""
+    sandbox = tempfile.mkdtemp(prefix='scons-remote-')
+    try:
+        for path, (digest, mode) in request['inputs'].items():
+            fname = os.path.join(sandbox, path)
+            os.makedirs(os.path.dirname(fname), exist_ok=True)
+            store.get(digest, fname, mode, link=True)
+        for path in request['outputs']:
+            os.makedirs(os.path.dirname(os.path.join(sandbox, path)),
+                        exist_ok=True)
+        os.makedirs(os.path.join(sandbox, request['cwd']), exist_ok=True)
+
+        status = 0
+        failed = None
+        stdout = []
+        stderr = []
+        for i, line in enumerate(request['commands']):
+            proc = subprocess.run([request['shell'], '-c', ' '.join(line)],
+                                  cwd=os.path.join(sandbox, request['cwd']),
+                                  env=request['env'],
+                                  stdin=subprocess.DEVNULL,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE)
+            stdout.append(proc.stdout.decode(errors='surrogateescape'))
+            stderr.append(proc.stderr.decode(errors='surrogateescape'))
+            if proc.returncode and not request['ignore_errors']:
+                status = proc.returncode
+                failed = i
+                break
+
+        outputs = {}
+        for path in request['outputs']:
+            fname = os.path.join(sandbox, path)
+            if os.path.isfile(fname):
+                mode = stat.S_IMODE(os.stat(fname).st_mode)
+                outputs[path] = [store.put(fname), mode]
+        return {
+            'status': status,
+            'failed': failed,
+            'stdout': ''.join(stdout),
+            'stderr': ''.join(stderr),
+            'outputs': outputs,
+        }
+    finally:
+        shutil.rmtree(sandbox, ignore_errors=True)
+
+
+def serve(store_path) -> None:
+    """Run requests read from stdin, writing the responses to stdout.
+
+    This is the main loop of a :class:`LocalExecutor` worker process.
+    """
+    store = ContentStore(store_path)
+    for line in sys.stdin:
+        response = run_request(store, json.loads(line))
+        sys.stdout.write(json.dumps(response) + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1])
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
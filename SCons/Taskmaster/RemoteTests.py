@@ -0,0 +1,188 @@
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+import os
+import stat
+import threading
+import unittest
+
+import TestCmd
+
+import SCons.Errors
+import SCons.Taskmaster.Remote
+import SCons.Util
+from SCons.Taskmaster.Remote import ContentStore, LocalExecutor
+
+
+class ContentStoreTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.store = ContentStore(self.test.workpath('store'))
+
+    def test_put_get(self) -> None:
+        """Test storing and materializing files"""
+        self.test.write('f1', "f1\n")
+        digest = self.store.put(self.test.workpath('f1'))
+        assert digest == SCons.Util.hash_signature(b"f1\n"), digest
+        assert self.store.has(digest)
+        blob = self.store.blob(digest)
+        assert blob == os.path.join(self.store.path, digest[:2], digest), blob
+        assert not os.stat(blob).st_mode & stat.S_IWUSR, "blob is writable"
+
+        # Storing the same contents again leaves the blob alone.
+        assert self.store.put(self.test.workpath('f1'), digest) == digest
+
+        self.store.get(digest, self.test.workpath('f2'), 0o755)
+        assert self.test.read('f2', mode='r') == "f1\n"
+        assert stat.S_IMODE(os.stat(self.test.workpath('f2')).st_mode) == 0o755
+
+    @unittest.skipIf(not hasattr(os, 'link'), "no hard links")
+    def test_link(self) -> None:
+        """Test that read-only files are hard linked from the store"""
+        self.test.write('f1', "f1\n")
+        digest = self.store.put(self.test.workpath('f1'))
+        self.store.get(digest, self.test.workpath('f2'), 0o444, link=True)
+        assert os.path.samefile(self.test.workpath('f2'), self.store.blob(digest))
+        self.store.get(digest, self.test.workpath('f3'), 0o644, link=True)
+        assert not os.path.samefile(self.test.workpath('f3'), self.store.blob(digest))
+
+
+@unittest.skipIf(os.name != 'posix', "remote execution needs a POSIX shell")
+class RequestTestCase(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.test = TestCmd.TestCmd(workdir='')
+        self.store = ContentStore(self.test.workpath('store'))
+        self.test.write('in.txt', "in.txt\n")
+        self.digest = self.store.put(self.test.workpath('in.txt'))
+
+    def request(self, *commands, ignore_errors: bool=False):
+        return {
+            'shell': '/bin/sh',
+            'commands': [command.split() for command in commands],
+            'cwd': '.',
+            'env': {'PATH': os.environ['PATH']},
+            'inputs': {'sub/in.txt': [self.digest, 0o644]},
+            'outputs': ['out/out.txt', 'out/missing.txt'],
+            'ignore_errors': ignore_errors,
+        }
+
+    def test_run_request(self) -> None:
+        """Test running a request in a sandbox"""
+        request = self.request('cat sub/in.txt > out/out.txt',
+                               'echo done',
+                               'echo oops >&2')
+        response = SCons.Taskmaster.Remote.run_request(self.store, request)
+        assert response['status'] == 0, response
+        assert response['failed'] is None, response
+        assert response['stdout'] == "done\n", response
+        assert response['stderr'] == "oops\n", response
+        assert list(response['outputs']) == ['out/out.txt'], response
+        digest, mode = response['outputs']['out/out.txt']
+        assert digest == self.digest, response
+
+    def test_failure(self) -> None:
+        """Test a request whose commands fail"""
+        request = self.request('false', 'cat sub/in.txt > out/out.txt')
+        response = SCons.Taskmaster.Remote.run_request(self.store, request)
+        assert response['status'] == 1, response
+        assert response['failed'] == 0, response
+        assert response['outputs'] == {}, response
+
+        request = self.request('false', 'cat sub/in.txt > out/out.txt',
+                               ignore_errors=True)
+        response = SCons.Taskmaster.Remote.run_request(self.store, request)
+        assert response['status'] == 0, response
+        assert list(response['outputs']) == ['out/out.txt'], response
+
+    def test_LocalExecutor(self) -> None:
+        """Test running requests in LocalExecutor worker processes"""
+        executor = LocalExecutor(workers=2, store=self.store.path)
+        try:
+            responses = []
+            def run() -> None:
+                request = self.request('cat sub/in.txt > out/out.txt')
+                responses.append(executor.execute(request))
+            threads = [threading.Thread(target=run) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert len(responses) == 5, responses
+            for response in responses:
+                assert response['outputs']['out/out.txt'][0] == self.digest, response
+            assert len(executor.processes) <= 2, executor.processes
+        finally:
+            executor.close()
+        assert executor.processes == []
+
+    def test_LocalExecutor_failure(self) -> None:
+        """Test that a worker process dying is a build error"""
+        executor = LocalExecutor(workers=1, store=self.store.path)
+        try:
+            request = self.request('kill -9 $PPID')
+            self.assertRaises(SCons.Errors.BuildError, executor.execute, request)
+            assert executor.processes == []
+            response = executor.execute(self.request('echo again'))
+            assert response['stdout'] == "again\n", response
+        finally:
+            executor.close()
+
+    def test_absolute_arg(self) -> None:
+        """Test finding absolute paths in command-line arguments"""
+        absolute_arg = SCons.Taskmaster.Remote._absolute_arg
+        assert absolute_arg('/tmp/f.rsp') == ('', '/tmp/f.rsp')
+        assert absolute_arg('@/tmp/d/../f.rsp') == ('@', '/tmp/f.rsp')
+        assert absolute_arg('-@/tmp/f.rsp') == ('-@', '/tmp/f.rsp')
+        assert absolute_arg('-I/usr/include') == ('-I', '/usr/include')
+        assert absolute_arg('--out=/top/f.o') == ('--out=', '/top/f.o')
+        for arg in ['f.c', 'src/f.c', '-Isrc/include', 'out/bin/sh']:
+            assert absolute_arg(arg) == (arg, None), arg
+
+        sandbox_path = SCons.Taskmaster.Remote._sandbox_path
+        assert sandbox_path('/top/src/f.c', '/top') == 'src/f.c'
+        assert sandbox_path('/tmp/f.rsp', '/top') == \
+            '.scons_outside_top/tmp/f.rsp'
+        assert sandbox_path('/topper/f.c', '/top') == \
+            '.scons_outside_top/topper/f.c'
+
+    def test_RemoteExecutor_abstract(self) -> None:
+        """Test that an executor must implement execute()"""
+        RemoteExecutor = SCons.Taskmaster.Remote.RemoteExecutor
+        self.assertRaises(TypeError, RemoteExecutor, self.store)
+
+        class Incomplete(RemoteExecutor):
+            pass
+
+        self.assertRaises(TypeError, Incomplete, self.store)
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -1065,6 +1065,7 @@ class TaskmasterTestCase(unittest.TestCase):
         # but the actual call to built() happens in executed() only.
         # Like this, the binfo should still be intact after calling execute()...
         global cache_text
+        cache_text = []
 
         n1 = Node("n1")
         # Mark the node as being cached
@@ -1315,6 +1316,91 @@ Taskmaster: No candidate anymore.
         assert value == expect, "Expected taskmaster trace contents didn't match. See above"
 
 
+class ReadyQueueTaskmasterTestCase(TaskmasterTestCase):
+    """Run the Taskmaster tests against the ready-queue core."""
+
+    def setUp(self) -> None:
+        self.Taskmaster = SCons.Taskmaster.Taskmaster
+        SCons.Taskmaster.Taskmaster = SCons.Taskmaster.ReadyQueueTaskmaster
+
+    def tearDown(self) -> None:
+        SCons.Taskmaster.Taskmaster = self.Taskmaster
+
+    def test_ready_queue(self) -> None:
+        """Test that finished children queue their waiting parents"""
+        n1 = Node("n1")
+        n2 = Node("n2")
+        n3 = Node("n3", [n1, n2])
+        n4 = Node("n4", [n3])
+        tm = SCons.Taskmaster.ReadyQueueTaskmaster([n4])
+
+        t1 = tm.next_task()
+        assert t1.get_target() == n1, t1.get_target()
+        t2 = tm.next_task()
+        assert t2.get_target() == n2, t2.get_target()
+        assert tm.next_task() is None
+        assert n3.ref_count == 2, n3.ref_count
+        assert n4.ref_count == 1, n4.ref_count
+
+        t1.executed()
+        t1.postprocess()
+        assert tm.ready == [], tm.ready
+        t2.executed()
+        t2.postprocess()
+        assert tm.ready == [n3], tm.ready
+
+        t3 = tm.next_task()
+        assert t3.get_target() == n3, t3.get_target()
+        assert tm.ready == [], tm.ready
+        t3.executed()
+        t3.postprocess()
+        t4 = tm.next_task()
+        assert t4.get_target() == n4, t4.get_target()
+        t4.executed()
+        t4.postprocess()
+        assert tm.next_task() is None
+
+    def test_ready_queue_no_rewalk(self) -> None:
+        """Test that a queued parent is not walked again unless rescanned"""
+        class CountingNode(Node):
+            walked = 0
+
+            def children(self):
+                self.walked = self.walked + 1
+                return Node.children(self)
+
+        n1 = Node("n1")
+        n2 = CountingNode("n2", [n1])
+        n2.implicit = []
+        tm = SCons.Taskmaster.ReadyQueueTaskmaster([n2])
+
+        t = tm.next_task()
+        assert t.get_target() == n1, t.get_target()
+        assert n2.walked == 1, n2.walked
+        # An up-to-date child is not built, so n2 keeps its implicit deps.
+        t.executed_without_callbacks()
+        t.postprocess()
+        assert tm.ready == [n2], tm.ready
+        t = tm.next_task()
+        assert t.get_target() == n2, t.get_target()
+        assert n2.walked == 1, n2.walked
+
+        # A rebuilt child resets the implicit dependencies, which
+        # forces the children to be walked again.
+        n3 = Node("n3")
+        n4 = CountingNode("n4", [n3])
+        n4.implicit = []
+        tm = SCons.Taskmaster.ReadyQueueTaskmaster([n4])
+        t = tm.next_task()
+        assert t.get_target() == n3, t.get_target()
+        t.executed()
+        t.postprocess()
+        assert n4.implicit is None, n4.implicit
+        t = tm.next_task()
+        assert t.get_target() == n4, t.get_target()
+        assert n4.walked == 2, n4.walked
+
+
 if __name__ == "__main__":
     unittest.main()
 
@@ -50,7 +50,6 @@ import io
 import sys
 from abc import ABC, abstractmethod
 from itertools import chain
-import logging
 
 import SCons.Errors
 import SCons.Node
@@ -209,6 +208,18 @@ class Task(ABC):
         """
         return self.node
 
+    def get_resource_pool(self):
+        """Fetch the name of the resource pool this task's action runs in.
+
+        This is the value of the ``$RESOURCE_POOL`` construction variable
+        in the target's build environment, or None if it is not set.
+        """
+        env = self.node.get_executor().get_build_env()
+        pool = env.get('RESOURCE_POOL')
+        if not pool:
+            return None
+        return env.subst(pool)
+
     @abstractmethod
     def needs_execute(self):
         return
@@ -484,14 +495,14 @@ class Task(ABC):
                         s.waiting_parents = set()
                     for p in s.waiting_s_e:
                         if p.ref_count == 0:
-                            self.tm.candidates.append(p)
+                            self.tm.push_ready(p)
 
         for p, subtract in parents.items():
             p.ref_count = p.ref_count - subtract
             if T:
                 self.trace_message(p, 'adjusted parent ref count')
             if p.ref_count == 0:
-                self.tm.candidates.append(p)
+                self.tm.push_ready(p)
 
         for t in targets:
             t.postprocess()
@@ -620,6 +631,8 @@ class Taskmaster:
         self.message = None
         self.next_candidate = self.find_next_candidate
         self.pending_children = set()
+        self.stopped = False
+        self.scan_ahead = None
         self.trace = False
         self.configure_trace(trace)
 
@@ -635,6 +648,8 @@ class Taskmaster:
             self.trace = False
             return
 
+        import logging
+
         # TODO: May want to switch format to something like this.
         # log_format = (
         #     '%(relativeCreated)05dms'
@@ -712,6 +727,13 @@ class Taskmaster:
             node = self.candidates.pop()
         return node
 
+    def push_ready(self, node) -> None:
+        """
+        Puts back a Node whose last unfinished child (or side effect)
+        has just finished, so it can be evaluated again.
+        """
+        self.candidates.append(node)
+
     def no_next_candidate(self):
         """
         Stops Taskmaster processing by not returning a next candidate.
@@ -926,7 +948,10 @@ class Taskmaster:
             if children_not_visited:
                 if len(children_not_visited) > 1:
                     children_not_visited.reverse()
-                self.candidates.extend(self.order(children_not_visited))
+                children_not_visited = self.order(children_not_visited)
+                self.candidates.extend(children_not_visited)
+                if self.scan_ahead:
+                    self.scan_ahead.submit(children_not_visited)
 
             # if T and children_not_visited:
             #    self.trace.debug('     adding to candidates: %s' % map(str, children_not_visited))
@@ -1097,6 +1122,7 @@ class Taskmaster:
         Stops the current build completely.
         """
         self.next_candidate = self.no_next_candidate
+        self.stopped = True
 
     def cleanup(self):
         """
@@ -1127,6 +1153,207 @@ class Taskmaster:
 
         raise SCons.Errors.UserError(desc)
 
+class ReadyQueueTaskmaster(Taskmaster):
+    """
+    An alternate Taskmaster core driven by pending-children counts.
+
+    The classic core re-walks all of a Node's children every time it
+    is taken off the candidates list, including when it comes back
+    after the children it was waiting for have finished.  Here the
+    children of a Node are walked once, when it is first visited, to
+    count the ones it has to wait for (the Node's ``ref_count``);
+    :meth:`Task.postprocess` pushes the Node onto a separate ready queue
+    when that count drops to zero, and it is then dispatched without
+    looking at its children again.  That makes the dispatch cost
+    proportional to the number of edges in the graph.
+
+    Implicit dependencies discovered while building are still handled:
+    when a child is rebuilt, :meth:`SCons.Node.Node.built` clears the
+    cached implicit dependencies of the Nodes waiting for it, and such
+    a Node has its children re-scanned and re-counted when it comes off
+    the ready queue, waiting again if new unfinished children turn up.
+    The same happens to a Node that waited on a side-effect Node, since
+    that goes back to the no-state state without being built.
+
+    Enabled with ``--experimental=tm_ready_queue``.
+    """
+
+    def __init__(self, targets=[], tasker=None, order=None, trace=None) -> None:
+        super().__init__(targets, tasker, order, trace)
+        self.ready = []
+        self.rewalk = set()
+
+    def push_ready(self, node) -> None:
+        self.ready.append(node)
+
+    def find_next_candidate(self):
+        """
+        Returns the next Node from the ready queue, or failing that,
+        the next candidate Node as in the classic core.
+        """
+        try:
+            return self.ready.pop()
+        except IndexError:
+            return super().find_next_candidate()
+
+    def no_next_candidate(self):
+        if self.ready:
+            ready = self.ready
+            self.ready = []
+            self.will_not_build(ready)
+        return super().no_next_candidate()
+
+    def _find_next_ready_node(self):
+        """
+        Finds the next node that is ready to be built.
+
+        Unlike the classic core, a Node that has already been visited is
+        only examined again once it has no unfinished children left, and
+        its children are only walked again if its implicit dependencies
+        were cleared by a rebuilt child in the meantime.
+        """
+
+        self.ready_exc = None
+
+        T = self.trace
+        if T:
+            T.log_handler.stream.write('\n')  # Prefix message with new line. This is a hack
+            self.trace.debug('Looking for a node to evaluate')
+
+        while True:
+            node = self.next_candidate()
+            if node is None:
+                if T:
+                    self.trace.debug('No candidate anymore.')
+                return None
+
+            node = node.disambiguate()
+            state = node.get_state()
+
+            if CollectStats:
+                if not hasattr(node.attributes, 'stats'):
+                    node.attributes.stats = Stats()
+                    StatsNodes.append(node)
+                S = node.attributes.stats
+                S.considered = S.considered + 1
+            else:
+                S = None
+
+            if T:
+                self.trace.debug('    Considering node %s and its children:' % self.tm_trace_node(node))
+
+            if state == NODE_NO_STATE:
+                node.set_state(NODE_PENDING)
+                walk = True
+            elif state > NODE_PENDING:
+                if S: S.already_handled = S.already_handled + 1
+                if T:
+                    self.trace.debug('       already handled (executed)')
+                continue
+            elif node.ref_count:
+                # Visited, and still waiting on children: it goes on the
+                # ready queue when the last of them has finished.
+                if S: S.not_built = S.not_built + 1
+                if T:
+                    self.trace.debug('       still waiting on children')
+                continue
+            else:
+                # Visited, and no children left to wait for.  Only walk
+                # the children again if a rebuilt child reset our
+                # implicit dependencies, or it waited on a side effect.
+                walk = getattr(node, 'implicit', None) is None or node in self.rewalk
+                self.rewalk.discard(node)
+
+            executor = node.get_executor()
+
+            if walk:
+                try:
+                    children = executor.get_all_children()
+                except SystemExit:
+                    exc_value = sys.exc_info()[1]
+                    e = SCons.Errors.ExplicitExit(node, exc_value.code)
+                    self.ready_exc = (SCons.Errors.ExplicitExit, e)
+                    if T:
+                        self.trace.debug('       SystemExit')
+                    return node
+                except Exception as e:
+                    self.ready_exc = sys.exc_info()
+                    if S: S.problem = S.problem + 1
+                    if T:
+                        self.trace.debug('       exception %s while scanning children.' % e)
+                    return node
+
+                children_not_visited = []
+                children_pending = []
+                children_not_ready = []
+                children_failed = False
+
+                for child in chain(executor.get_all_prerequisites(), children):
+                    childstate = child.get_state()
+
+                    if T:
+                        self.trace.debug('       ' + self.tm_trace_node(child))
+
+                    if childstate <= NODE_EXECUTING:
+                        children_not_ready.append(child)
+                        if childstate == NODE_NO_STATE:
+                            children_not_visited.append(child)
+                        elif childstate == NODE_PENDING:
+                            children_pending.append(child)
+                    elif childstate == NODE_FAILED:
+                        children_failed = True
+
+                if children_not_visited:
+                    if len(children_not_visited) > 1:
+                        children_not_visited.reverse()
+                    children_not_visited = self.order(children_not_visited)
+                    self.candidates.extend(children_not_visited)
+                    if self.scan_ahead:
+                        self.scan_ahead.submit(children_not_visited)
+
+                if children_failed:
+                    for n in executor.get_action_targets():
+                        n.set_state(NODE_FAILED)
+
+                    if S: S.child_failed = S.child_failed + 1
+                    if T:
+                        self.trace.debug('****** %s' % self.tm_trace_node(node))
+                    continue
+
+                if children_not_ready:
+                    for child in children_not_ready:
+                        if S: S.not_built = S.not_built + 1
+                        node.ref_count = node.ref_count + child.add_to_waiting_parents(node)
+                        if T:
+                            self.trace.debug('     adjusted ref count: %s, child %s' %
+                                             (self.tm_trace_node(node), repr(str(child))))
+                        if child.side_effect:
+                            self.rewalk.add(node)
+                    if T:
+                        for pc in children_pending:
+                            self.trace.debug('       adding %s to the pending children set' %
+                                             self.tm_trace_node(pc))
+                    self.pending_children.update(children_pending)
+                    continue
+
+            # Skip this node if it has side-effects that are
+            # currently being built:
+            wait_side_effects = False
+            for se in executor.get_action_side_effects():
+                if se.get_state() == NODE_EXECUTING:
+                    se.add_to_waiting_s_e(node)
+                    wait_side_effects = True
+
+            if wait_side_effects:
+                if S: S.side_effects = S.side_effects + 1
+                continue
+
+            if S: S.build = S.build + 1
+            if T:
+                self.trace.debug('Evaluating %s' % self.tm_trace_node(node))
+
+            return node
+
 # Local Variables:
 # tab-width:4
 # indent-tabs-mode:nil
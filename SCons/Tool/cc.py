@@ -32,6 +32,11 @@ selection method.
 
 __revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
 
+import os.path
+import shutil
+
+import SCons.Action
+import SCons.Executor
 import SCons.Tool
 import SCons.Defaults
 import SCons.Util
@@ -46,7 +51,7 @@ def add_common_cc_variables(env) -> None:
     are used by multiple tools (specifically, c++).
     """
     if '_CCCOMCOM' not in env:
-        env['_CCCOMCOM'] = '$CPPFLAGS $_CPPDEFFLAGS $_CPPINCFLAGS'
+        env['_CCCOMCOM'] = '$CPPFLAGS $_CPPDEFFLAGS $_CPPINCFLAGS $_CCDEPFILEFLAGS'
         # It's a hack to test for darwin here, but the alternative
         # of creating an applecc.py to contain this seems overkill.
         # Maybe someday the Apple platform will require more setup and
@@ -56,12 +61,178 @@ def add_common_cc_variables(env) -> None:
         if env['PLATFORM'] == 'darwin':
             env['_CCCOMCOM'] = env['_CCCOMCOM'] + ' $_FRAMEWORKPATH'
 
+    if '_CCBATCHCOMCOM' not in env:
+        # Batched compiles run from the object directory, so the include
+        # path has to be spelled out with absolute directories.
+        env['_CC_BATCH_ABSPATHS'] = cc_batch_abspaths
+        env['_CC_BATCH_ABSDIRS'] = cc_batch_absdirs
+        env['_CC_BATCH_DIR'] = '${TARGET.dir.abspath}/.ccbatch-${TARGET.name}'
+        env['_CC_BATCH_INCFLAGS'] = '${_concat(INCPREFIX, CPPPATH, INCSUFFIX, __env__, _CC_BATCH_ABSDIRS, TARGET, SOURCE, affect_signature=False)}'
+        env['_CCBATCHCOMCOM'] = '$CPPFLAGS $_CPPDEFFLAGS $_CC_BATCH_INCFLAGS'
+        if env['PLATFORM'] == 'darwin':
+            env['_CCBATCHCOMCOM'] = env['_CCBATCHCOMCOM'] + ' $_FRAMEWORKPATH'
+
+    if '_CCDEPFILEFLAGS' not in env:
+        env['_cc_depfile_flags'] = cc_depfile_flags
+        env['_CCDEPFILEFLAGS'] = '${_cc_depfile_flags(__env__)}'
+
     if 'CCFLAGS' not in env:
         env['CCFLAGS']   = SCons.Util.CLVar('')
 
     if 'SHCCFLAGS' not in env:
         env['SHCCFLAGS'] = SCons.Util.CLVar('$CCFLAGS')
 
+def cc_depfile_flags(env) -> str:
+    """
+    Returns the options to have the compiler write $CCDEPFILE, if
+    implicit dependencies are taken from dependency files ($CC_DEPFILES).
+    The options do not change the object file, so they are left out
+    of the build signature.
+    """
+    if env.subst('$CC_DEPFILES') in ('0', 'False', '', None):
+        return ''
+    if not env.get('CCDEPFILE'):
+        return ''
+    return '$( $CCDEPFLAGS $)'
+
+def cc_batch_abspaths(nodes):
+    """
+    Returns the absolute paths of *nodes*, for use in command lines
+    that do not run from the top directory.
+    """
+    if SCons.Util.is_String(nodes):
+        return nodes
+    return [os.path.abspath(str(n)) for n in nodes]
+
+def cc_batch_absdirs(pathlist):
+    """Look up *pathlist* like ``RDirs`` does and return absolute paths."""
+    rdirs = SCons.Defaults.Variable_Method_Caller('TARGET', 'RDirs')(pathlist)
+    if rdirs is None:
+        rdirs = pathlist
+    return cc_batch_abspaths(rdirs)
+
+# The batch command lines start with "cd DIR &&", so batching is only
+# done when the commands are run by one of these shells.
+_posix_shells = ('sh', 'bash', 'dash', 'ksh', 'zsh')
+
+def cc_batchable(env, target, source, suffix) -> bool:
+    """
+    Returns whether target+source pairs may be compiled in a batch.
+
+    Batching is enabled by setting $CC_BATCH.  A batch runs the compiler
+    once with all out-of-date sources from inside a scratch directory,
+    and relies on the compiler's default output naming (``foo.c`` to
+    ``foo.o``), so any target that is not named after its source plus
+    the object suffix (*suffix*, the name of the variable holding it)
+    is compiled on its own.  So is everything while dependency files
+    are written ($CC_DEPFILES): a batch would only list the headers of
+    the sources it compiled, losing those of its up-to-date objects.
+    """
+    if env.subst('$CC_BATCH') in ('0', 'False', '', None):
+        return False
+    if cc_depfile_flags(env):
+        return False
+    if env['PLATFORM'] == 'win32':
+        return False
+    if os.path.basename(env.subst('$SHELL')) not in _posix_shells:
+        return False
+    if not target or len(target) != len(source):
+        return False
+    objsuffix = env.subst('$' + suffix)
+    for t, s in zip(target, source):
+        if t.name != os.path.splitext(s.name)[0] + objsuffix:
+            return False
+    return True
+
+def cc_batch_key(action, env, target, source):
+    """
+    Returns a key to identify unique batches of sources for compilation.
+
+    Sources built with the same action and environment into the same
+    directory share a batch, which is closed and a new one started once
+    the sources would use up half of $MAXLINELENGTH (leaving the rest
+    for the flags), or once it holds $CC_BATCH_SIZE sources, if set.
+    How full a batch is, is kept on its Executor.
+    """
+    t = target[0]
+    s = source[0]
+    base = (id(action), id(env), t.dir, os.path.splitext(s.name)[1])
+    try:
+        maxlength = int(env.subst('$MAXLINELENGTH')) // 2
+    except ValueError:
+        maxlength = 0
+    try:
+        maxcount = int(env.subst('$CC_BATCH_SIZE'))
+    except ValueError:
+        maxcount = 0
+    length = len(s.get_abspath()) + 1
+    chunk = 0
+    while True:
+        key = base + (chunk,)
+        try:
+            executor = SCons.Executor.GetBatchExecutor(key)
+        except KeyError:
+            # The Builder starts a new batch with this source.
+            return key
+        fill = executor.batch_fill
+        if fill is None:
+            sources = executor.get_all_sources()
+            fill = [len(sources), sum(len(n.get_abspath()) + 1 for n in sources)]
+            executor.batch_fill = fill
+        if not ((maxlength and fill[1] + length > maxlength)
+                or (maxcount and fill[0] >= maxcount)):
+            # The Builder adds this source to the batch.
+            fill[0] += 1
+            fill[1] += length
+            return key
+        chunk += 1
+
+def cc_batch_prepare(target, source, env) -> None:
+    """Creates the empty scratch directory a batch is compiled in."""
+    batch_dir = env.subst('$_CC_BATCH_DIR', target=target, source=source)
+    shutil.rmtree(batch_dir, ignore_errors=True)
+    os.makedirs(batch_dir)
+
+def cc_batch_finish(target, source, env) -> None:
+    """Moves the objects compiled in a batch to their target names."""
+    batch_dir = env.subst('$_CC_BATCH_DIR', target=target, source=source)
+    for t, s in zip(target, source):
+        obj = os.path.join(batch_dir, os.path.splitext(s.name)[0] + '.o')
+        if os.path.exists(obj):
+            os.replace(obj, t.get_abspath())
+    shutil.rmtree(batch_dir, ignore_errors=True)
+
+def batch_command_action(command, cmdstr):
+    """
+    Returns the action compiling a batch with the *command* line,
+    in a scratch directory whose objects are then moved into place.
+    """
+    action = SCons.Action.Action([
+        SCons.Action.Action(cc_batch_prepare, None),
+        SCons.Action.Action(command, cmdstr, targets='$CHANGED_TARGETS'),
+        SCons.Action.Action(cc_batch_finish, None),
+    ])
+    # Only the out-of-date targets of a batch are built.
+    action.targets = '$CHANGED_TARGETS'
+    SCons.Util.AddMethod(action, cc_batch_key, 'batch_key')
+    return action
+
+def batch_action(single, batch, suffix):
+    """
+    Returns an action that runs *batch* when :func:`cc_batchable`
+    allows it and *single* otherwise.
+    """
+    def generator(target, source, env, for_signature):
+        if cc_batchable(env, target, source, suffix):
+            return batch
+        return single
+    return SCons.Action.Action(generator, generator=1)
+
+CBatchAction = batch_command_action("$CCBATCHCOM", "$CCCOMSTR")
+ShCBatchAction = batch_command_action("$SHCCBATCHCOM", "$SHCCCOMSTR")
+CAction = batch_action(SCons.Defaults.CAction, CBatchAction, 'OBJSUFFIX')
+ShCAction = batch_action(SCons.Defaults.ShCAction, ShCBatchAction, 'SHOBJSUFFIX')
+
 compilers = ['cc']
 
 def generate(env) -> None:
@@ -71,8 +242,8 @@ def generate(env) -> None:
     static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
 
     for suffix in CSuffixes:
-        static_obj.add_action(suffix, SCons.Defaults.CAction)
-        shared_obj.add_action(suffix, SCons.Defaults.ShCAction)
+        static_obj.add_action(suffix, CAction)
+        shared_obj.add_action(suffix, ShCAction)
         static_obj.add_emitter(suffix, SCons.Defaults.StaticObjectEmitter)
         shared_obj.add_emitter(suffix, SCons.Defaults.SharedObjectEmitter)
 
@@ -85,6 +256,8 @@ def generate(env) -> None:
     env['SHCC']      = '$CC'
     env['SHCFLAGS'] = SCons.Util.CLVar('$CFLAGS')
     env['SHCCCOM']   = '$SHCC -o $TARGET -c $SHCFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCES'
+    env['CCBATCHCOM'] = '$( cd $_CC_BATCH_DIR && $)$CC -c $CFLAGS $CCFLAGS $_CCBATCHCOMCOM $( ${_CC_BATCH_ABSPATHS(CHANGED_SOURCES)} $)'
+    env['SHCCBATCHCOM'] = '$( cd $_CC_BATCH_DIR && $)$SHCC -c $SHCFLAGS $SHCCFLAGS $_CCBATCHCOMCOM $( ${_CC_BATCH_ABSPATHS(CHANGED_SOURCES)} $)'
 
     env['CPPDEFPREFIX']  = '-D'
     env['CPPDEFSUFFIX']  = ''
@@ -81,7 +81,8 @@ def generate(env) -> None:
         if match:
             env['CCVERSION'] = match.group(1)
 
-    env['CCDEPFLAGS'] = '-MMD -MF ${TARGET}.d'
+    env['CCDEPFILE'] = '${TARGET}.d'
+    env['CCDEPFLAGS'] = '-MMD -MF $CCDEPFILE'
     env["NINJA_DEPFILE_PARSE_FORMAT"] = 'clang'
 
 
@@ -89,7 +89,8 @@ def generate(env) -> None:
         if match:
             env['CXXVERSION'] = match.group(1)
 
-    env['CCDEPFLAGS'] = '-MMD -MF ${TARGET}.d'
+    env['CCDEPFILE'] = '${TARGET}.d'
+    env['CCDEPFLAGS'] = '-MMD -MF $CCDEPFILE'
     env["NINJA_DEPFILE_PARSE_FORMAT"] = 'clang'
 
 
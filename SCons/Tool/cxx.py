@@ -30,7 +30,9 @@ selection method.
 
 import os.path
 
+import SCons.Action
 import SCons.Defaults
+import SCons.Tool.cc
 import SCons.Util
 
 compilers = ['CC', 'c++']
@@ -50,18 +52,22 @@ def iscplusplus(source) -> int:
                 return 1
     return 0
 
+CXXBatchAction = SCons.Tool.cc.batch_command_action("$CXXBATCHCOM", "$CXXCOMSTR")
+ShCXXBatchAction = SCons.Tool.cc.batch_command_action("$SHCXXBATCHCOM", "$SHCXXCOMSTR")
+CXXAction = SCons.Tool.cc.batch_action(SCons.Defaults.CXXAction, CXXBatchAction, 'OBJSUFFIX')
+ShCXXAction = SCons.Tool.cc.batch_action(SCons.Defaults.ShCXXAction, ShCXXBatchAction, 'SHOBJSUFFIX')
+
 def generate(env) -> None:
     """
     Add Builders and construction variables for Visual Age C++ compilers
     to an Environment.
     """
     import SCons.Tool
-    import SCons.Tool.cc
     static_obj, shared_obj = SCons.Tool.createObjBuilders(env)
 
     for suffix in CXXSuffixes:
-        static_obj.add_action(suffix, SCons.Defaults.CXXAction)
-        shared_obj.add_action(suffix, SCons.Defaults.ShCXXAction)
+        static_obj.add_action(suffix, CXXAction)
+        shared_obj.add_action(suffix, ShCXXAction)
         static_obj.add_emitter(suffix, SCons.Defaults.StaticObjectEmitter)
         shared_obj.add_emitter(suffix, SCons.Defaults.SharedObjectEmitter)
 
@@ -74,6 +80,8 @@ def generate(env) -> None:
     env['SHCXX']      = '$CXX'
     env['SHCXXFLAGS'] = SCons.Util.CLVar('$CXXFLAGS')
     env['SHCXXCOM']   = '$SHCXX -o $TARGET -c $SHCXXFLAGS $SHCCFLAGS $_CCCOMCOM $SOURCES'
+    env['CXXBATCHCOM'] = '$( cd $_CC_BATCH_DIR && $)$CXX -c $CXXFLAGS $CCFLAGS $_CCBATCHCOMCOM $( ${_CC_BATCH_ABSPATHS(CHANGED_SOURCES)} $)'
+    env['SHCXXBATCHCOM'] = '$( cd $_CC_BATCH_DIR && $)$SHCXX -c $SHCXXFLAGS $SHCCFLAGS $_CCBATCHCOMCOM $( ${_CC_BATCH_ABSPATHS(CHANGED_SOURCES)} $)'
 
     env['CPPDEFPREFIX']  = '-D'
     env['CPPDEFSUFFIX']  = ''
@@ -57,7 +57,8 @@ def generate(env) -> None:
     if version:
         env['CCVERSION'] = version
 
-    env['CCDEPFLAGS'] = '-MMD -MF ${TARGET}.d'
+    env['CCDEPFILE'] = '${TARGET}.d'
+    env['CCDEPFLAGS'] = '-MMD -MF $CCDEPFILE'
     env["NINJA_DEPFILE_PARSE_FORMAT"] = 'gcc'
 
 
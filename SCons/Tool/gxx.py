@@ -64,7 +64,8 @@ def generate(env) -> None:
     if version:
         env['CXXVERSION'] = version
 
-    env['CCDEPFLAGS'] = '-MMD -MF ${TARGET}.d'
+    env['CCDEPFILE'] = '${TARGET}.d'
+    env['CCDEPFLAGS'] = '-MMD -MF $CCDEPFILE'
     env["NINJA_DEPFILE_PARSE_FORMAT"] = 'gcc'
 
 
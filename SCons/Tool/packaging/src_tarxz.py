@@ -29,12 +29,13 @@ The tarxz SRC packager.
 __revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
 
 from SCons.Tool.packaging import putintopackageroot
+from SCons.Tool.tar import package_overrides
 
 def package(env, target, source, PACKAGEROOT, **kw):
     bld = env['BUILDERS']['Tar']
     bld.set_suffix('.tar.xz')
     target, source = putintopackageroot(target, source, env, PACKAGEROOT, honor_install_location=0)
-    return bld(env, target, source, TARFLAGS='-Jc')
+    return bld(env, target, source, **package_overrides(env, 'xz', '-Jc'))
 
 # Local Variables:
 # tab-width:4
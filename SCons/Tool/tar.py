@@ -33,6 +33,8 @@ selection method.
 
 __revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
 
+import tarfile
+
 import SCons.Action
 import SCons.Builder
 import SCons.Defaults
@@ -43,6 +45,39 @@ tars = ['tar', 'gtar']
 
 TarAction = SCons.Action.Action('$TARCOM', '$TARCOMSTR')
 
+
+def tar_builder(target, source, env) -> None:
+    """Write a tar archive of the sources without running tar.
+
+    The archive is compressed as $TARCOMPRESSION says (``gz``, ``bz2``,
+    ``xz``, or nothing).  :mod:`tarfile` copies the data of each file
+    in chunks, straight into the compressor.
+    """
+    compression = env.subst('$TARCOMPRESSION')
+    with tarfile.open(str(target[0]), 'w:' + compression) as tf:
+        for s in source:
+            tf.add(str(s))
+
+
+tarfileAction = SCons.Action.Action(tar_builder, '$TARCOMSTR',
+                                    varlist=['TARCOMPRESSION'])
+
+_default_tarcom = '$TAR $TARFLAGS -f $TARGET $SOURCES'
+
+
+def package_overrides(env, compression, flags) -> dict:
+    """Return the overrides a tar packager builds its archive with.
+
+    While $TARCOM and $TARFLAGS are those this tool sets, the archive
+    is written with :data:`tarfileAction`, compressed as *compression*
+    says.  Otherwise the configured command is run with *flags*.
+    """
+    if (env.get('TARCOM') == _default_tarcom
+            and env.subst('$TARFLAGS') == '-c'):
+        return {'TARCOM': tarfileAction, 'TARCOMPRESSION': compression}
+    return {'TARFLAGS': flags}
+
+
 TarBuilder = SCons.Builder.Builder(action = TarAction,
                                    source_factory = SCons.Node.FS.Entry,
                                    source_scanner = SCons.Defaults.DirScanner,
@@ -60,7 +95,7 @@ def generate(env) -> None:
 
     env['TAR']        = env.Detect(tars) or 'gtar'
     env['TARFLAGS']   = SCons.Util.CLVar('-c')
-    env['TARCOM']     = '$TAR $TARFLAGS -f $TARGET $SOURCES'
+    env['TARCOM']     = _default_tarcom
     env['TARSUFFIX']  = '.tar'
 
 def exists(env):
@@ -31,7 +31,10 @@ selection method.
 # OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import collections
 import os
+import shutil
+import tempfile
 
 import SCons.Builder
 import SCons.Defaults
@@ -40,10 +43,16 @@ import SCons.Util
 
 import time
 import zipfile
+import zlib
 
 
 zip_compression = zipfile.ZIP_DEFLATED
 
+# File data is copied in chunks of this size, so archiving a large file
+# doesn't need memory for all of it.  Members compressed ahead of being
+# written are kept in memory up to this size, in a temporary file beyond.
+zip_chunk_size = 1024 * 1024
+
 
 def _create_zipinfo_for_file(fname, arcname, date_time, compression):
     st = os.stat(fname)
@@ -57,6 +66,63 @@ def _create_zipinfo_for_file(fname, arcname, date_time, compression):
     return zinfo
 
 
+def _compress_member(fname, zinfo):
+    """Deflate the contents of *fname* for the member *zinfo*.
+
+    Returns *zinfo*, updated with the CRC and sizes, and a file holding
+    the compressed data, the same as :mod:`zipfile` would write for it.
+    This runs in a worker thread; :mod:`zlib` releases the GIL while it
+    compresses.
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    data = tempfile.SpooledTemporaryFile(max_size=zip_chunk_size)
+    crc = 0
+    size = 0
+    with open(fname, 'rb') as f:
+        while True:
+            chunk = f.read(zip_chunk_size)
+            if not chunk:
+                break
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+            data.write(compressor.compress(chunk))
+    data.write(compressor.flush())
+    zinfo.CRC = crc
+    zinfo.file_size = size
+    zinfo.compress_size = data.tell()
+    data.seek(0)
+    return zinfo, data
+
+
+# The ZipFile internals _write_compressed relies on; the public API
+# has no way to add a member whose data is already compressed.
+_zipfile_internals = ('fp', 'filelist', 'NameToInfo', 'start_dir', '_writecheck')
+
+
+def _write_compressed(zf, zinfo, data) -> None:
+    """Add a member whose data has already been compressed to *zf*.
+
+    This does what :meth:`zipfile.ZipFile.write` does to add a
+    directory, with the compressed data following the header.
+    """
+    with data:
+        zinfo.header_offset = zf.fp.tell()
+        zf._writecheck(zinfo)
+        zf._didModify = True
+        zf.fp.write(zinfo.FileHeader())
+        shutil.copyfileobj(data, zf.fp, zip_chunk_size)
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.start_dir = zf.fp.tell()
+
+
+def _zip_jobs(env) -> int:
+    jobs = env.get('ZIP_JOBS')
+    if jobs is None:
+        return 1
+    return max(int(env.subst(str(jobs))), 1)
+
+
 def zip_builder(target, source, env) -> None:
     compression = env.get('ZIPCOMPRESSION', zipfile.ZIP_STORED)
     zip_root = str(env.get('ZIPROOT', ''))
@@ -73,13 +139,35 @@ def zip_builder(target, source, env) -> None:
         else:
             files.append(str(s))
 
+    members = []
+    for fname in files:
+        arcname = os.path.relpath(fname, zip_root)
+        # TODO: Switch to ZipInfo.from_file when 3.6 becomes the base python version
+        zinfo = _create_zipinfo_for_file(fname, arcname, date_time, compression)
+        members.append((fname, zinfo))
+
+    jobs = _zip_jobs(env)
     with zipfile.ZipFile(str(target[0]), 'w', compression) as zf:
-        for fname in files:
-            arcname = os.path.relpath(fname, zip_root)
-            # TODO: Switch to ZipInfo.from_file when 3.6 becomes the base python version
-            zinfo = _create_zipinfo_for_file(fname, arcname, date_time, compression)
-            with open(fname, "rb") as f:
-                zf.writestr(zinfo, f.read())
+        if (compression == zipfile.ZIP_DEFLATED and jobs > 1 and len(members) > 1
+                and all(hasattr(zf, name) for name in _zipfile_internals)):
+            # Compress the members in a pool of threads, and write them
+            # in order as they are done.  Only a few members ahead of
+            # the one being written are compressed, to bound the space
+            # they take up.
+            import concurrent.futures
+
+            with concurrent.futures.ThreadPoolExecutor(jobs) as pool:
+                pending = collections.deque()
+                for fname, zinfo in members:
+                    pending.append(pool.submit(_compress_member, fname, zinfo))
+                    if len(pending) > 2 * jobs:
+                        _write_compressed(zf, *pending.popleft().result())
+                while pending:
+                    _write_compressed(zf, *pending.popleft().result())
+        else:
+            for fname, zinfo in members:
+                with open(fname, "rb") as f, zf.open(zinfo, 'w') as dest:
+                    shutil.copyfileobj(f, dest, zip_chunk_size)
 
 
 # Fix PR #3569 - If you don't specify ZIPCOM and ZIPCOMSTR when creating
@@ -36,7 +36,6 @@ from collections import UserDict, UserList, OrderedDict, deque
 from contextlib import suppress
 from types import MethodType, FunctionType
 from typing import Optional, Union
-from logging import Formatter
 
 from .types import (
     DictTypes,
@@ -251,34 +250,52 @@ def render_tree(root, child_func, prune: int=0, margin=[0], visited=None) -> str
           `prune` is 0, or in the whole tree if `prune` is 1.
     """
 
-    rname = str(root)
-
     # Initialize 'visited' dict, if required
     if visited is None:
         visited = {}
 
-    children = child_func(root)
-    retval = ""
-    for pipe in margin[:-1]:
-        if pipe:
-            retval = retval + "| "
-        else:
-            retval = retval + "  "
+    return ''.join(_render_tree_lines(root, child_func, prune, list(margin), visited))
 
-    if rname in visited:
-        return retval + "+-[" + rname + "]\n"
 
-    retval = retval + "+-" + rname + "\n"
-    if not prune:
-        visited = copy.copy(visited)
-    visited[rname] = True
+def _render_tree_lines(root, child_func, prune, margin, visited):
+    """Generate the lines of :func:`render_tree`.
 
-    for i, child in enumerate(children):
-        margin.append(i < len(children)-1)
-        retval = retval + render_tree(child, child_func, prune, margin, visited)
-        margin.pop()
+    The tree is walked with a stack rather than by recursion, so deep
+    trees don't hit the recursion limit.  Without *prune*, a node is
+    removed from *visited* again once its branch is done, so *visited*
+    only ever holds the current branch.
+    """
+    # Each stack entry is a list of [node name, children, next child].
+    stack = []
+    node = root
+    while True:
+        rname = str(node)
+        children = child_func(node)
+        pipes = ''.join(["  ", "| "][IDX(pipe)] for pipe in margin[:-1])
+        if rname in visited:
+            yield pipes + "+-[" + rname + "]\n"
+        else:
+            yield pipes + "+-" + rname + "\n"
+            visited[rname] = True
+            stack.append([rname, children, 0])
+            margin.append(False)
+
+        node = None
+        while stack:
+            entry = stack[-1]
+            rname, children, i = entry
+            if i < len(children):
+                entry[2] = i + 1
+                margin[-1] = i < len(children) - 1
+                node = children[i]
+                break
+            stack.pop()
+            margin.pop()
+            if not prune:
+                del visited[rname]
+        if node is None:
+            return
 
-    return retval
 
 def IDX(n) -> bool:
     """Generate in index into strings from the tree legends.
@@ -297,6 +314,47 @@ BOX_UP_LEFT = chr(0x2518)  # '┘'
 BOX_VERT_RIGHT = chr(0x251c)  # '├'
 BOX_HORIZ_DOWN = chr(0x252c)  # '┬'
 
+# The number of lines the tree printers write to sys.stdout at a time.
+TREE_CHUNK_LINES = 1000
+
+
+def _write_chunked(lines) -> None:
+    """Write an iterable of *lines* to sys.stdout in chunks.
+
+    sys.stdout is flushed after every write when it isn't a tty (see
+    :class:`Unbuffered`), so huge trees are written a chunk of
+    :data:`TREE_CHUNK_LINES` lines at a time rather than line by line,
+    and without ever holding more than a chunk in memory.
+    """
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= TREE_CHUNK_LINES:
+            sys.stdout.write(''.join(chunk))
+            chunk = []
+    if chunk:
+        sys.stdout.write(''.join(chunk))
+
+
+def _tree_tags(node) -> str:
+    """Return the status information :func:`print_tree` shows for *node*."""
+    return ''.join([
+        '[',
+        ' E'[IDX(node.exists())],
+        ' R'[IDX(node.rexists() and not node.exists())],
+        ' BbB'[
+            [0, 1][IDX(node.has_explicit_builder())] +
+            [0, 2][IDX(node.has_builder())]
+        ],
+        ' S'[IDX(node.side_effect)],
+        ' P'[IDX(node.precious)],
+        ' A'[IDX(node.always_build)],
+        ' C'[IDX(node.is_up_to_date())],
+        ' N'[IDX(node.noclean)],
+        ' H'[IDX(node.nocache)],
+        ']'
+    ])
+
 
 # TODO: W0102: Dangerous default value [] as argument (dangerous-default-value)
 def print_tree(
@@ -313,7 +371,8 @@ def print_tree(
 
     This is like func:`render_tree`, except it prints lines directly instead
     of creating a string representation in memory, so that huge trees can
-    be handled.
+    be handled.  The tree is walked without recursion, and the lines are
+    written a chunk at a time as they're generated.
 
     Args:
         root: the root node of the tree
@@ -328,102 +387,144 @@ def print_tree(
         singleLineDraw: use line-drawing characters rather than ASCII.
     """
 
-    rname = str(root)
-
     # Initialize 'visited' dict, if required
     if visited is None:
         visited = {}
 
-    if showtags:
-
-        if showtags == 2:
-            legend = (' E         = exists\n' +
-                      '  R        = exists in repository only\n' +
-                      '   b       = implicit builder\n' +
-                      '   B       = explicit builder\n' +
-                      '    S      = side effect\n' +
-                      '     P     = precious\n' +
-                      '      A    = always build\n' +
-                      '       C   = current\n' +
-                      '        N  = no clean\n' +
-                      '         H = no cache\n' +
-                      '\n')
-            sys.stdout.write(legend)
-
-        tags = [
-            '[',
-            ' E'[IDX(root.exists())],
-            ' R'[IDX(root.rexists() and not root.exists())],
-            ' BbB'[
-                [0, 1][IDX(root.has_explicit_builder())] +
-                [0, 2][IDX(root.has_builder())]
-            ],
-            ' S'[IDX(root.side_effect)],
-            ' P'[IDX(root.precious)],
-            ' A'[IDX(root.always_build)],
-            ' C'[IDX(root.is_up_to_date())],
-            ' N'[IDX(root.noclean)],
-            ' H'[IDX(root.nocache)],
-            ']'
-        ]
-
+    if showtags == 2:
+        legend = (' E         = exists\n' +
+                  '  R        = exists in repository only\n' +
+                  '   b       = implicit builder\n' +
+                  '   B       = explicit builder\n' +
+                  '    S      = side effect\n' +
+                  '     P     = precious\n' +
+                  '      A    = always build\n' +
+                  '       C   = current\n' +
+                  '        N  = no clean\n' +
+                  '         H = no cache\n' +
+                  '\n')
+        sys.stdout.write(legend)
+
+    _write_chunked(_print_tree_lines(root, child_func, prune, showtags, list(margin),
+                                     visited, lastChild, singleLineDraw))
+
+
+def _print_tree_lines(root, child_func, prune, showtags, margin, visited,
+                      lastChild, singleLineDraw):
+    """Generate the lines of :func:`print_tree`, walking the tree with a stack."""
+    if singleLineDraw:
+        pipes = ["  ", BOX_VERT + " "]
     else:
-        tags = []
-
-    def MMM(m):
+        pipes = ["  ", "| "]
+
+    # Each stack entry is a list of [children, next child].
+    stack = []
+    node = root
+    while True:
+        rname = str(node)
+        tags = _tree_tags(node) if showtags else ''
+        margins = ''.join(pipes[IDX(m)] for m in margin[:-1])
+        children = child_func(node)
+        pruned = prune and rname in visited and children
+        cross = "+-"
         if singleLineDraw:
-            return ["  ", BOX_VERT + " "][m]
+            cross = BOX_VERT_RIGHT + BOX_HORIZ   # sign used to point to the leaf.
+            # check if this is the last leaf of the branch
+            if lastChild:
+                # if this if the last leaf, then terminate:
+                cross = BOX_UP_RIGHT + BOX_HORIZ  # sign for the last leaf
+
+            # if this branch has children then split it
+            if children:
+                # if it's a leaf:
+                if pruned:
+                    cross += BOX_HORIZ
+                else:
+                    cross += BOX_HORIZ_DOWN
+
+        if pruned:
+            yield tags + margins + cross + '[' + rname + ']\n'
+        else:
+            yield tags + margins + cross + rname + '\n'
+            visited[rname] = 1
+            # if this item has children:
+            if children:
+                stack.append([children, 0])
+                margin.append(1)  # Initialize margin with 1 for vertical bar.
+
+        node = None
+        while stack:
+            entry = stack[-1]
+            children, i = entry
+            if i < len(children):
+                entry[1] = i + 1
+                lastChild = entry[1] == len(children)
+                if lastChild:
+                    # margins are with space (index 0) because we
+                    # arrived to the last child.
+                    margin[-1] = 0
+                node = children[i]
+                break
+            stack.pop()
+            margin.pop()  # destroy the last margin added
+        if node is None:
+            return
 
-        return ["  ", "| "][m]
 
-    margins = list(map(MMM, margin[:-1]))
-    children = child_func(root)
-    cross = "+-"
-    if singleLineDraw:
-        cross = BOX_VERT_RIGHT + BOX_HORIZ   # sign used to point to the leaf.
-        # check if this is the last leaf of the branch
-        if lastChild:
-            # if this if the last leaf, then terminate:
-            cross = BOX_UP_RIGHT + BOX_HORIZ  # sign for the last leaf
-
-        # if this branch has children then split it
-        if children:
-            # if it's a leaf:
-            if prune and rname in visited and children:
-                cross += BOX_HORIZ
-            else:
-                cross += BOX_HORIZ_DOWN
-
-    if prune and rname in visited and children:
-        sys.stdout.write(''.join(tags + margins + [cross, '[', rname, ']']) + '\n')
-        return
-
-    sys.stdout.write(''.join(tags + margins + [cross, rname]) + '\n')
-
-    visited[rname] = 1
-
-    # if this item has children:
-    if children:
-        margin.append(1)  # Initialize margin with 1 for vertical bar.
-        idx = IDX(showtags)
-        _child = 0  # Initialize this for the first child.
-        for C in children[:-1]:
-            _child = _child + 1  # number the children
-            print_tree(
-                C,
-                child_func,
-                prune,
-                idx,
-                margin,
-                visited,
-                (len(children) - _child) <= 0,
-                singleLineDraw,
-            )
-        # margins are with space (index 0) because we arrived to the last child.
-        margin[-1] = 0
-        # for this call child and nr of children needs to be set 0, to signal the second phase.
-        print_tree(children[-1], child_func, prune, idx, margin, visited, True, singleLineDraw)
-        margin.pop()  # destroy the last margin added
+def print_json_tree(root, child_func, showtags: bool=False, visited=None) -> None:
+    """Print a graph of nodes as JSON lines.
+
+    Writes one JSON object per line for each node reachable from *root*,
+    in depth-first order, each node only once however many times it's
+    shared.  The object has the node's ``name`` and the names of its
+    ``children``, which refer to the objects for those nodes.  The
+    object for *root* also has ``"root": true``.  Like
+    :func:`print_tree`, the graph is walked without recursion and
+    written a chunk at a time.
+
+    Args:
+        root: the root node of the graph
+        child_func: the function called to get the children of a node
+        showtags: add a ``status`` object with the node's status
+          information, as shown by :func:`print_tree`
+        visited: a dictionary of the names of nodes already printed,
+          which aren't printed again.
+    """
+    if visited is None:
+        visited = {}
+    _write_chunked(_json_tree_lines(root, child_func, showtags, visited))
+
+
+def _json_tree_lines(root, child_func, showtags, visited):
+    """Generate the lines of :func:`print_json_tree`."""
+    import json
+
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        rname = str(node)
+        if rname in visited:
+            continue
+        visited[rname] = 1
+        children = child_func(node)
+        entry = {'name': rname, 'children': [str(c) for c in children]}
+        if node is root:
+            entry['root'] = True
+        if showtags:
+            entry['status'] = {
+                'exists': bool(node.exists()),
+                'repository': bool(node.rexists() and not node.exists()),
+                'explicit_builder': bool(node.has_explicit_builder()),
+                'builder': bool(node.has_builder()),
+                'side_effect': bool(node.side_effect),
+                'precious': bool(node.precious),
+                'always_build': bool(node.always_build),
+                'current': bool(node.is_up_to_date()),
+                'noclean': bool(node.noclean),
+                'nocache': bool(node.nocache),
+            }
+        yield json.dumps(entry) + '\n'
+        stack.extend(reversed(children))
 
 
 def do_flatten(
@@ -669,6 +770,104 @@ else:
         raise OSError
 
 
+class _ExecutableIndex:
+    """Process-wide cache of the directory listings searched by :func:`WhereIs`.
+
+    Each directory on a search path is listed once, with a single
+    :func:`os.scandir`, and the listing is reused for as long as the
+    directory's modification time is unchanged.  Probing for a program
+    then costs one :func:`os.stat` of each directory plus a set lookup,
+    rather than a stat for every candidate file name (and, on Windows,
+    for every candidate extension).  Only a name found in a listing is
+    checked further, so a miss never touches the candidate file at all.
+
+    A listing taken within :attr:`racy_window` seconds of the directory's
+    last change is not trusted, since a further change on a filesystem
+    with coarse timestamps might leave the mtime unchanged; such listings
+    are simply taken again on next use.
+
+    The split form of each distinct search path string is remembered
+    too, so repeated probes with the same ``PATH`` do not re-split it.
+    """
+
+    racy_window = 2.0
+
+    def __init__(self) -> None:
+        self.paths = {}
+        self.listings = {}
+
+    def clear(self) -> None:
+        """Forget all cached search paths and directory listings."""
+        self.paths.clear()
+        self.listings.clear()
+
+    def split(self, path) -> Union[list, tuple]:
+        """Return *path* as a sequence of directories."""
+        if not is_String(path):
+            return path
+        try:
+            return self.paths[path]
+        except KeyError:
+            result = self.paths[path] = tuple(path.split(os.pathsep))
+            return result
+
+    def names(self, directory) -> frozenset:
+        """Return the (case-normalized) entry names in *directory*.
+
+        On Windows only regular files are included, as the type comes
+        for free with the listing there; elsewhere the caller is expected
+        to check the type and mode of any name it is interested in.
+        """
+        try:
+            mtime = os.stat(directory or os.curdir).st_mtime_ns
+        except OSError:
+            self.listings.pop(directory, None)
+            return frozenset()
+        cached = self.listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        names = set()
+        try:
+            with os.scandir(directory or os.curdir) as it:
+                for entry in it:
+                    if sys.platform == 'win32':
+                        try:
+                            if not entry.is_file():
+                                continue
+                        except OSError:
+                            continue
+                    names.add(os.path.normcase(entry.name))
+        except OSError:
+            return frozenset()
+        names = frozenset(names)
+        if time.time() - mtime / 1e9 > self.racy_window:
+            self.listings[directory] = (mtime, names)
+        else:
+            self.listings.pop(directory, None)
+        return names
+
+    def candidates(self, directory, file, pathext=('',)):
+        """Yield the paths in *directory* that could match *file*.
+
+        A name is yielded only if the directory listing contains it, so
+        callers still verify each candidate, but do so only for files
+        which actually exist.  A *file* with a directory component can't
+        be answered from a listing, so every candidate is yielded.
+        """
+        if os.path.dirname(file):
+            for ext in pathext:
+                yield os.path.join(directory, file + ext)
+            return
+        names = self.names(directory)
+        for ext in pathext:
+            if os.path.normcase(file + ext) in names:
+                yield os.path.join(directory, file + ext)
+
+
+_executable_index = _ExecutableIndex()
+
+
 if sys.platform == 'win32':
 
     def WhereIs(file, path=None, pathext=None, reject=None) -> Optional[str]:
@@ -677,8 +876,7 @@ if sys.platform == 'win32':
                 path = os.environ['PATH']
             except KeyError:
                 return None
-        if is_String(path):
-            path = path.split(os.pathsep)
+        path = _executable_index.split(path)
         if pathext is None:
             try:
                 pathext = os.environ['PATHEXT']
@@ -695,9 +893,7 @@ if sys.platform == 'win32':
         if not is_List(reject) and not is_Tuple(reject):
             reject = [reject]
         for p in path:
-            f = os.path.join(p, file)
-            for ext in pathext:
-                fext = f + ext
+            for fext in _executable_index.candidates(p, file, pathext):
                 if os.path.isfile(fext):
                     try:
                         reject.index(fext)
@@ -714,8 +910,7 @@ elif os.name == 'os2':
                 path = os.environ['PATH']
             except KeyError:
                 return None
-        if is_String(path):
-            path = path.split(os.pathsep)
+        path = _executable_index.split(path)
         if pathext is None:
             pathext = ['.exe', '.cmd']
         for ext in pathext:
@@ -727,9 +922,7 @@ elif os.name == 'os2':
         if not is_List(reject) and not is_Tuple(reject):
             reject = [reject]
         for p in path:
-            f = os.path.join(p, file)
-            for ext in pathext:
-                fext = f + ext
+            for fext in _executable_index.candidates(p, file, pathext):
                 if os.path.isfile(fext):
                     try:
                         reject.index(fext)
@@ -748,15 +941,13 @@ else:
                 path = os.environ['PATH']
             except KeyError:
                 return None
-        if is_String(path):
-            path = path.split(os.pathsep)
+        path = _executable_index.split(path)
         if reject is None:
             reject = []
         if not is_List(reject) and not is_Tuple(reject):
             reject = [reject]
         for p in path:
-            f = os.path.join(p, file)
-            if os.path.isfile(f):
+            for f in _executable_index.candidates(p, file):
                 try:
                     st = os.stat(f)
                 except OSError:
@@ -765,6 +956,8 @@ else:
                     # raised so as to not mask possibly serious disk or
                     # network issues.
                     continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
                 if stat.S_IMODE(st[stat.ST_MODE]) & 0o111:
                     try:
                         reject.index(f)
@@ -785,6 +978,11 @@ If `path` is not specified, :attr:`os.environ[PATH]` is used.
 If `pathext` is not specified, :attr:`os.environ[PATHEXT]`
 is used. Will not select any path name or names in the optional
 `reject` list.
+
+Directory listings are cached process-wide and revalidated by
+directory modification time, so repeated lookups against the same
+search path (as done by tool detection in cloned environments)
+do not re-probe every directory entry by entry.
 """
 
 
@@ -1057,6 +1255,40 @@ class LogicalLines:
         return list(logical_lines(self.fileobj))
 
 
+# The colon ending the targets of a rule: any colon other than that
+# of a drive letter, a single letter starting a name followed by
+# ":/" or ":\\".
+_depfile_target_re = re.compile(r'(?<![A-Za-z]):|(?<=\S[A-Za-z]):|:(?![\\/])')
+_depfile_split_re = re.compile(r'(?<!\\)\s+')
+_depfile_escape_re = re.compile(r'\\([ #])')
+
+def _depfile_names(text) -> list:
+    return [_depfile_escape_re.sub(r'\1', n).replace('$$', '$')
+            for n in _depfile_split_re.split(text.strip()) if n]
+
+def parse_depfile(fileobj) -> list:
+    """Parse a make-style dependency file, as written by ``gcc -MD``.
+
+    Returns a list of ``(targets, dependencies)`` tuples of file names,
+    one for each rule in the file.  Continuation lines are joined,
+    comment lines skipped, and the escapes compilers use for spaces,
+    ``#`` and ``$`` characters in file names are undone.  A colon
+    after a single letter starting a name, and followed by a slash or
+    backslash, is taken to be part of a Windows drive letter rather
+    than the end of the targets.
+    """
+    result = []
+    for line in logical_lines(fileobj):
+        if line.startswith('#'):
+            continue
+        try:
+            targets, depends = _depfile_target_re.split(line, 1)
+        except ValueError:
+            continue
+        result.append((_depfile_names(targets), _depfile_names(depends)))
+    return result
+
+
 class UniqueList(UserList):
     """A list which maintains uniqueness.
 
@@ -1276,7 +1508,8 @@ def wait_for_process_to_die(pid) -> None:
                 time.sleep(0.1)
 
 # From: https://stackoverflow.com/questions/1741972/how-to-use-different-formatters-with-the-same-logging-handler-in-python
-class DispatchingFormatter(Formatter):
+class DispatchingFormatter:
+    """A :class:`logging.Formatter` choosing a formatter by logger name."""
 
     def __init__(self, formatters, default_formatter) -> None:
         self._formatters = formatters
@@ -35,10 +35,9 @@ There are basically two types of stats.
 """
 from abc import ABC
 
-import platform
-import json
+import gc
 import sys
-from datetime import datetime
+import tracemalloc
 
 import SCons.Debug
 
@@ -126,6 +125,102 @@ class MemStats(Stats):
             self.outfp.write(fmt % (label, stats))
 
 
+class MemProfileStats(Stats):
+    """Allocation sites and object counts at phases of a run.
+
+    Enabling it starts :mod:`tracemalloc`.  At each phase, the
+    *top* source lines that allocated the most memory still in use,
+    and the counts of Nodes, Executors, NodeInfo and Environments
+    (by class), are recorded, and the allocation sites which changed
+    the most since the previous phase.
+    """
+    top = 10
+
+    def __init__(self):
+        super().__init__()
+        self.snapshot = None
+
+    def enable(self, outfp):
+        super().enable(outfp)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def do_append(self, label):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        stats = {
+            'current': current,
+            'peak': peak,
+            'top': [self._site(stat) for stat in snapshot.statistics('lineno')[:self.top]],
+            'changes': [],
+            'objects': self.object_counts(),
+        }
+        if self.snapshot is not None:
+            changes = snapshot.compare_to(self.snapshot, 'lineno')
+            stats['changes'] = [self._site(stat) for stat in changes[:self.top]
+                                if stat.size_diff or stat.count_diff]
+        self.snapshot = snapshot
+        self.labels.append(label)
+        self.stats.append(stats)
+
+    @staticmethod
+    def _site(stat):
+        frame = stat.traceback[0]
+        site = {
+            'site': '%s:%d' % (frame.filename, frame.lineno),
+            'size': stat.size,
+            'count': stat.count,
+        }
+        if isinstance(stat, tracemalloc.StatisticDiff):
+            site['size_diff'] = stat.size_diff
+            site['count_diff'] = stat.count_diff
+        return site
+
+    @staticmethod
+    def object_counts():
+        """Return the number of live objects of each class of interest."""
+        # Have to import where used to avoid import loop
+        import SCons.Environment
+        import SCons.Executor
+        import SCons.Node
+
+        classes = (SCons.Node.Node, SCons.Node.NodeInfoBase,
+                   SCons.Executor.Executor, SCons.Executor.Null,
+                   SCons.Environment.SubstitutionEnvironment)
+        counts = {}
+        for obj in gc.get_objects():
+            if isinstance(obj, classes):
+                name = type(obj).__name__
+                counts[name] = counts.get(name, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def do_print(self):
+        previous = {}
+        for label, stats in zip(self.labels, self.stats):
+            self.outfp.write("Memory profile %s\n" % label)
+            self.outfp.write("   traced: %d current, %d peak\n"
+                             % (stats['current'], stats['peak']))
+            self.outfp.write("   Top allocation sites:\n")
+            for site in stats['top']:
+                self.outfp.write("   %12d %9d  %s\n"
+                                 % (site['size'], site['count'], site['site']))
+            if stats['changes']:
+                self.outfp.write("   Largest changes since the previous phase:\n")
+                for site in stats['changes']:
+                    self.outfp.write("   %+12d %+9d  %s\n"
+                                     % (site['size_diff'], site['count_diff'], site['site']))
+            self.outfp.write("   Object counts:\n")
+            for name, count in stats['objects'].items():
+                self.outfp.write("   %9d %+9d  %s\n"
+                                 % (count, count - previous.get(name, 0), name))
+            previous = stats['objects']
+
+
 class TimeStats(Stats):
     def __init__(self):
         super().__init__()
@@ -150,15 +245,20 @@ class TimeStats(Stats):
 
 count_stats = CountStats()
 memory_stats = MemStats()
+memprofile_stats = MemProfileStats()
 time_stats = TimeStats()
 
 
 def write_scons_stats_file():
     """
     Actually write the JSON file with debug information.
-    Depending which of : count, time, action-timestamps,memory their information will be written.
+    Depending which of : count, time, action-timestamps, memory, memprofile their information will be written.
     """
 
+    import json
+    import platform
+    from datetime import datetime
+
     # Have to import where used to avoid import loop
     from SCons.Script import BUILD_TARGETS, COMMAND_LINE_TARGETS, ARGUMENTS, \
         ARGLIST # [import-outside-toplevel]
@@ -181,6 +281,10 @@ def write_scons_stats_file():
         for label, stats in zip(memory_stats.labels, memory_stats.stats):
             m[label] = stats
 
+    if memprofile_stats.enabled:
+        json_structure['Memory profile'] = dict(zip(memprofile_stats.labels,
+                                                    memprofile_stats.stats))
+
     if time_stats.enabled:
         json_structure['Time'] = {'Commands': time_stats.commands,
                                   'Totals': time_stats.totals}
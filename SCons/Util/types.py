@@ -8,7 +8,6 @@ Routines which check types and do type conversions.
 """
 
 import os
-import pprint
 import re
 from typing import Optional
 
@@ -239,6 +238,8 @@ def to_String_for_signature(  # pylint: disable=redefined-outer-name,redefined-b
             # which was undefined until py3.6 (where it's by insertion order)
             # was not wise.
             # TODO: Change code when floor is raised to PY36
+            import pprint
+
             return pprint.pformat(obj, width=1000000)
         return to_String_for_subst(obj)
     else:
@@ -23,6 +23,7 @@
 
 import functools
 import io
+import json
 import os
 import sys
 import unittest
@@ -63,6 +64,8 @@ from SCons.Util import (
     is_List,
     is_String,
     is_Tuple,
+    parse_depfile,
+    print_json_tree,
     print_tree,
     render_tree,
     set_hash_format,
@@ -290,6 +293,68 @@ class UtilTestCase(unittest.TestCase):
         finally:
             sys.stdout = save_stdout
 
+    def test_print_json_tree(self) -> None:
+        """Test the print_json_tree() function"""
+
+        def get_children(node):
+            return node.children
+
+        save_stdout = sys.stdout
+
+        try:
+            node, expect, withtags = self.tree_case_2()
+
+            sys.stdout = io.StringIO()
+            print_json_tree(node, get_children)
+            actual = [json.loads(l) for l in sys.stdout.getvalue().splitlines()]
+            expect = [
+                {'name': 'blat.o', 'children': ['blat.c'], 'root': True},
+                {'name': 'blat.c', 'children': ['blat.h', 'bar.h']},
+                {'name': 'blat.h', 'children': ['stdlib.h']},
+                {'name': 'stdlib.h', 'children': ['types.h', 'malloc.h']},
+                {'name': 'types.h', 'children': []},
+                {'name': 'malloc.h', 'children': []},
+                {'name': 'bar.h', 'children': ['stdlib.h']},
+            ]
+            assert expect == actual, (expect, actual)
+
+            sys.stdout = io.StringIO()
+            print_json_tree(node, get_children, showtags=True)
+            actual = [json.loads(l) for l in sys.stdout.getvalue().splitlines()]
+            assert [a['name'] for a in actual] == [e['name'] for e in expect], actual
+            status = actual[0]['status']
+            assert status['exists'] and status['builder'], status
+            assert not status['repository'] and not status['nocache'], status
+        finally:
+            sys.stdout = save_stdout
+
+    def test_deep_tree(self) -> None:
+        """Test the tree functions on a tree deeper than the recursion limit"""
+
+        def get_children(node):
+            return node.children
+
+        depth = sys.getrecursionlimit() + 100
+        node = None
+        for i in range(depth):
+            node = self.Node('n%d' % i, [node] if node else [])
+
+        actual = render_tree(node, get_children).splitlines()
+        assert len(actual) == depth, len(actual)
+        assert actual[-1] == ' ' * 2 * (depth - 1) + '+-n0', actual[-1]
+
+        save_stdout = sys.stdout
+        try:
+            sys.stdout = io.StringIO()
+            print_tree(node, get_children)
+            assert sys.stdout.getvalue().splitlines() == actual
+
+            sys.stdout = io.StringIO()
+            print_json_tree(node, get_children)
+            assert len(sys.stdout.getvalue().splitlines()) == depth
+        finally:
+            sys.stdout = save_stdout
+
     def test_is_Dict(self) -> None:
         assert is_Dict({})
         assert is_Dict(UserDict())
@@ -454,6 +519,50 @@ class UtilTestCase(unittest.TestCase):
         finally:
             os.environ['PATH'] = env_path
 
+    def test_WhereIs_cache(self) -> None:
+        """Test WhereIs() directory listing cache."""
+        index = SCons.Util._executable_index
+        test = TestCmd.TestCmd(workdir='')
+        test.subdir('bin')
+        bindir = test.workpath('bin')
+        prog = test.workpath('bin', 'prog.exe')
+
+        wi = WhereIs('prog.exe', bindir)
+        assert wi is None, wi
+
+        # a fresh listing is racy, so a new program shows up right away
+        test.write(prog, "\n")
+        os.chmod(prog, 0o755)
+        wi = WhereIs('prog.exe', bindir)
+        assert wi == prog, wi
+        assert bindir not in index.listings, index.listings
+
+        # an old, unchanged directory is listed once and then reused
+        os.utime(bindir, (0, 0))
+        wi = WhereIs('prog.exe', bindir)
+        assert wi == prog, wi
+        assert bindir in index.listings, index.listings
+        with unittest.mock.patch('os.scandir') as scandir:
+            wi = WhereIs('prog.exe', bindir)
+            assert wi == prog, wi
+            wi = WhereIs('other.exe', bindir)
+            assert wi is None, wi
+            scandir.assert_not_called()
+
+        # a changed directory mtime invalidates the listing
+        os.unlink(prog)
+        os.utime(bindir, (1, 1))
+        wi = WhereIs('prog.exe', bindir)
+        assert wi is None, wi
+
+        # search path strings are split once
+        path = os.pathsep.join([bindir, test.workpath('missing')])
+        WhereIs('prog.exe', path)
+        assert index.paths[path] == (bindir, test.workpath('missing'))
+
+        index.clear()
+        assert not index.listings and not index.paths
+
     def test_get_env_var(self) -> None:
         """Testing get_environment_var()."""
         assert get_environment_var("$FOO") == "FOO", get_environment_var("$FOO")
@@ -838,6 +947,29 @@ bling
             'bling\n',
         ], lines
 
+    def test_parse_depfile(self) -> None:
+        """Test the parse_depfile() function"""
+        content = """\
+# a comment
+foo.o: foo.c foo.h \\
+ sub/bar.h with\\ space.h dollar$$.h \\
+ C:/inc/win.h
+two.o three.o:four.h
+C:/obj/x.o: C:/src/x.c
+abs.o:/abs/x.h
+d:\\obj\\y.obj:d:\\src\\y.c
+
+"""
+        rules = parse_depfile(io.StringIO(content))
+        assert rules == [
+            (['foo.o'], ['foo.c', 'foo.h', 'sub/bar.h', 'with space.h',
+                         'dollar$.h', 'C:/inc/win.h']),
+            (['two.o', 'three.o'], ['four.h']),
+            (['C:/obj/x.o'], ['C:/src/x.c']),
+            (['abs.o'], ['/abs/x.h']),
+            (['d:\\obj\\y.obj'], ['d:\\src\\y.c']),
+        ], rules
+
     def test_intern(self) -> None:
         s1 = silent_intern("spam")
         s3 = silent_intern(42)
@@ -31,12 +31,18 @@ A cache of derived files is stored by file signature.
 The files are split into directories named by the first few
 digits of the signature. The prefix length used for directory
 names can be changed by this script.
+
+The shared Configure result cache named by ``$CONFIGURECACHE`` uses
+the same layout, with one JSON file per test result, so this script
+can also list its results and prune entries of either kind of cache
+that have not been used for a while.
 """
 
 import argparse
 import glob
 import json
 import os
+import time
 
 def rearrange_cache_entries(current_prefix_len, new_prefix_len) -> None:
     """Move cache files if prefix length changed.
@@ -65,6 +71,42 @@ def rearrange_cache_entries(current_prefix_len, new_prefix_len) -> None:
         os.rmdir(dname)
 
 
+def list_configure_results() -> None:
+    """Print the Configure test results in the cache."""
+    for file in sorted(glob.iglob(os.path.join('*', '*.json'))):
+        try:
+            with open(file) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        text = (entry.get('text') or '').strip().splitlines()
+        print('%s %-6s %s %s' % (
+            os.path.basename(file)[:-len('.json')],
+            entry.get('kind'),
+            'ok  ' if entry.get('result') else 'fail',
+            text[0] if text else ''))
+
+
+def prune_cache_entries(days) -> None:
+    """Remove cache entries which have not been used for *days* days.
+
+    Retrieving an entry updates its modification time, so this removes
+    the entries least recently used by any build.
+    """
+    cutoff = time.time() - days * 24 * 60 * 60
+    count = size = 0
+    for file in glob.iglob(os.path.join('*', '*')):
+        try:
+            st = os.stat(file)
+            if st.st_mtime < cutoff:
+                os.remove(file)
+                count += 1
+                size += st.st_size
+        except OSError:
+            pass
+    print('Pruned %d entries, %d bytes' % (count, size))
+
+
 # The configuration dictionary should have one entry per entry in the
 # cache config. The value of each entry should include the following:
 #   implicit - (optional) This is to allow adding a new config entry and also
@@ -108,6 +150,13 @@ def main():
     parser.add_argument('--show',
                         action="store_true",
                         help="show current configuration")
+    parser.add_argument('--list',
+                        action="store_true",
+                        help="list the results of a Configure result cache")
+    parser.add_argument('--prune-days',
+                        metavar='<days>',
+                        type=float,
+                        help="remove entries not used in the last <days> days")
 
     # Get the command line as a dict without any of the unspecified entries.
     args = dict([x for x in vars(parser.parse_args()).items() if x[1]])
@@ -145,6 +194,14 @@ def main():
         print("Cache contains %s files" % file_count)
         del args['show']
 
+    if args.get('list', None):
+        list_configure_results()
+        del args['list']
+
+    if args.get('prune_days', None):
+        prune_cache_entries(args['prune_days'])
+        del args['prune_days']
+
     # Find any keys that are not currently set but should be
     for key in config_entries:
         if key not in config:
@@ -87,6 +87,7 @@ Print_Flags = Flagger()
 Verbose = 0
 Readable = 0
 Warns = 0
+Convert_Format = None
 
 
 def default_mapper(entry, name):
@@ -287,6 +288,7 @@ class Do_SConsignDB:
         self.dbm = dbm
 
     def __call__(self, fname):
+        mode = "w" if Convert_Format else "r"
         # The *dbm modules stick their own file suffixes on the names
         # that are passed in.  This causes us to jump through some
         # hoops here.
@@ -296,7 +298,7 @@ class Do_SConsignDB:
             #   ---------                  -------------------------
             #   .sconsign               => .sconsign.dblite
             #   .sconsign.dblite        => .sconsign.dblite.dblite
-            db = self.dbm.open(fname, "r")
+            db = self.dbm.open(fname, mode)
         except (IOError, OSError) as e:
             print_e = e
             try:
@@ -304,7 +306,7 @@ class Do_SConsignDB:
                 # so that if they actually passed in 'sconsign.dblite'
                 # (for example), the dbm module will put the suffix back
                 # on for us and open it anyway.
-                db = self.dbm.open(os.path.splitext(fname)[0], "r")
+                db = self.dbm.open(os.path.splitext(fname)[0], mode)
             except (IOError, OSError):
                 # That didn't work either.  See if the file name
                 # they specified even exists (independent of the dbm
@@ -332,6 +334,12 @@ class Do_SConsignDB:
                 sys.stderr.write("unrecognized pickle protocol.\n")
             return
 
+        if Convert_Format:
+            convert_db(db, Convert_Format)
+            db.close()
+            return
+
+        strings = SCons.SConsign.get_string_table(db)
         if Print_Directories:
             for dir in Print_Directories:
                 try:
@@ -340,18 +348,45 @@ class Do_SConsignDB:
                     err = "sconsign: no dir `%s' in `%s'\n" % (dir, args[0])
                     sys.stderr.write(err)
                 else:
-                    self.printentries(dir, val)
+                    self.printentries(dir, val, strings)
         else:
-            for dir in sorted(db.keys()):
-                self.printentries(dir, db[dir])
+            for dir in sorted(db_dirs(db)):
+                self.printentries(dir, db[dir], strings)
 
     @staticmethod
-    def printentries(dir, val) -> None:
+    def printentries(dir, val, strings=None) -> None:
         try:
             print('=== ' + dir + ':')
         except TypeError:
             print('=== ' + dir.decode() + ':')
-        printentries(pickle.loads(val), dir)
+        printentries(SCons.SConsign.loads(val, strings), dir)
+
+
+def db_dirs(db):
+    """Return the directory keys of *db*, leaving out its string table."""
+    return [k for k in db.keys()
+            if k not in (SCons.SConsign.STRING_TABLE_KEY,
+                         SCons.SConsign.STRING_TABLE_KEY.encode())]
+
+
+def convert_db(db, fmt) -> None:
+    """Rewrite every directory record of *db* in format *fmt*.
+
+    Converting to ``binary`` always starts a fresh string table, so it
+    also drops strings that no record refers to any more.
+    """
+    old_strings = SCons.SConsign.get_string_table(db)
+    new_strings = SCons.SConsign.StringTable()
+    for dir in db_dirs(db):
+        entries = SCons.SConsign.loads(db[dir], old_strings)
+        if fmt == 'binary':
+            db[dir] = SCons.SConsign.encode_entries(entries, new_strings)
+        else:
+            db[dir] = pickle.dumps(entries, SCons.compat.PICKLE_PROTOCOL)
+    if fmt == 'binary':
+        db[SCons.SConsign.STRING_TABLE_KEY] = new_strings.encode()
+    elif SCons.SConsign.STRING_TABLE_KEY in db:
+        del db[SCons.SConsign.STRING_TABLE_KEY]
 
 
 def Do_SConsignDir(name):
@@ -369,6 +404,15 @@ def Do_SConsignDir(name):
                 err = "sconsign: ignoring invalid .sconsign file `%s': %s\n" % (name, e)
                 sys.stderr.write(err)
                 return
+            if Convert_Format:
+                if Convert_Format == 'binary':
+                    data = SCons.SConsign.encode_file(sconsign.entries)
+                else:
+                    data = pickle.dumps(sconsign.entries,
+                                        SCons.compat.PICKLE_PROTOCOL)
+                with open(name, 'wb') as fp:
+                    fp.write(data)
+                return
             printentries(sconsign.entries, args[0])
     except (IOError, OSError) as e:
         sys.stderr.write("sconsign: %s\n" % e)
@@ -382,6 +426,7 @@ def main() -> None:
     global args
     global Verbose
     global Readable
+    global Convert_Format
 
     helpstr = """\
 Usage: sconsign [OPTIONS] [FILE ...]
@@ -389,6 +434,7 @@ Usage: sconsign [OPTIONS] [FILE ...]
 Options:
   -a, --act, --action         Print build action information.
   -c, --csig                  Print content signature information.
+  --convert=FORMAT            Rewrite FILE in FORMAT (binary or pickle).
   -d DIR, --dir=DIR           Print only info about DIR.
   -e ENTRY, --entry=ENTRY     Print only info about ENTRY.
   -f FORMAT, --format=FORMAT  FILE is in the specified FORMAT.
@@ -409,6 +455,7 @@ Options:
                 'act',
                 'action',
                 'csig',
+                'convert=',
                 'dir=',
                 'entry=',
                 'format=',
@@ -431,6 +478,12 @@ Options:
             Print_Flags['action'] = 1
         elif o in ('-c', '--csig'):
             Print_Flags['csig'] = 1
+        elif o in ('--convert',):
+            if a not in ('binary', 'pickle'):
+                sys.stderr.write("sconsign: illegal conversion format `%s'\n" % a)
+                print(helpstr)
+                sys.exit(2)
+            Convert_Format = a
         elif o in ('-d', '--dir'):
             Print_Directories.append(a)
         elif o in ('-e', '--entry'):
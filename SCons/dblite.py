@@ -194,6 +194,11 @@ class dblite:
         self._dict[key] = value
         self._needs_sync = True
 
+    def __delitem__(self, key):
+        self._check_writable()
+        del self._dict[key]
+        self._needs_sync = True
+
     def keys(self):
         return list(self._dict.keys())
 
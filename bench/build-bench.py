@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+End-to-end timing of SCons builds of a synthetic project.
+
+The project is generated from the command-line options, the same
+options always giving the same tree: a program linked against LIBS
+static libraries of SOURCES C files each.  Every source file includes
+a common header and FANOUT others, picked from headers shared by all
+libraries and headers local to its own library.  The libraries can be
+built in a variant directory, and with their environments made by a
+chain of Clone() calls.
+
+The compiler, archiver and linker are a small Python script written
+into the tree, so the timings are of SCons and not of a tool chain,
+and the benchmark runs wherever Python does.
+
+The following builds are timed, in order, REPEAT times:
+
+    full            a build with -j JOBS from nothing
+    null            the same build again, with nothing to do
+    touch-source    a build after changing one source file
+    touch-header    a build after changing the header everything includes
+    clean           scons -c
+
+For each one, the wall-clock time, the peak resident set size of the
+SCons process, the number of commands run (or files removed) and,
+where the system can count them, the number of read and write system
+calls made by SCons are reported as JSON, suitable for keeping and comparing over time.
+With --strace, each build is also run under "strace -f -c" to count
+all the system calls made by SCons and the commands it runs.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                     'scripts', 'scons.py')
+
+# The stand-in for a compiler, archiver and linker: each writes a
+# digest of its inputs to its output, which is enough for SCons.
+STANDIN = '''\
+import hashlib
+import os
+import sys
+
+def main(tool, args):
+    if tool == 'ar':
+        # $AR $ARFLAGS $TARGET $SOURCES
+        output, inputs, libs = args[1], args[2:], []
+    else:
+        output, inputs, libs, libpath = None, [], [], []
+        args = iter(args)
+        for arg in args:
+            if arg == '-o':
+                output = next(args)
+            elif arg.startswith('-L'):
+                libpath.append(arg[2:])
+            elif arg.startswith('-l'):
+                libs.append(arg[2:])
+            elif not arg.startswith('-'):
+                inputs.append(arg)
+        for lib in libs:
+            for d in libpath:
+                path = os.path.join(d, 'lib%s.a' % lib)
+                if os.path.exists(path):
+                    inputs.append(path)
+                    break
+    digest = hashlib.sha1(tool.encode())
+    for name in inputs:
+        with open(name, 'rb') as f:
+            digest.update(f.read())
+    with open(output, 'w') as f:
+        f.write('%s %s\\n' % (tool, digest.hexdigest()))
+
+main(sys.argv[1], sys.argv[2:])
+'''
+
+SCONSTRUCT = '''\
+import sys
+
+DefaultEnvironment(tools=[])
+standin = '"%%s" "%%s"' %% (sys.executable, File('#standin.py').abspath)
+env = Environment(
+    tools=['cc', 'link', 'ar'],
+    CC=standin + ' cc',
+    LINK=standin + ' link',
+    AR=standin + ' ar',
+    RANLIBCOM='',
+    CPPPATH=['#include'],
+)
+variant_dir = %(variant_dir)r
+libs = []
+for lib in %(libs)r:
+    libs.extend(SConscript(lib + '/SConscript', exports='env',
+                           variant_dir=variant_dir and variant_dir + '/' + lib or None))
+env.Program('main', 'main.c', LIBS=libs)
+'''
+
+LIB_SCONSCRIPT = '''\
+Import('env')
+for i in range(%(clones)d):
+    env = env.Clone(CPPDEFINES=['%(name)s_%%d' %% i])
+lib = env.StaticLibrary('%(name)s', Glob('*.c'))
+Return('lib')
+'''
+
+MAIN_C = '''\
+#include "common.h"
+
+int main(void)
+{
+    return 0;
+}
+'''
+
+
+def generate(root, libs=10, sources=20, fanout=5, shared_headers=20,
+             local_headers=10, variant_dir='build', clones=1, seed=1):
+    """Write a synthetic project into *root*.
+
+    Returns the paths, relative to *root*, of a source file and of
+    the header included by every source file, for changing between
+    builds.
+    """
+    rng = random.Random(seed)
+
+    def write(path, contents):
+        path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(contents)
+
+    write('standin.py', STANDIN)
+    lib_names = ['lib%03d' % i for i in range(libs)]
+    write('SConstruct', SCONSTRUCT % {
+        'libs': lib_names,
+        'variant_dir': variant_dir or '',
+    })
+    write('main.c', MAIN_C)
+    write(os.path.join('include', 'common.h'),
+          '#define COMMON 1\n')
+    shared = ['h%03d.h' % i for i in range(shared_headers)]
+    for h in shared:
+        write(os.path.join('include', h),
+              '#include "common.h"\n#define %s 1\n' % h[:-2].upper())
+
+    for name in lib_names:
+        write(os.path.join(name, 'SConscript'),
+              LIB_SCONSCRIPT % {'name': name.upper(), 'clones': clones})
+        local = ['%s_%03d.h' % (name, i) for i in range(local_headers)]
+        for h in local:
+            write(os.path.join(name, h),
+                  '#include "common.h"\n#define %s 1\n' % h[:-2].upper())
+        headers = shared + local
+        for i in range(sources):
+            includes = rng.sample(headers, min(fanout, len(headers)))
+            lines = ['#include "common.h"']
+            lines.extend('#include "%s"' % h for h in includes)
+            lines.append('int %s_f%03d(void) { return %d; }' % (name, i, i))
+            write(os.path.join(name, 'f%03d.c' % i), '\n'.join(lines) + '\n')
+
+    return (os.path.join(lib_names[0], 'f000.c') if libs and sources else 'main.c',
+            os.path.join('include', 'common.h'))
+
+
+# Run in front of SCons, to record what it used when it exits.
+BOOTSTRAP = '''\
+import atexit, json, os, runpy, sys
+
+def stats(path=os.environ['SCONS_BENCH_STATS']):
+    stats = {}
+    try:
+        import resource
+    except ImportError:
+        pass
+    else:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            maxrss //= 1024
+        stats['maxrss_kb'] = maxrss
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                name, value = line.split(':')
+                if name in ('syscr', 'syscw'):
+                    stats[name] = int(value)
+    except OSError:
+        pass
+    with open(path, 'w') as f:
+        json.dump(stats, f)
+
+atexit.register(stats)
+sys.argv = sys.argv[1:]
+runpy.run_path(sys.argv[0], run_name='__main__')
+'''
+
+
+def run_scons(root, args, scons=SCONS, strace=False):
+    """Run SCons in *root* and return what it used."""
+    fd, stats_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    command = [sys.executable, '-c', BOOTSTRAP, scons, '-Q'] + args
+    if strace:
+        strace_file = stats_file + '.strace'
+        command = ['strace', '-f', '-c', '-o', strace_file] + command
+    env = dict(os.environ, SCONS_BENCH_STATS=stats_file)
+    try:
+        start = time.perf_counter()
+        proc = subprocess.run(command, cwd=root, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True)
+        wall = time.perf_counter() - start
+        if proc.returncode:
+            raise RuntimeError("scons %s failed:\n%s" % (' '.join(args), proc.stdout))
+        with open(stats_file) as f:
+            result = json.load(f)
+        if strace:
+            result['syscalls'] = strace_total(strace_file)
+    finally:
+        for path in (stats_file, stats_file + '.strace'):
+            if os.path.exists(path):
+                os.unlink(path)
+    result['wall'] = wall
+    # With -Q, every line printed is a command run or a file removed.
+    result['commands'] = len([line for line in proc.stdout.splitlines()
+                              if not line.startswith('scons: ')])
+    return result
+
+
+def strace_total(path):
+    """Return the total number of calls from "strace -c" output."""
+    with open(path) as f:
+        for line in f:
+            m = re.match(r'^[\d.]+\s+[\d.]+\s+(?:\d+\s+)?(\d+)\s+(?:\d+\s+)?total$',
+                         line.strip())
+            if m:
+                return int(m.group(1))
+    return None
+
+
+def touch(path):
+    """Change the contents of *path*, so a content signature changes."""
+    with open(path, 'a') as f:
+        f.write('/* %s */\n' % time.time())
+
+
+def run_builds(root, source, header, jobs, repeat=1, scons=SCONS, strace=False):
+    """Time the builds of a generated project.
+
+    Returns a dict mapping the name of each build to a list of the
+    results of its REPEAT runs.
+    """
+    build = ['-j', str(jobs)]
+    results = {}
+
+    def timed(name, args):
+        results.setdefault(name, []).append(
+            run_scons(root, args, scons=scons, strace=strace))
+
+    for _ in range(repeat):
+        sconsign = os.path.join(root, '.sconsign.dblite')
+        if os.path.exists(sconsign):
+            os.unlink(sconsign)
+        timed('full', build)
+        timed('null', build)
+        touch(os.path.join(root, source))
+        timed('touch-source', build)
+        touch(os.path.join(root, header))
+        timed('touch-header', build)
+        timed('clean', ['-c'] + build)
+    return results
+
+
+def summarize(results):
+    """Return the median of each measurement of each build."""
+    summary = {}
+    for name, runs in results.items():
+        summary[name] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in runs[0] if runs[0][key] is not None
+        }
+    return summary
+
+
+def scons_version(scons):
+    proc = subprocess.run([sys.executable, scons, '--version'],
+                          stdout=subprocess.PIPE, universal_newlines=True)
+    m = re.search(r'SCons: v([^\s,]+)', proc.stdout)
+    return m.group(1) if m else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time SCons builds of a synthetic project.")
+    parser.add_argument('--libs', type=int, default=10,
+                        help="number of libraries (default: %(default)s)")
+    parser.add_argument('--sources', type=int, default=20,
+                        help="source files per library (default: %(default)s)")
+    parser.add_argument('--fanout', type=int, default=5,
+                        help="headers included by each source file "
+                             "(default: %(default)s)")
+    parser.add_argument('--shared-headers', type=int, default=20,
+                        help="headers shared by all libraries "
+                             "(default: %(default)s)")
+    parser.add_argument('--local-headers', type=int, default=10,
+                        help="headers local to each library "
+                             "(default: %(default)s)")
+    parser.add_argument('--variant-dir', default='build',
+                        help="variant directory for the libraries, "
+                             "or '' for none (default: %(default)s)")
+    parser.add_argument('--clones', type=int, default=1,
+                        help="Clone() calls made for each library's "
+                             "environment (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="seed for generating the project "
+                             "(default: %(default)s)")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help="builds are run with -j JOBS "
+                             "(default: %(default)s)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="times to run each build (default: %(default)s)")
+    parser.add_argument('--scons', default=SCONS,
+                        help="SCons script to time (default: %(default)s)")
+    parser.add_argument('--strace', action='store_true',
+                        help="count all system calls with strace")
+    parser.add_argument('--dir',
+                        help="generate the project in DIR and keep it, "
+                             "instead of in a temporary directory")
+    parser.add_argument('-o', '--output',
+                        help="write the JSON results to OUTPUT "
+                             "instead of standard output")
+    options = parser.parse_args(argv)
+
+    if options.strace and not shutil.which('strace'):
+        parser.error("strace not found")
+
+    config = {
+        'libs': options.libs,
+        'sources': options.sources,
+        'fanout': options.fanout,
+        'shared_headers': options.shared_headers,
+        'local_headers': options.local_headers,
+        'variant_dir': options.variant_dir,
+        'clones': options.clones,
+        'seed': options.seed,
+    }
+    root = options.dir or tempfile.mkdtemp(prefix='scons-bench-')
+    try:
+        if options.dir and os.path.exists(root):
+            shutil.rmtree(root)
+        source, header = generate(root, **config)
+        results = run_builds(root, source, header, options.jobs,
+                             repeat=options.repeat, scons=options.scons,
+                             strace=options.strace)
+    finally:
+        if not options.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        'scons': scons_version(options.scons),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'jobs': options.jobs,
+        'config': config,
+        'summary': summarize(results),
+        'runs': results,
+    }
+    output = json.dumps(report, indent=2) + '\n'
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
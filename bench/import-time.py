@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Timing of SCons startup.
+
+Imports SCons.Script under "python -X importtime" RUNS times, and
+reports the median time taken to import it, and the modules taking
+the longest to import themselves (not counting the modules they
+import), with what imported them.  Then times RUNS invocations of
+"scons --version", and of "scons -q" in a project of one up-to-date
+target, the fixed cost of every scripted invocation of SCons.
+
+The results are written as JSON, for comparing over time.  With
+--baseline, the times are also compared with those of an earlier
+run, read from the JSON file it wrote.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCONS = os.path.join(ROOT, 'scripts', 'scons.py')
+
+IMPORT = "import sys; sys.path.insert(0, %r); import SCons.Script"
+
+SCONSTRUCT = """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('out.txt', 'in.txt', Copy('$TARGET', '$SOURCE'))
+"""
+
+
+def importtime(root=ROOT):
+    """Import SCons.Script under -X importtime and return the timings.
+
+    Returns a list of (module, self, cumulative, importer) tuples, in
+    microseconds, in the order the imports finished.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', IMPORT % root],
+                          stderr=subprocess.PIPE, universal_newlines=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_us, cumulative = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue    # the header line
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append([depth, name.strip(), self_us, cumulative])
+    # A module is imported by the next one to finish at a lower depth.
+    result = []
+    for i, (depth, name, self_us, cumulative) in enumerate(entries):
+        importer = next((e[1] for e in entries[i + 1:] if e[0] < depth), None)
+        result.append((name, self_us, cumulative, importer))
+    return result
+
+
+def run_times(args, cwd, runs):
+    """Return the wall-clock times of *runs* runs of SCons."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, SCONS] + args, cwd=cwd,
+                       stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time SCons startup.")
+    parser.add_argument('-r', '--runs', type=int, default=10,
+                        help="times to run each measurement (default: %(default)s)")
+    parser.add_argument('-t', '--top', type=int, default=20,
+                        help="slowest modules to report (default: %(default)s)")
+    parser.add_argument('-o', '--output',
+                        help="write the JSON results to OUTPUT "
+                             "instead of standard output")
+    parser.add_argument('--baseline',
+                        help="compare with the results of an earlier run")
+    options = parser.parse_args(argv)
+
+    # The first run may compile the modules; don't time that.
+    importtime()
+    samples = [importtime() for _ in range(options.runs)]
+    totals = [next(e[2] for e in s if e[0] == 'SCons.Script') for s in samples]
+    self_times = {}
+    importers = {}
+    for sample in samples:
+        for name, self_us, _, importer in sample:
+            self_times.setdefault(name, []).append(self_us)
+            importers[name] = importer
+    slowest = sorted(((statistics.median(t), name) for name, t in self_times.items()),
+                     reverse=True)[:options.top]
+
+    with tempfile.TemporaryDirectory(prefix='scons-startup-') as tmp:
+        with open(os.path.join(tmp, 'SConstruct'), 'w') as f:
+            f.write(SCONSTRUCT)
+        with open(os.path.join(tmp, 'in.txt'), 'w') as f:
+            f.write("in.txt\n")
+        run_times([], tmp, 1)
+        version = run_times(['--version'], tmp, options.runs)
+        question = run_times(['-q'], tmp, options.runs)
+
+    report = {
+        'python': sys.version.split()[0],
+        'runs': options.runs,
+        'import_us': statistics.median(totals),
+        'modules': len(samples[0]),
+        'slowest': [{'module': name, 'self_us': t, 'imported_by': importers[name]}
+                    for t, name in slowest],
+        'version_s': statistics.median(version),
+        'question_s': statistics.median(question),
+    }
+    output = json.dumps(report, indent=2) + '\n'
+    if options.output:
+        with open(options.output, 'w') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+
+    if options.baseline:
+        with open(options.baseline) as f:
+            baseline = json.load(f)
+        for key in ('import_us', 'modules', 'version_s', 'question_s'):
+            old, new = baseline[key], report[key]
+            sys.stderr.write("%-12s %12.4g -> %12.4g  (%+.1f%%)\n"
+                             % (key, old, new, 100.0 * (new - old) / old))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
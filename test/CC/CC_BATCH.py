@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Test that $CC_BATCH compiles out-of-date C sources that share an
+output directory in one compiler call, run from a scratch directory
+next to the objects, that $CC_BATCH_SIZE bounds the size of each
+batch, and that nothing is batched while $CC_DEPFILES is set.
+"""
+
+import os
+import sys
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+if sys.platform == 'win32':
+    test.skip_test("$CC_BATCH is not supported on Windows; skipping test.\n")
+
+test.subdir('src', 'inc')
+
+test.write('mycc.py', r"""
+import os
+import sys
+args = sys.argv[1:]
+incs = [a[2:] for a in args if a.startswith('-I')]
+if '-MF' in args:
+    with open(args[args.index('-MF') + 1], 'w') as dfp:
+        dfp.write('%s: %s\n' % (args[args.index('-o') + 1], args[-1]))
+if '-o' in args:
+    outputs = [(args[args.index('-o') + 1], args[-1])]
+else:
+    outputs = [(os.path.splitext(os.path.basename(a))[0] + '.o', a)
+               for a in args if a.endswith('.c')]
+for out, src in outputs:
+    with open(out, 'w') as ofp, open(src) as ifp:
+        ofp.write(ifp.read())
+        ofp.write('abs_inc=%s\n' % all(os.path.isabs(i) for i in incs))
+""")
+
+mycc = test.workpath('mycc.py')
+
+test.write('SConstruct', """
+DefaultEnvironment(tools=[])
+env = Environment(tools=['cc'],
+                  CC=r'%(_python_)s %(mycc)s',
+                  CC_BATCH=ARGUMENTS.get('batch', 1),
+                  CC_BATCH_SIZE=ARGUMENTS.get('size', 0),
+                  CC_DEPFILES=ARGUMENTS.get('depfiles', 0),
+                  CCDEPFILE='${TARGET}.d',
+                  CCDEPFLAGS='-MF $CCDEPFILE',
+                  CPPPATH=['inc'])
+VariantDir('build', 'src', duplicate=0)
+env.Object(['build/f1.c', 'build/f2.c', 'build/f3.c'])
+env.Object('src/f4.c')
+env.SharedObject('src/f4.c')
+""" % locals())
+
+for i in range(1, 5):
+    test.write(['src', 'f%d.c' % i], "f%d.c\n" % i)
+
+build = test.workpath('build', '.ccbatch-f1.o')
+build3 = test.workpath('build', '.ccbatch-f3.o')
+src_o = test.workpath('src', '.ccbatch-f4.o')
+src_os = test.workpath('src', '.ccbatch-f4.os')
+inc = test.workpath('inc')
+f1, f2, f3, f4 = [test.workpath('src', 'f%d.c' % i) for i in range(1, 5)]
+f4os = os.path.join('src', 'f4.os')
+f4c = os.path.join('src', 'f4.c')
+
+# The static and the shared object of f4.c are compiled in
+# separate scratch directories, so neither overwrites the other.
+expect = """\
+cd %(build)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f1)s %(f2)s %(f3)s
+cd %(src_o)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f4)s
+cd %(src_os)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f4)s
+""" % locals()
+test.run(arguments='-Q .', stdout=expect)
+
+test.must_match(['build', 'f1.o'], "f1.c\nabs_inc=True\n")
+test.must_match(['build', 'f2.o'], "f2.c\nabs_inc=True\n")
+test.must_match(['build', 'f3.o'], "f3.c\nabs_inc=True\n")
+test.must_match(['src', 'f4.o'], "f4.c\nabs_inc=True\n")
+test.must_match(['src', 'f4.os'], "f4.c\nabs_inc=True\n")
+test.must_not_exist(build, src_o, src_os)
+
+test.up_to_date(arguments='.')
+
+# Only the changed sources are passed to the batch.
+test.write(['src', 'f2.c'], "f2.c 2\n")
+test.write(['src', 'f3.c'], "f3.c 2\n")
+
+expect = """\
+cd %(build)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f2)s %(f3)s
+""" % locals()
+test.run(arguments='-Q .', stdout=expect)
+
+test.must_match(['build', 'f1.o'], "f1.c\nabs_inc=True\n")
+test.must_match(['build', 'f2.o'], "f2.c 2\nabs_inc=True\n")
+test.must_match(['build', 'f3.o'], "f3.c 2\nabs_inc=True\n")
+
+# $CC_BATCH_SIZE splits the sources into several batches.
+test.run(arguments='-c .')
+
+expect = """\
+cd %(build)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f1)s %(f2)s
+cd %(build3)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f3)s
+cd %(src_o)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f4)s
+cd %(src_os)s && %(_python_)s %(mycc)s -c -I%(inc)s %(f4)s
+""" % locals()
+test.run(arguments='-Q size=2 .', stdout=expect)
+
+# Without $CC_BATCH every source is compiled separately.
+test.run(arguments='-c .')
+
+expect = """\
+%(_python_)s %(mycc)s -o build/f1.o -c -Iinc src/f1.c
+%(_python_)s %(mycc)s -o build/f2.o -c -Iinc src/f2.c
+%(_python_)s %(mycc)s -o build/f3.o -c -Iinc src/f3.c
+%(_python_)s %(mycc)s -o src/f4.o -c -Iinc src/f4.c
+%(_python_)s %(mycc)s -o %(f4os)s -c -Iinc %(f4c)s
+""" % locals()
+test.run(arguments='-Q batch=0 .', stdout=expect)
+
+test.must_match(['build', 'f1.o'], "f1.c\nabs_inc=False\n")
+
+# With $CC_DEPFILES set, every source is compiled separately and
+# writes its own dependency file.
+test.run(arguments='-c .')
+
+f1d = os.path.join('build', 'f1.o.d')
+f4osd = os.path.join('src', 'f4.os.d')
+expect = """\
+%(_python_)s %(mycc)s -o build/f1.o -c -Iinc -MF build/f1.o.d src/f1.c
+%(_python_)s %(mycc)s -o build/f2.o -c -Iinc -MF build/f2.o.d src/f2.c
+%(_python_)s %(mycc)s -o build/f3.o -c -Iinc -MF build/f3.o.d src/f3.c
+%(_python_)s %(mycc)s -o src/f4.o -c -Iinc -MF src/f4.o.d src/f4.c
+%(_python_)s %(mycc)s -o %(f4os)s -c -Iinc -MF %(f4osd)s %(f4c)s
+""" % locals()
+test.run(arguments='-Q depfiles=1 .', stdout=expect)
+
+test.must_match(['build', 'f1.o'], "f1.c\nabs_inc=False\n")
+# The dependency files have been read and removed.
+test.must_not_exist(f1d, f4osd)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""
+Test that with $CC_DEPFILES set, the implicit dependencies of C objects
+are taken from the dependency files gcc writes, stored, and used on the
+next run instead of scanning.
+"""
+
+import TestSCons
+
+_exe = TestSCons._exe
+
+test = TestSCons.TestSCons()
+
+if not test.where_is('gcc'):
+    test.skip_test("Could not find 'gcc'; skipping test.\n")
+
+test.subdir('inc')
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=['gcc', 'gnulink'],
+                  CC_DEPFILES=ARGUMENTS.get('depfiles', 1),
+                  CPPPATH=['inc'])
+env.Program('prog', 'prog.c')
+""")
+
+# The scanner can't follow an #include of a macro, the compiler can.
+test.write('prog.c', """\
+#include <stdio.h>
+#include "plain.h"
+#define HEADER "macro.h"
+#include HEADER
+int main(void) { printf("%s %s\\n", PLAIN, MACRO); return 0; }
+""")
+test.write(['inc', 'plain.h'], '#define PLAIN "plain"\n')
+test.write(['inc', 'macro.h'], '#define MACRO "macro"\n')
+
+test.run(arguments='.')
+test.run(program=test.workpath('prog' + _exe), stdout="plain macro\n")
+test.must_not_exist('prog.o.d')
+test.up_to_date(arguments='.')
+
+test.write(['inc', 'macro.h'], '#define MACRO "changed"\n')
+test.not_up_to_date(arguments='prog' + _exe)
+test.run(program=test.workpath('prog' + _exe), stdout="plain changed\n")
+test.up_to_date(arguments='.')
+
+test.write(['inc', 'plain.h'], '#define PLAIN "changed"\n')
+test.not_up_to_date(arguments='prog' + _exe)
+test.run(program=test.workpath('prog' + _exe), stdout="changed changed\n")
+
+# Turning dependency files on doesn't change the build signature.
+test.write('prog.c', """\
+#include <stdio.h>
+#include "plain.h"
+int main(void) { printf("%s\\n", PLAIN); return 0; }
+""")
+test.run(arguments='depfiles=0 .')
+test.up_to_date(options='depfiles=1', arguments='.')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Test a CacheDir on an HTTP server: derived files built in one tree
+are stored on the server, and retrieved from it in a second tree
+with its own (empty) local cache directory.
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('store', 'src1', 'src2')
+
+test.write('server.py', r"""
+import http.server
+import os
+import sys
+
+store = sys.argv[1]
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        with open(os.path.join(store, 'log'), 'a') as f:
+            f.write('%s %s\n' % (self.command, self.path))
+
+    def reply(self, status, data=b''):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        path = os.path.join(store, self.path.replace('/', '_'))
+        if not os.path.exists(path):
+            return self.reply(404)
+        with open(path, 'rb') as f:
+            self.reply(200, f.read())
+
+    def do_PUT(self):
+        data = self.rfile.read(int(self.headers['Content-Length']))
+        with open(os.path.join(store, self.path.replace('/', '_')), 'wb') as f:
+            f.write(data)
+        self.reply(201)
+
+server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+with open(os.path.join(store, 'port.tmp'), 'w') as f:
+    f.write(str(server.server_address[1]))
+os.rename(os.path.join(store, 'port.tmp'), os.path.join(store, 'port'))
+server.serve_forever()
+""")
+
+server = subprocess.Popen([sys.executable, test.workpath('server.py'),
+                           test.workpath('store')])
+try:
+    port_file = test.workpath('store', 'port')
+    for _ in range(100):
+        if os.path.exists(port_file):
+            break
+        time.sleep(0.1)
+    else:
+        test.fail_test(message="the cache server did not start")
+    port = int(test.read(port_file, mode='r'))
+
+    for src in ('src1', 'src2'):
+        test.write([src, 'SConstruct'], """\
+DefaultEnvironment(tools=[])
+CacheDir('http://127.0.0.1:%(port)d/cache')
+def cat(env, source, target):
+    target = str(target[0])
+    with open('cat.out', 'a') as f:
+        f.write(target + "\\n")
+    with open(target, "w") as f:
+        for src in source:
+            with open(str(src), "r") as f2:
+                f.write(f2.read())
+env = Environment(tools=[], BUILDERS={'Cat':Builder(action=cat)})
+env.Cat('aaa.out', 'aaa.in')
+env.Cat('bbb.out', 'bbb.in')
+env.Cat('ccc.out', 'ccc.in')
+env.Cat('all', ['aaa.out', 'bbb.out', 'ccc.out'])
+""" % locals())
+        test.write([src, 'aaa.in'], "aaa.in\n")
+        test.write([src, 'bbb.in'], "bbb.in\n")
+        test.write([src, 'ccc.in'], "ccc.in\n")
+
+    # Build everything in the first tree, storing it on the server.
+    test.run(chdir='src1', arguments='-j 4 .')
+    test.must_match(['src1', 'all'], "aaa.in\nbbb.in\nccc.in\n", mode='r')
+    test.must_exist(['src1', '.scons_cache', 'config'])
+    log = test.read(['store', 'log'], mode='r')
+    test.fail_test(log.count('GET /cache/') != 4, message=log)
+    test.fail_test(log.count('PUT /cache/') != 4, message=log)
+
+    # Everything is retrieved from the server in the second tree.
+    test.run(chdir='src2', arguments='-j 4 .')
+    test.must_match(['src2', 'all'], "aaa.in\nbbb.in\nccc.in\n", mode='r')
+    test.must_not_exist(['src2', 'cat.out'])
+    test.must_contain_all_lines(test.stdout(), [
+        "Retrieved `aaa.out' from cache",
+        "Retrieved `all' from cache",
+    ])
+
+    # Once cleaned, the second tree gets everything from its
+    # local cache directory, without asking the server.
+    test.run(chdir='src2', arguments='-c .')
+    os.remove(test.workpath('store', 'log'))
+    test.run(chdir='src2', arguments='.')
+    test.must_match(['src2', 'all'], "aaa.in\nbbb.in\nccc.in\n", mode='r')
+    test.must_not_exist(['src2', 'cat.out'])
+    test.must_not_exist(['store', 'log'])
+finally:
+    server.terminate()
+    server.wait()
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
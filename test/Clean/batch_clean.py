@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test -c with --experimental=batch_clean: the same files and directories
+are removed, with the same messages, as by a plain -c.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+for i in range(20):
+    env.Command('out/f%d.out' % i, 'f.in', Copy('$TARGET', '$SOURCE'))
+env.Command('kept.out', 'f.in', Copy('$TARGET', '$SOURCE'))
+env.NoClean('kept.out')
+tree = env.Command('tree.out', 'f.in', [Copy('$TARGET', '$SOURCE'),
+                                        Mkdir('tree/a/b'),
+                                        Touch('tree/a/b/c.txt'),
+                                        Touch('tree/a/d.txt')])
+env.Clean(tree, ['tree', 'out/f0.out'])
+""")
+
+test.write('f.in', "f.in\n")
+
+outputs = {}
+for args in ['-c', '-c --experimental=batch_clean',
+             '-c -j4 --experimental=batch_clean']:
+    test.run(arguments='.')
+    test.must_exist('kept.out', ['tree', 'a', 'b', 'c.txt'])
+
+    test.run(arguments='-n ' + args + ' .')
+    test.must_exist(['out', 'f0.out'], ['tree', 'a', 'b', 'c.txt'])
+
+    test.run(arguments='-Q ' + args + ' .')
+    outputs[args] = sorted(test.stdout().splitlines())
+    test.must_exist('kept.out', 'f.in')
+    test.must_not_exist(['out', 'f0.out'], ['out', 'f19.out'], 'tree.out', 'tree')
+
+expect = sorted(["Removed %s" % os.path.join('out', 'f%d.out' % i) for i in range(20)] + [
+    "Removed tree.out",
+    "Removed %s" % os.path.join('tree', 'a', 'b', 'c.txt'),
+    "Removed directory %s" % os.path.join('tree', 'a', 'b'),
+    "Removed %s" % os.path.join('tree', 'a', 'd.txt'),
+    "Removed directory %s" % os.path.join('tree', 'a'),
+    "Removed directory tree",
+])
+for args, output in outputs.items():
+    if output != expect:
+        print("Unexpected output of %s:" % args)
+        test.diff(expect, output)
+        test.fail_test()
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
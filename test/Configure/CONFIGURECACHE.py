@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test that Configure results are shared between build trees through
+the $CONFIGURECACHE directory, as long as the headers a test found
+are unchanged, and that a custom test gets its lastTarget even when
+the result came from the cache.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons(match=TestSCons.match_exact)
+
+test.subdir('one', 'two', 'three', 'four')
+
+sconstruct = """\
+import os
+
+def CheckOutput(context):
+    context.Message('Checking program output ... ')
+    ret, output = context.TryRun('#include <stdio.h>\\nint main(void) { printf("hi"); return 0; }\\n', '.c')
+    context.Result(output)
+    return output
+
+env = Environment(CONFIGURECACHE=r'%s', CPPDEFINES=ARGUMENTS.get('define', 'ONE'),
+                  CPPPATH=['#'])
+env.AppendENVPath('PATH', os.environ['PATH'])
+conf = Configure(env, config_h='config.h', custom_tests={'CheckOutput': CheckOutput})
+conf.CheckCHeader('stdio.h')
+conf.CheckCHeader('hopefullynoc-header.h')
+conf.CheckCHeader('local.h')
+conf.CheckOutput()
+env = conf.Finish()
+""" % test.workpath('cache')
+test.write(['one', 'SConstruct'], sconstruct)
+test.write(['two', 'SConstruct'], sconstruct)
+test.write(['one', 'local.h'], "#define LOCAL 1\n")
+test.write(['two', 'local.h'], "#define LOCAL 1\n")
+
+expect = """\
+Checking for C header file stdio.h... %(cached)syes
+Checking for C header file hopefullynoc-header.h... %(cached)sno
+Checking for C header file local.h... %(local)syes
+Checking program output ... %(cached)shi
+"""
+
+def conftests(dir):
+    return [f for f in os.listdir(test.workpath(dir, '.sconf_temp'))
+            if f.startswith('conftest')]
+
+test.run(chdir='one', arguments='.',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '', 'local': ''},
+                                 build_str="scons: Configure: creating config.h\n"))
+test.must_exist(['cache', 'config'])
+test.fail_test(not conftests('one'))
+
+# The second tree builds nothing and gets the same results.
+test.run(chdir='two', arguments='.',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '(cached) ',
+                                                    'local': '(cached) '},
+                                 build_str="scons: Configure: creating config.h\n"))
+test.fail_test(conftests('two'))
+test.must_contain(['two', 'config.log'], 'taken from the configure cache')
+test.must_match(['two', 'config.h'], test.read(['one', 'config.h'], mode='r'), mode='r')
+
+# A changed header the test found is not served from the cache.
+test.write(['two', 'local.h'], "#define LOCAL 2\n")
+test.run(chdir='two', arguments='.',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '(cached) ',
+                                                    'local': ''},
+                                 build_str="scons: `.' is up to date.\n"))
+
+# Different construction variables are a different test.
+test.run(chdir='two', arguments='define=TWO .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '', 'local': ''},
+                                 build_str="scons: `.' is up to date.\n"))
+test.fail_test(not conftests('two'))
+
+# --config=force runs the tests again.
+test.run(chdir='one', arguments='--config=force .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '', 'local': ''},
+                                 build_str="scons: `.' is up to date.\n"))
+
+# A custom test reading lastTarget gets the target built for it.
+sconstruct = """\
+import os
+
+def CheckObject(context):
+    context.Message('Checking for an object file ... ')
+    ret = context.TryCompile('int object_check;\\n', '.c')
+    ok = bool(ret) and os.path.exists(context.lastTarget.get_abspath())
+    context.Result(ok)
+    return ok
+
+env = Environment(CONFIGURECACHE=r'%s')
+env.AppendENVPath('PATH', os.environ['PATH'])
+conf = Configure(env, custom_tests={'CheckObject': CheckObject})
+conf.CheckObject()
+env = conf.Finish()
+""" % test.workpath('cache')
+test.write(['three', 'SConstruct'], sconstruct)
+test.write(['four', 'SConstruct'], sconstruct)
+
+expect = test.wrap_stdout(read_str="Checking for an object file ... yes\n",
+                          build_str="scons: `.' is up to date.\n")
+test.run(chdir='three', arguments='.', stdout=expect)
+test.run(chdir='four', arguments='.', stdout=expect)
+test.must_contain(['four', 'config.log'], 'taken from the configure cache')
+test.fail_test(not conftests('four'))
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify that CheckMany() runs checks concurrently and that its results,
+messages and config.h contents are the same as running the checks
+one after another.
+"""
+
+import TestSCons
+
+test = TestSCons.TestSCons(match=TestSCons.match_exact)
+
+lib = test.Configure_lib
+
+test.write('SConstruct', """\
+import os
+import time
+
+def CheckSleep(context, n):
+    context.Message('Checking sleep %%s ... ' %% n)
+    ret, out = context.TryAction('sleep 1 && echo %%s > $TARGET' %% n)
+    context.Result(ret)
+    return ret
+
+env = Environment()
+env.AppendENVPath('PATH', os.environ['PATH'])
+conf = Configure(env, config_h='config.h', custom_tests={'CheckSleep': CheckSleep})
+checks = [
+    ('CheckFunc', 'printf'),
+    ('CheckFunc', 'noFunctionCall'),
+    ('CheckCHeader', 'stdio.h', '<>'),
+    ('CheckCHeader', 'hopefullynoc-header.h'),
+    ('CheckTypeSize', 'char', {'expect': 1}),
+    ('CheckLib', 'hopefullynolib', 'sin'),
+    ('CheckLib', '%(lib)s', 'sin'),
+]
+if ARGUMENTS.get('serial'):
+    results = [getattr(conf, check[0])(*check[1:-1], **check[-1])
+               if isinstance(check[-1], dict) else getattr(conf, check[0])(*check[1:])
+               for check in checks]
+else:
+    results = conf.CheckMany(checks)
+print(results, conf.env.get('LIBS'))
+start = time.time()
+slept = conf.CheckMany([('CheckSleep', n) for n in range(4)], jobs=4)
+print('slept', slept, time.time() - start < 3)
+env = conf.Finish()
+""" % locals())
+
+expect = """\
+Checking for C function printf()... %(cached)syes
+Checking for C function noFunctionCall()... %(cached)sno
+Checking for C header file stdio.h... %(cached)syes
+Checking for C header file hopefullynoc-header.h... %(cached)sno
+Checking char is 1 bytes... %(cached)syes
+Checking for sin() in C library hopefullynolib... %(cached)sno
+Checking for sin() in C library %(lib)s... %(cached)syes
+[True, False, True, False, 1, False, True] ['%(lib)s']
+Checking sleep 0 ... %(slept)syes
+Checking sleep 1 ... %(slept)syes
+Checking sleep 2 ... %(slept)syes
+Checking sleep 3 ... %(slept)syes
+slept [1, 1, 1, 1] %(fast)s
+"""
+
+test.run(arguments='-j4 serial=1 .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '', 'slept': '',
+                                                    'lib': lib, 'fast': 'True'},
+                                 build_str="scons: Configure: creating config.h\n"))
+serial_config_h = test.read('config.h', mode='r')
+
+# CheckMany() names the conftest files it builds from source text apart
+# from the serial checks, so those checks run again, with the same results.
+test.run(arguments='-j4 .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '',
+                                                    'slept': '(cached) ',
+                                                    'lib': lib, 'fast': 'True'},
+                                 build_str="scons: `.' is up to date.\n"))
+test.must_match('config.h', serial_config_h, mode='r')
+
+# Its names do not depend on the order the checks finish in.
+test.run(arguments='-j4 .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '(cached) ',
+                                                    'slept': '(cached) ',
+                                                    'lib': lib, 'fast': 'True'},
+                                 build_str="scons: `.' is up to date.\n"))
+test.must_match('config.h', serial_config_h, mode='r')
+
+test.run(arguments='-j4 --config=force .',
+         stdout=test.wrap_stdout(read_str=expect % {'cached': '', 'slept': '',
+                                                    'lib': lib, 'fast': 'True'},
+                                 build_str="scons: `.' is up to date.\n"))
+test.must_match('config.h', serial_config_h, mode='r')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
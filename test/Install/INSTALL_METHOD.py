@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#
+# MIT Licenxe
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Verify the ways of putting installed files in place chosen by
+$INSTALL_METHOD, and installing a directory of many files.
+"""
+
+import os
+import shutil
+import stat
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('tree', ['tree', 'sub'])
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=['install'], INSTALL_METHOD=ARGUMENTS.get('method'))
+env.Install('out', ['file.in', 'tree'])
+""")
+
+test.write('file.in', "file.in\n")
+for i in range(20):
+    test.write(['tree', 'f%d' % i], "tree/f%d\n" % i)
+test.write(['tree', 'sub', 'ro'], "tree/sub/ro\n")
+os.chmod(test.workpath('tree', 'sub', 'ro'), 0o555)
+
+def check_tree():
+    test.must_match(['out', 'file.in'], "file.in\n")
+    for i in range(20):
+        test.must_match(['out', 'tree', 'f%d' % i], "tree/f%d\n" % i)
+    test.must_match(['out', 'tree', 'sub', 'ro'], "tree/sub/ro\n")
+    if os.name == 'posix':
+        mode = stat.S_IMODE(os.stat(test.workpath('out', 'tree', 'sub', 'ro')).st_mode)
+        test.fail_test(mode != 0o555, message="mode is %o" % mode)
+    src = os.stat(test.workpath('file.in'))
+    dst = os.stat(test.workpath('out', 'file.in'))
+    test.fail_test(src.st_mtime_ns != dst.st_mtime_ns)
+
+def samefile(*path):
+    return os.path.samefile(test.workpath(*path), test.workpath('out', *path))
+
+test.run(arguments='.')
+check_tree()
+test.fail_test(samefile('file.in'))
+test.fail_test(samefile('tree', 'f0'))
+test.up_to_date(arguments='.')
+
+# Clones fall back to copies where the file system can't make them.
+shutil.rmtree(test.workpath('out'))
+test.run(arguments='method=reflink-copy .')
+check_tree()
+test.fail_test(samefile('file.in'))
+
+if hasattr(os, 'link'):
+    shutil.rmtree(test.workpath('out'))
+    test.run(arguments='method=hard .')
+    check_tree()
+    test.fail_test(not samefile('file.in'))
+    test.fail_test(not samefile('tree', 'f0'))
+
+    # Copying over a hard link leaves the source alone.
+    test.write('file.in', "file.in 2\n")
+    test.run(arguments='method=copy .')
+    test.must_match(['out', 'file.in'], "file.in 2\n")
+    test.fail_test(samefile('file.in'))
+    test.write(['out', 'file.in'], "changed\n")
+    test.must_match('file.in', "file.in 2\n")
+
+shutil.rmtree(test.workpath('out'))
+test.run(arguments='method=bogus .', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), [
+    "Invalid $INSTALL_METHOD 'bogus': 'bogus' is not one of copy, hard, reflink",
+])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Verify that the experimental ready-queue Taskmaster core
+(--experimental=tm_ready_queue) builds targets in dependency order,
+including dependencies on generated files that are only found by
+scanning a generated file, and side effects shared between targets.
+"""
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.write('expand.py', r"""
+import sys
+import time
+
+def expand(path, out):
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#include '):
+                expand(line.split()[1].strip('"'), out)
+            else:
+                out.write(line)
+
+time.sleep(0.2)
+with open(sys.argv[1], 'w') as out:
+    for src in sys.argv[2:]:
+        expand(src, out)
+with open('log.txt', 'a') as f:
+    f.write(sys.argv[1] + '\n')
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[], CPPPATH=['.'])
+Expand = Builder(action=r'%(_python_)s expand.py $TARGET $SOURCES',
+                 source_scanner=CScanner)
+env.Append(BUILDERS={'Expand': Expand})
+env.Command('gen.h', 'gen.in', Copy('$TARGET', '$SOURCE'))
+env.Command('inner.h', 'inner.in', Copy('$TARGET', '$SOURCE'))
+outs = []
+for n in range(1, 9):
+    outs.extend(env.Expand('f%%d.out' %% n, 'f%%d.c' %% n))
+SideEffect('log.txt', outs)
+env.Expand('all.out', outs)
+""" % locals())
+
+test.write('gen.in', '#include "inner.h"\ngen 1\n')
+test.write('inner.in', "inner\n")
+for n in range(1, 9):
+    test.write('f%d.c' % n, '#include "gen.h"\nf%d\n' % n)
+
+all_out = ''.join(["inner\ngen 1\nf%d\n" % n for n in range(1, 9)])
+
+flags = '-j 4 --experimental=tm_ready_queue'
+test.run(arguments=flags + ' all.out')
+test.must_match('f1.out', "inner\ngen 1\nf1\n", mode='r')
+test.must_match('all.out', all_out, mode='r')
+test.up_to_date(options=flags, arguments='all.out')
+
+test.write('gen.in', '#include "inner.h"\ngen 2\n')
+test.run(arguments=flags + ' all.out')
+test.must_match('all.out', all_out.replace('gen 1', 'gen 2'), mode='r')
+test.up_to_date(options=flags, arguments='all.out')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Verify that env.ResourcePool() limits how many actions of the targets
+in a pool run at the same time in a parallel build, while other
+targets still build with the full parallelism.
+"""
+
+import os
+import shutil
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.write('build.py', r"""
+import os
+import sys
+import time
+
+kind, target, source = sys.argv[1:]
+marker = os.path.join('running', kind + '-' + os.path.basename(target))
+open(marker, 'w').close()
+running = [f for f in os.listdir('running') if f.startswith(kind + '-')]
+with open(os.path.join('counts', os.path.basename(target)), 'w') as f:
+    f.write('%d\n' % len(running))
+time.sleep(0.5)
+os.remove(marker)
+with open(target, 'w') as out, open(source) as src:
+    out.write(src.read())
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.ResourcePool('link', 2)
+Build = Builder(action=r'%(_python_)s build.py $KIND $TARGET $SOURCE')
+Link = Builder(action=r'%(_python_)s build.py link $TARGET $SOURCE',
+               RESOURCE_POOL='link')
+env.Append(BUILDERS={'Build': Build, 'Link': Link})
+for n in range(6):
+    env.Link('l%%d.out' %% n, 'in.txt')
+    env.Build('b%%d.out' %% n, 'in.txt', KIND='build')
+env.Build('p.out', 'in.txt', KIND='link', RESOURCE_POOL='link')
+""" % locals())
+
+test.write('in.txt', "in.txt\n")
+
+def max_count(prefix):
+    counts = []
+    for name in os.listdir(test.workpath('counts')):
+        if name.startswith(prefix):
+            counts.append(int(test.read(['counts', name], mode='r')))
+    return max(counts)
+
+for flags in ['-j 8', '-j 8 --experimental=tm_v2']:
+    test.subdir('running', 'counts')
+    test.run(arguments=flags + ' .')
+    test.must_match('l0.out', "in.txt\n", mode='r')
+    test.must_match('p.out', "in.txt\n", mode='r')
+    test.fail_test(max_count('l') > 2 or max_count('p') > 2,
+                   message="more than 2 actions of the 'link' pool ran at once")
+    test.fail_test(max_count('b') < 3,
+                   message="actions outside the pool did not run in parallel")
+    test.up_to_date(options=flags, arguments='.')
+    test.run(arguments='-c .')
+    shutil.rmtree(test.workpath('counts'))
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Verify that reading sources ahead of the Taskmaster
+(--experimental=scan_ahead) finds the same dependencies, including
+those on generated headers only found by scanning a generated file,
+and picks up headers changed between builds.
+"""
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.write('expand.py', r"""
+import sys
+
+def expand(path, out):
+    with open(path) as f:
+        for line in f:
+            if line.startswith('#include '):
+                name = line.split()[1].strip('"')
+                for d in ('.', 'inc'):
+                    try:
+                        expand(d + '/' + name, out)
+                    except OSError:
+                        continue
+                    break
+            else:
+                out.write(line)
+
+with open(sys.argv[1], 'w') as out:
+    for src in sys.argv[2:]:
+        expand(src, out)
+""")
+
+test.subdir('inc')
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[], CPPPATH=['inc'])
+Expand = Builder(action=r'%(_python_)s expand.py $TARGET $SOURCES',
+                 source_scanner=CScanner)
+env.Append(BUILDERS={'Expand': Expand})
+env.Command('gen.h', 'gen.in', Copy('$TARGET', '$SOURCE'))
+outs = []
+for n in range(1, 9):
+    outs.extend(env.Expand('f%%d.out' %% n, 'f%%d.c' %% n))
+env.Expand('all.out', outs)
+""" % locals())
+
+test.write('gen.in', '#include "common.h"\ngen\n')
+test.write(['inc', 'common.h'], '#include "inner.h"\ncommon 1\n')
+test.write(['inc', 'inner.h'], 'inner 1\n')
+for n in range(1, 9):
+    test.write('f%d.c' % n, '#include "gen.h"\n#include "common.h"\nf%d\n' % n)
+
+def expected(common, inner):
+    return ''.join(["inner %d\ncommon %d\ngen\ninner %d\ncommon %d\nf%d\n"
+                    % (inner, common, inner, common, n) for n in range(1, 9)])
+
+for flags in ('-j 4 --experimental=scan_ahead',
+              '-j 4 --experimental=scan_ahead,tm_v2'):
+    test.write(['inc', 'common.h'], '#include "inner.h"\ncommon 1\n')
+    test.write(['inc', 'inner.h'], 'inner 1\n')
+    test.run(arguments=flags + ' all.out')
+    test.must_match('all.out', expected(1, 1), mode='r')
+    test.up_to_date(options=flags, arguments='all.out')
+
+    test.write(['inc', 'inner.h'], 'inner 2\n')
+    test.run(arguments=flags + ' all.out')
+    test.must_match('all.out', expected(1, 2), mode='r')
+    test.up_to_date(options=flags, arguments='all.out')
+
+    test.write(['inc', 'common.h'], '#include "inner.h"\ncommon 2\n')
+    test.run(arguments=flags + ' all.out')
+    test.must_match('all.out', expected(2, 2), mode='r')
+    test.up_to_date(options=flags, arguments='all.out')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
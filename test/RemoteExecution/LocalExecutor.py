@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Test running command actions through $REMOTE_EXECUTOR with the
+LocalExecutor stand-in: commands run in a sandbox holding the files the
+targets depend on, the targets come back through the content store,
+and failures are reported as usual.
+"""
+
+import os
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+if os.name != 'posix':
+    TestSCons.TestSCons().skip_test("Remote execution is only supported on POSIX; skipping test.\n")
+
+test = TestSCons.TestSCons()
+
+test.subdir('tools', 'src')
+
+test.write(['tools', 'build.py'], r"""
+import os
+import sys
+
+target = sys.argv[1]
+with open(target, 'w') as out:
+    for src in sys.argv[2:]:
+        with open(src) as f:
+            out.write(f.read())
+    out.write('cwd=%s\n' % os.path.basename(os.getcwd()))
+print("built %s" % target)
+""")
+
+test.write('SConstruct', """\
+from SCons.Taskmaster.Remote import LocalExecutor
+DefaultEnvironment(tools=[])
+env = Environment(tools=[], REMOTE_EXECUTOR=LocalExecutor(workers=2))
+B = Builder(action=r'%(_python_)s tools/build.py $TARGET $SOURCES')
+env.Append(BUILDERS={'B': B})
+env.B('out/one.txt', 'src/one.in')
+env.B('out/two.txt', ['src/two.in', 'out/one.txt'])
+env.B('out/three.txt', 'src/three.in')
+env.Depends('out/three.txt', 'src/header.h')
+env.Command('out/here.txt', 'src/one.in',
+            'cat ../src/one.in > ${TARGET.file}', chdir=1)
+env.Command('out/fail.txt', 'src/one.in', 'echo failing; exit 3')
+""" % locals())
+
+test.write(['src', 'one.in'], "one.in\n")
+test.write(['src', 'two.in'], "two.in\n")
+test.write(['src', 'three.in'], "three.in\n")
+test.write(['src', 'header.h'], "header.h\n")
+
+# Actions with chdir are not safe in a parallel build, so leave
+# out/here.txt out of this one.
+targets = 'out/one.txt out/two.txt out/three.txt out/fail.txt'
+test.run(arguments='-k -j 3 ' + targets, status=2, stderr=None)
+test.must_contain_all_lines(test.stdout(), [
+    "built out/one.txt\n",
+    "built out/two.txt\n",
+    "failing\n",
+])
+test.must_contain_all_lines(test.stderr(), ["scons: *** [out/fail.txt] Error 3"])
+
+def sandboxed(name):
+    cwd = test.read(['out', name], mode='r').splitlines()[-1]
+    return cwd.startswith('cwd=scons-remote-')
+
+test.fail_test(not sandboxed('one.txt'), message=test.read(['out', 'one.txt']))
+test.fail_test(not sandboxed('two.txt'), message=test.read(['out', 'two.txt']))
+test.must_contain(['out', 'two.txt'], "two.in\none.in\ncwd=", mode='r')
+test.must_exist('.scons_store')
+
+# An action which changes directory runs there.
+test.run(arguments='out/here.txt')
+test.must_match(['out', 'here.txt'], "one.in\n", mode='r')
+test.up_to_date(arguments='out/one.txt out/two.txt out/three.txt')
+
+# A dependency the command does not name on its command line
+# still causes a rebuild, and is still sent to the executor.
+test.write(['src', 'header.h'], "header.h 2\n")
+test.run(arguments='out/three.txt')
+test.must_contain_all_lines(test.stdout(), ["built out/three.txt\n"])
+test.fail_test(not sandboxed('three.txt'), message=test.read(['out', 'three.txt']))
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
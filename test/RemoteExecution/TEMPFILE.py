@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Test that a command line put in a $TEMPFILE response file runs through
+$REMOTE_EXECUTOR: the response file, in a temporary directory outside
+the top-level directory, is sent along with the inputs.
+"""
+
+import os
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+if os.name != 'posix':
+    TestSCons.TestSCons().skip_test("Remote execution is only supported on POSIX; skipping test.\n")
+
+test = TestSCons.TestSCons()
+
+test.subdir('src')
+
+test.write('build.py', r"""
+import os
+import sys
+
+args = sys.argv[1:]
+if len(args) == 1 and args[0].startswith('@'):
+    # The response file has to come with the inputs: a real executor
+    # cannot read this machine's temporary directory.
+    if os.path.isabs(args[0][1:]):
+        sys.exit("response file not in the sandbox: %s" % args[0])
+    with open(args[0][1:]) as f:
+        args = f.read().split()
+    print("response file")
+target = args[0]
+with open(target, 'w') as out:
+    for src in args[1:]:
+        with open(src) as f:
+            out.write(f.read())
+    out.write('cwd=%s\n' % os.path.basename(os.getcwd()))
+""")
+
+test.write('SConstruct', """\
+from SCons.Taskmaster.Remote import LocalExecutor
+DefaultEnvironment(tools=[])
+env = Environment(tools=[], REMOTE_EXECUTOR=LocalExecutor(workers=1),
+                  MAXLINELENGTH=16)
+env.Command('out.txt', ['src/one.in', 'src/two.in'],
+            r'%(_python_)s ${TEMPFILE("build.py $TARGET $SOURCES")}')
+""" % locals())
+
+test.write(['src', 'one.in'], "one.in\n")
+test.write(['src', 'two.in'], "two.in\n")
+
+test.run(arguments='-Q out.txt')
+test.must_contain_all_lines(test.stdout(), ["Using tempfile", "response file\n"])
+out = test.read('out.txt', mode='r').splitlines()
+test.fail_test(out[:2] != ['one.in', 'two.in'], message=str(out))
+test.fail_test(not out[2].startswith('cwd=scons-remote-'), message=str(out))
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
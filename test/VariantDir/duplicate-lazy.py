@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Verify VariantDir(duplicate='lazy'): a source is duplicated only when
+an action that uses it is about to run, and kept while it's current.
+"""
+
+import os
+
+import TestSCons
+
+test = TestSCons.TestSCons(match=TestSCons.match_re_dotall)
+
+test.subdir('src', ['src', 'sub'])
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+SConscript('src/SConscript', variant_dir='build', duplicate='lazy')
+""")
+
+test.write(['src', 'SConscript'], """\
+def cat(target, source, env):
+    with open(str(target[0]), 'w') as ofp:
+        for s in source + target[0].depends:
+            with open(str(s)) as ifp:
+                ofp.write(ifp.read())
+
+env = Environment(tools=[])
+one = env.Command('one.out', 'one.in', cat)
+env.Depends(one, 'sub/one.dep')
+env.Command('two.out', 'two.in', cat)
+Glob('*.unused')
+""")
+
+test.write(['src', 'one.in'], "one.in\n")
+test.write(['src', 'sub', 'one.dep'], "one.dep\n")
+test.write(['src', 'two.in'], "two.in\n")
+for i in range(5):
+    test.write(['src', 'file%d.unused' % i], "unused\n")
+
+# Nothing is duplicated with -n.
+test.run(arguments='-n .')
+test.must_not_exist('build')
+
+# Only what the built target needs is duplicated.
+test.run(arguments='--debug=duplicate build/one.out')
+test.must_contain_all_lines(test.stdout(), [
+    "dup: linking lazy variant 'build/SConscript' from 'src/SConscript'",
+    "dup: linking lazy variant 'build/one.in' from 'src/one.in'",
+    "dup: linking lazy variant '%s' from '%s'"
+    % (os.path.join('build', 'sub', 'one.dep'),
+       os.path.join('src', 'sub', 'one.dep')),
+])
+test.must_match(['build', 'one.out'], "one.in\none.dep\n")
+test.must_exist(['build', 'one.in'])
+test.must_exist(['build', 'sub', 'one.dep'])
+test.must_not_exist(['build', 'two.in'])
+test.must_not_exist(['build', 'file0.unused'])
+
+# The other target's source is duplicated when it's built, and
+# up-to-date targets don't duplicate anything.
+test.run(arguments='--debug=duplicate .')
+test.must_contain_all_lines(test.stdout(), [
+    "dup: linking lazy variant 'build/two.in' from 'src/two.in'",
+])
+test.must_not_contain_any_line(test.stdout(), ["build/one.in"])
+test.must_match(['build', 'two.out'], "two.in\n")
+test.must_not_exist(['build', 'file0.unused'])
+
+test.up_to_date(arguments='.')
+
+# Copies are replaced when the source changes.
+test.run(arguments='--duplicate=copy --debug=duplicate .')
+test.must_not_contain_any_line(test.stdout(), ["dup: linking"])
+test.unlink(['src', 'two.in'])
+test.write(['src', 'two.in'], "two.in 2\n")
+test.run(arguments='--duplicate=copy --debug=duplicate .')
+test.must_contain_all_lines(test.stdout(), [
+    "dup: linking lazy variant 'build/two.in' from 'src/two.in'",
+])
+test.must_match(['build', 'two.in'], "two.in 2\n")
+test.must_match(['build', 'two.out'], "two.in 2\n")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+VariantDir('build2', 'src', duplicate='later')
+""")
+test.run(arguments='.', status=2, stderr="""
+scons: \\*\\*\\* Invalid duplicate value 'later' for VariantDir 'build2'; use a boolean or 'lazy'.
+File ".*SConstruct", line 2, in <module>
+""")
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+
+"""
+Test that members compressed in a pool of threads ($ZIP_JOBS) make the
+same archive as members compressed one at a time, and that large files
+are stored intact.
+"""
+
+import os
+import zipfile
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.subdir('src', ['src', 'sub'])
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=['zip'], ZIP_OVERRIDE_TIMESTAMP=(1980, 1, 1, 0, 0, 0))
+env.Zip('serial.zip', 'src', ZIP_JOBS=1)
+env.Zip('parallel.zip', 'src', ZIP_JOBS=4)
+env.Zip('stored.zip', 'src', ZIP_JOBS=4, ZIPCOMPRESSION=0)
+""")
+
+contents = {}
+for n in range(10):
+    name = 'src/file%d' % n
+    contents[name] = ("file %d\n" % n) * 1000 * n
+    test.write(name, contents[name])
+# Bigger than the chunks file data is copied in.
+contents['src/sub/big'] = ''.join("line %d\n" % n for n in range(300000))
+test.write(['src', 'sub', 'big'], contents['src/sub/big'])
+contents['src/sub/empty'] = ''
+test.write(['src', 'sub', 'empty'], '')
+
+test.run(arguments='.', stderr=None)
+
+for archive in ('serial.zip', 'parallel.zip', 'stored.zip'):
+    with zipfile.ZipFile(test.workpath(archive)) as zf:
+        test.fail_test(zf.testzip() is not None, message=archive)
+        found = {n: zf.read(n).decode() for n in zf.namelist()}
+        test.fail_test(found != contents, message=archive)
+
+test.fail_test(test.read('parallel.zip') != test.read('serial.zip'),
+               message='parallel.zip differs from serial.zip')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
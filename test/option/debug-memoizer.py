@@ -29,6 +29,7 @@ Test calling the --debug=memoizer option.
 """
 
 import os
+import re
 
 import TestSCons
 
@@ -42,6 +43,9 @@ def cat(target, source, env):
         f.write(infp.read())
 env = Environment(tools=[], BUILDERS={'Cat':Builder(action=Action(cat))})
 env.Cat('file.out', 'file.in')
+env['GREETING'] = 'hello'
+for _ in range(3):
+    env.subst('$GREETING')
 """)
 
 test.write('file.in', "file.in\n")
@@ -62,6 +66,11 @@ expect = [
 for args in ['-h --debug=memoizer', '--debug=memoizer']:
     test.run(arguments = args)
     test.must_contain_any_line(test.stdout(), expect)
+    # target-independent substitutions are memoized per environment
+    test.must_contain_all_lines(
+        test.stdout(),
+        ["      2 hits       1 misses    SConsEnvironment._subst_no_target()"],
+    )
 
 test.must_match('file.out', "file.in\n")
 
@@ -80,6 +89,22 @@ test.must_contain_any_line(test.stdout(), expect)
 test.must_match('file.out', "file.in\n")
 
 
+# The action signature and the source infos are computed once per
+# Executor, and shared by all of its targets.
+test.write('SConstruct', """
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command(['t1.out', 't2.out', 't3.out'], 'file.in', Touch('$TARGETS'))
+""")
+
+test.run(arguments = 't1.out')
+
+for expr in [r'^ +0 hits +\d+ misses +Executor\.get_contents\(\)$',
+             r'^ +[1-9]\d* hits +\d+ misses +Executor\.get_contents_sig\(\)$',
+             r'^ +2 hits +\d+ misses +Executor\.get_source_sigs\(\)$']:
+    if not re.search(expr, test.stdout(), re.M):
+        print("No line matching %s in output:\n%s" % (expr, test.stdout()))
+        test.fail_test()
 
 test.pass_test()
 
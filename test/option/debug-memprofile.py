@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""
+Test that the --debug=memprofile option works.
+"""
+
+import json
+import re
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """
+DefaultEnvironment(tools=[])
+def cat(target, source, env):
+    with open(str(target[0]), 'wb') as f, open(str(source[0]), 'rb') as ifp:
+        f.write(ifp.read())
+env = Environment(tools=[], BUILDERS={'Cat':Builder(action=Action(cat))})
+env.Cat('file.out', 'file.in')
+""")
+
+test.write('file.in', "file.in\n")
+
+test.run(arguments='--debug=memprofile,json')
+
+stdout = test.stdout()
+phases = re.findall(r'^Memory profile (.*)$', stdout, re.M)
+test.fail_test(phases != ['after reading SConscript files:',
+                          'after building targets:',
+                          'after writing .sconsign file:'],
+               message="phases: %s" % phases)
+test.must_contain_all_lines(stdout, [
+    "   Top allocation sites:",
+    "   Largest changes since the previous phase:",
+    "   Object counts:",
+])
+test.fail_test(re.search(r'^ +\d+ +\+\d+  File$', stdout, re.M) is None)
+test.fail_test(re.search(r'^ +\d+ +\+0  SConsEnvironment$', stdout, re.M) is None)
+
+with open(test.workpath('scons_stats.json')) as f:
+    profile = json.load(f)['Memory profile']
+test.fail_test(list(profile) != phases)
+after_build = profile['after building targets:']
+test.fail_test(after_build['objects']['Executor'] < 1)
+test.fail_test(not after_build['top'])
+test.fail_test(after_build['current'] > after_build['peak'])
+
+test.run(arguments='-h --debug=memprofile')
+phases = re.findall(r'^Memory profile (.*)$', test.stdout(), re.M)
+test.fail_test(phases != ['after reading SConscript files:'],
+               message="phases: %s" % phases)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
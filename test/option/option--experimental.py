@@ -37,12 +37,15 @@ tests = [
     ('.', []),
     ('--experimental=ninja', ['ninja']),
     ('--experimental=tm_v2', ['tm_v2']),
-    ('--experimental=all', ['ninja', 'tm_v2', 'transporter', 'warp_speed']),
+    ('--experimental=tm_ready_queue', ['tm_ready_queue']),
+    ('--experimental=scan_ahead', ['scan_ahead']),
+    ('--experimental=batch_clean', ['batch_clean']),
+    ('--experimental=all', ['batch_clean', 'ninja', 'scan_ahead', 'tm_ready_queue', 'tm_v2', 'transporter', 'warp_speed']),
     ('--experimental=none', []),
 ]
 
 for args, exper in tests:
-    read_string = """All Features=ninja,tm_v2,transporter,warp_speed
+    read_string = """All Features=batch_clean,ninja,scan_ahead,tm_ready_queue,tm_v2,transporter,warp_speed
 Experimental=%s
 """ % (exper)
     test.run(arguments=args,
@@ -51,7 +54,7 @@ Experimental=%s
 test.run(arguments='--experimental=warp_drive',
          stderr="""usage: scons [OPTIONS] [VARIABLES] [TARGETS]
 
-SCons Error: option --experimental: invalid choice: 'warp_drive' (choose from 'all','none','ninja','tm_v2','transporter','warp_speed')
+SCons Error: option --experimental: invalid choice: 'warp_drive' (choose from 'all','none','batch_clean','ninja','scan_ahead','tm_ready_queue','tm_v2','transporter','warp_speed')
 """,
          status=2)
 
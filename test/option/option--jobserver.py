@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+__revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
+
+"""
+Test GNU make jobserver support: SCons started by "make -j2" with
+--jobserver=auto takes its job tokens from make's jobserver, and runs
+no more than two jobs at once without being given -j; without -j or
+--jobserver it stays serial; with --jobserver=server, a make run by a
+build command shares the jobserver SCons makes for the build.
+"""
+
+import os
+import shutil
+import sys
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+if os.name != 'posix':
+    TestSCons.TestSCons().skip_test("Jobservers are only supported on POSIX; skipping test.\n")
+
+test = TestSCons.TestSCons()
+
+make = test.where_is('make')
+if not make:
+    test.skip_test("Could not find 'make'; skipping test.\n")
+
+os.environ.pop('MAKEFLAGS', None)
+os.environ.pop('MFLAGS', None)
+
+test.write('build.py', r"""
+import os
+import sys
+import time
+
+target, source = sys.argv[1:]
+marker = os.path.join('running', os.path.basename(target))
+open(marker, 'w').close()
+with open(os.path.join('counts', os.path.basename(target)), 'w') as f:
+    f.write('%d\n' % len(os.listdir('running')))
+time.sleep(0.3)
+os.remove(marker)
+with open(target, 'w') as out, open(source) as src:
+    out.write(src.read())
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+Build = Builder(action=r'%(_python_)s build.py $TARGET $SOURCE')
+env.Append(BUILDERS={'Build': Build})
+for n in range(6):
+    env.Build('f%%d.out' %% n, 'in.txt')
+""" % locals())
+
+test.write('in.txt', "in.txt\n")
+
+test.write('Makefile', """\
+all:
+\t+%s %s -Q $(ARGS) .
+""" % (sys.executable, test.program))
+
+def max_running(make_args, scons_args=''):
+    test.subdir('running', 'counts')
+    test.run(program=make, arguments=['-s', make_args, 'ARGS=' + scons_args],
+             stderr=None)
+    test.must_match('f5.out', "in.txt\n", mode='r')
+    test.fail_test('jobserver' in test.stderr(), message=test.stderr())
+    counts = [int(test.read(['counts', name], mode='r'))
+              for name in os.listdir(test.workpath('counts'))]
+    test.run(arguments='-c .')
+    shutil.rmtree(test.workpath('counts'))
+    return max(counts)
+
+test.fail_test(max_running('-j2') != 1,
+               message="a build without -j or --jobserver was not serial")
+test.fail_test(max_running('-j2', '--jobserver=auto') != 2,
+               message="the build did not run two jobs from make's jobserver")
+test.fail_test(max_running('-j2', '--jobserver=auto --experimental=tm_v2') != 2,
+               message="the build did not run two jobs from make's jobserver")
+test.fail_test(max_running('-j2', '-j6') > 2,
+               message="the build took more jobs than make's jobserver holds")
+test.fail_test(max_running('-j2', '--jobserver=none') != 1,
+               message="--jobserver=none did not ignore make's jobserver")
+
+# Test that a make run by a build command shares our jobserver.
+test.write('sub.mk', """\
+all:
+\t@echo "$(MAKEFLAGS)" > flags.txt
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('flags.txt', 'sub.mk', r'%(make)s -s -f $SOURCE')
+""" % locals())
+
+test.run(arguments='--jobserver=server -j3 .', stderr=None)
+test.fail_test('jobserver' in test.stderr(), message=test.stderr())
+test.must_contain('flags.txt', '--jobserver-auth=', mode='r')
+test.must_contain('flags.txt', 'j3', mode='r')
+
+test.run(arguments='-c .')
+test.run(arguments='-j3 .', stderr=None)
+test.must_not_contain('flags.txt', '--jobserver-auth=', mode='r')
+
+test.run(arguments='--jobserver=bogus', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(), ["invalid choice: 'bogus'"])
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
@@ -39,7 +39,7 @@ test.run(arguments='-Q --tree=foofoo',
          stderr="""usage: scons [OPTIONS] [VARIABLES] [TARGETS]
 
 SCons Error: `foofoo' is not a valid --tree option type, try:
-    all, derived, prune, status, linedraw
+    all, derived, prune, status, linedraw, json
 """,
          status=2)
 
@@ -24,17 +24,95 @@
 
 __revision__ = "__FILE__ __REVISION__ __DATE__ __DEVELOPER__"
 
+"""
+Test that the -l, --load-average and --max-load options keep a
+parallel build from starting new jobs while the load average is at
+or above the limit, and that --min-free-mem does the same while too
+little memory is available.  A limit of 0 load, or a minimum of more
+memory than any machine has, makes the build run one job at a time.
+"""
+
+import os
+import shutil
+
 import TestSCons
 
+_python_ = TestSCons._python_
+
+if not hasattr(os, 'getloadavg'):
+    TestSCons.TestSCons().skip_test("No os.getloadavg(); skipping test.\n")
+
 test = TestSCons.TestSCons()
 
-test.write('SConstruct', "")
+test.write('build.py', r"""
+import os
+import sys
+import time
+
+target, source = sys.argv[1:]
+marker = os.path.join('running', os.path.basename(target))
+open(marker, 'w').close()
+with open(os.path.join('counts', os.path.basename(target)), 'w') as f:
+    f.write('%d\n' % len(os.listdir('running')))
+time.sleep(0.3)
+os.remove(marker)
+with open(target, 'w') as out, open(source) as src:
+    out.write(src.read())
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+Build = Builder(action=r'%(_python_)s build.py $TARGET $SOURCE')
+env.Append(BUILDERS={'Build': Build})
+for n in range(6):
+    env.Build('f%%d.out' %% n, 'in.txt')
+""" % locals())
+
+test.write('in.txt', "in.txt\n")
+
+def max_running(options):
+    test.subdir('running', 'counts')
+    test.run(arguments='-j 4 %s .' % options)
+    test.must_match('f5.out', "in.txt\n", mode='r')
+    counts = [int(test.read(['counts', name], mode='r'))
+              for name in os.listdir(test.workpath('counts'))]
+    test.run(arguments='-c .')
+    shutil.rmtree(test.workpath('counts'))
+    return max(counts)
+
+for option in ['-l 0', '--load-average=0', '--max-load=0', '--min-free-mem=1000T']:
+    test.fail_test(max_running(option) != 1,
+                   message="%s did not keep the build to one job" % option)
+    test.fail_test(max_running('--experimental=tm_v2 ' + option) != 1,
+                   message="%s did not keep the build to one job" % option)
+
+test.fail_test(max_running('--max-load=10000 --min-free-mem=1K') < 2,
+               message="jobs were held back below the limits")
+
+# Test that Set/GetOption works:
+test.write('SConstruct', """
+DefaultEnvironment(tools=[])
+assert GetOption('max_load') is None
+assert GetOption('min_free_mem') is None
+SetOption('max_load', '2.5')
+SetOption('min_free_mem', '2G')
+assert GetOption('max_load') == 2.5
+assert GetOption('min_free_mem') == 2 * 1024 ** 3
+""")
+
+test.run()
 
-test.option_not_yet_implemented('-l', '1 .')
+test.write('SConstruct', """
+DefaultEnvironment(tools=[])
+assert GetOption('min_free_mem') == 512 * 1024 ** 2
+""")
 
-test.option_not_yet_implemented('--load-average', '=1 .')
+test.run(arguments='--min-free-mem=512M')
 
-test.option_not_yet_implemented('--max-load', '=1 .')
+test.run(arguments='--min-free-mem=lots', status=2, stderr=None)
+test.must_contain_all_lines(test.stderr(),
+                            ["`lots' is not a valid memory size"])
 
 test.pass_test()
 
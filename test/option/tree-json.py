@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+Test that --tree=json prints the dependency graph as JSON lines,
+with each shared node printed only once.
+"""
+
+import json
+
+import TestSCons
+
+test = TestSCons.TestSCons()
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('shared.out', 'shared.in', Copy('$TARGET', '$SOURCE'))
+env.Command('one.out', ['one.in', 'shared.out'], Copy('$TARGET', '$SOURCE'))
+env.Command('two.out', ['two.in', 'shared.out'], Copy('$TARGET', '$SOURCE'))
+env.Command('all.out', ['one.out', 'two.out'], Copy('$TARGET', '$SOURCE'))
+""")
+
+for name in ('shared.in', 'one.in', 'two.in'):
+    test.write(name, name + "\n")
+
+def records(stdout):
+    return [json.loads(line) for line in stdout.splitlines()
+            if line.startswith('{')]
+
+test.run(arguments='-Q --tree=all,json all.out')
+expect = [
+    {'name': 'all.out', 'children': ['one.out', 'two.out'], 'root': True},
+    {'name': 'one.out', 'children': ['one.in', 'shared.out']},
+    {'name': 'one.in', 'children': []},
+    {'name': 'shared.out', 'children': ['shared.in']},
+    {'name': 'shared.in', 'children': []},
+    {'name': 'two.out', 'children': ['two.in', 'shared.out']},
+    {'name': 'two.in', 'children': []},
+]
+test.fail_test(records(test.stdout()) != expect, message=test.stdout())
+
+test.run(arguments='-Q --tree=derived,json all.out')
+expect = [
+    {'name': 'all.out', 'children': ['one.out', 'two.out'], 'root': True},
+    {'name': 'one.out', 'children': ['shared.out']},
+    {'name': 'shared.out', 'children': []},
+    {'name': 'two.out', 'children': ['shared.out']},
+]
+test.fail_test(records(test.stdout()) != expect, message=test.stdout())
+
+test.run(arguments='-Q --tree=json,status all.out')
+lines = records(test.stdout())
+test.fail_test([r['name'] for r in lines] !=
+               ['all.out', 'one.out', 'one.in', 'shared.out', 'shared.in',
+                'two.out', 'two.in'], message=test.stdout())
+status = lines[0]['status']
+test.fail_test(not (status['exists'] and status['current'] and
+                    status['explicit_builder'] and not status['precious']),
+               message=test.stdout())
+test.fail_test(lines[2]['status']['builder'], message=test.stdout())
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
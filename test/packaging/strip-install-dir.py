@@ -54,7 +54,7 @@ expected = """scons: Reading SConscript files ...
 scons: done reading SConscript files.
 scons: Building targets ...
 Copy file(s): "main.c" to "foo-1.2.3{os_sep}bin{os_sep}main.c"
-tar -zc -f foo-1.2.3.tar.gz foo-1.2.3{os_sep}bin{os_sep}main.c
+tar_builder(["foo-1.2.3.tar.gz"], ["foo-1.2.3{os_sep}bin{os_sep}main.c"])
 scons: done building targets.
 """.format(os_sep=os.sep)
 
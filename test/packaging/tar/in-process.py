@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+#
+# __COPYRIGHT__
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""
+Test that the tar packagers write the archives themselves, so they
+work without tar or a compression program on the PATH, and that they
+run a $TARCOM changed by the user instead.
+"""
+
+import tarfile
+
+import TestSCons
+
+_python_ = TestSCons._python_
+
+test = TestSCons.TestSCons()
+
+test.subdir('src')
+test.write(['src', 'main.c'], "int main(void) { return 0; }\n")
+test.write(['src', 'util.h'], "#define UTIL 1\n")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=['packaging', 'filesystem', 'tar'], ENV={'PATH': ''})
+for packagetype, suffix in [('src_targz', 'gz'),
+                            ('src_tarbz2', 'bz2'),
+                            ('src_tarxz', 'xz')]:
+    env.Package(PACKAGETYPE=packagetype,
+                NAME='src',
+                VERSION='1.0',
+                target='src-%s.tar.%s' % (suffix, suffix),
+                PACKAGEROOT='src-1.0',
+                source=['src/main.c', 'src/util.h'])
+""")
+
+test.run(arguments='.', stderr=None)
+
+for suffix in ('gz', 'bz2', 'xz'):
+    with tarfile.open(test.workpath('src-%s.tar.%s' % (suffix, suffix)),
+                      'r:' + suffix) as tf:
+        names = sorted(tf.getnames())
+        test.fail_test(names != ['src-1.0/src/main.c', 'src-1.0/src/util.h'],
+                       message=repr(names))
+        data = tf.extractfile('src-1.0/src/util.h').read()
+        test.fail_test(data != b"#define UTIL 1\n", message=repr(data))
+
+test.write('mytar.py', r"""
+import sys
+with open(sys.argv[1], 'w') as f:
+    f.write(' '.join(sys.argv[2:]) + '\n')
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=['packaging', 'filesystem', 'tar'],
+                  TARCOM=r'%(_python_)s mytar.py $TARGET $TARFLAGS')
+env.Package(PACKAGETYPE='src_targz',
+            NAME='src',
+            VERSION='1.0',
+            target='mine.tar.gz',
+            PACKAGEROOT='src-1.0',
+            source=['src/main.c', 'src/util.h'])
+""" % locals())
+
+test.run(arguments='mine.tar.gz')
+test.must_match('mine.tar.gz', "-zc\n", mode='r')
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4:
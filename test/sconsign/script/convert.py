@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+#
+# MIT License
+#
+# Copyright The SCons Foundation
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+"""
+Verify that sconsign --convert rewrites a signature database between
+the binary and pickle record formats without losing information.
+"""
+
+import pickle
+
+import TestSConsign
+
+from TestSCons import _python_
+
+test = TestSConsign.TestSConsign(match=TestSConsign.match_exact)
+
+test.subdir('sub')
+
+test.write('cat.py', r"""
+import sys
+with open(sys.argv[1], 'w') as ofp:
+    for f in sys.argv[2:]:
+        with open(f) as ifp:
+            ofp.write(ifp.read())
+""")
+
+test.write('SConstruct', """\
+DefaultEnvironment(tools=[])
+env = Environment(tools=[])
+env.Command('sub/all.out', ['a.in', 'b.in'], r'%(_python_)s cat.py $TARGET $SOURCES')
+env.Command('one.out', 'a.in', r'%(_python_)s cat.py $TARGET $SOURCES')
+""" % locals())
+
+test.write('a.in', "a.in\n")
+test.write('b.in', "b.in\n")
+
+test.run(arguments='.')
+
+
+def record_formats():
+    """Return the set of record formats used in the database."""
+    with open(test.workpath('.sconsign.dblite'), 'rb') as f:
+        records = pickle.load(f)
+    return {'binary' if v.startswith(b'\0SCB') else 'pickle'
+            for v in records.values()}
+
+
+test.must_be_writable('.sconsign.dblite')
+test.fail_test(record_formats() != {'binary'})
+
+test.run_sconsign(arguments='-c -s .sconsign.dblite')
+expect = test.stdout()
+
+test.run_sconsign(arguments='--convert=pickle .sconsign.dblite')
+test.fail_test(record_formats() != {'pickle'})
+test.run_sconsign(arguments='-c -s .sconsign.dblite', stdout=expect)
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments='--convert=binary .sconsign.dblite')
+test.fail_test(record_formats() != {'binary'})
+test.run_sconsign(arguments='-c -s .sconsign.dblite', stdout=expect)
+test.up_to_date(arguments='.')
+
+test.run_sconsign(arguments='--convert=text .sconsign.dblite',
+                  status=2, stderr=None, stdout=None)
+
+test.pass_test()
+
+# Local Variables:
+# tab-width:4
+# indent-tabs-mode:nil
+# End:
+# vim: set expandtab tabstop=4 shiftwidth=4: